@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for Privex AdminPlus
+
+Each benchmark is a function named ``bench_<name>``, which prints a table of it's results and returns them as a list of
+dicts. Benchmarks run under the bundled settings (``privex.adminplus.settings``) with a throwaway SQLite database, and
+can be ran from the command line::
+
+    python3 benchmarks.py                           # Run all benchmarks
+    python3 benchmarks.py registry                  # Run only bench_registry
+    python3 benchmarks.py scale --sizes 100 1000    # Run bench_scale with 100 and 1000 views
+    python3 benchmarks.py --json results.json       # Also save the results as JSON ('-' for stdout)
+
+The JSON output records the Python / Django / AdminPlus versions it was produced with, so results can be compared
+between releases.
+
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from types import ModuleType
+from unittest import mock
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "privex.adminplus.settings")
+_DB_DIR = tempfile.TemporaryDirectory(prefix='adminplus-bench-')
+os.environ.setdefault("DB_PATH", os.path.join(_DB_DIR.name, 'bench.sqlite3'))
+
+import django
+
+django.setup()
+
+from django.apps import apps
+from django.db import models
+from django.http import HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+from django.urls import URLResolver, path, resolve
+from django.urls.resolvers import RegexPattern
+from privex import adminplus
+from privex.adminplus.admin import CustomAdmin, pvx_context_processor
+from privex.adminplus import metrics
+from privex.adminplus.streaming import stream_response
+
+REGISTRY_SIZES = (100, 1000, 10000, 50000)
+RESOLVE_MODELS = 300
+RESOLVE_VIEWS = 1000
+STREAM_ROWS = 200000
+METRICS_CALLS = 500000
+STARTUP_RUNS = 10
+BLOCKTRANS_RENDERS = 500
+SCALE_SIZES = (100, 1000, 10000, 50000)
+SCALE_MAX_MODELS = 5000
+"""bench_scale registers ``min(views, SCALE_MAX_MODELS)`` models - creating model classes is slow, so raise it with ``--max-models``"""
+
+_MODELS = []
+
+
+def _bench_view(request):
+    pass
+
+
+def synth_models(n: int) -> list:
+    """Return ``n`` synthesized (unmigrated) models under the ``adminplus`` app label, creating them on first use"""
+    # Django expires the _meta cache of every model each time a model is created, so defer that until they're all created
+    with mock.patch.object(apps, 'clear_cache'):
+        while len(_MODELS) < n:
+            i = len(_MODELS)
+            _MODELS.append(type(f'BenchModel{i}', (models.Model,), {
+                '__module__': __name__, 'Meta': type('Meta', (), {'app_label': 'adminplus'}),
+            }))
+    apps.clear_cache()
+    return _MODELS[:n]
+
+
+def _avg_us(func, number: int) -> float:
+    """Average time of ``func()`` in microseconds, over ``number`` calls"""
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def _timed_ms(func) -> float:
+    """Time a single call of ``func()`` in milliseconds"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_registry(sizes=REGISTRY_SIZES):
+    """
+    Time registering ``n`` views one at a time using :meth:`.CustomAdmin.add_url`, and in one batch using
+    :meth:`.CustomAdmin.add_urls`. Each add_url call publishes a new registry snapshot, which only appends to the
+    registry's shared storage - per-view cost for both should stay flat as ``n`` grows.
+    """
+    rows = []
+    print(f"{'views':>8} | {'add_url total (s)':>18} | {'per view (us)':>14} | {'add_urls total (s)':>18} | {'per view (us)':>14}")
+    for n in sizes:
+        site = CustomAdmin('bench_admin')
+        start = time.perf_counter()
+        for i in range(n):
+            site.add_url(_bench_view, f'report_{i}/', name=f'report_{i}')
+        single = time.perf_counter() - start
+        site = CustomAdmin('bench_admin')
+        start = time.perf_counter()
+        site.add_urls((_bench_view, f'report_{i}/', dict(name=f'report_{i}')) for i in range(n))
+        batch = time.perf_counter() - start
+        print(f"{n:>8} | {single:>18.4f} | {single / n * 1e6:>14.2f} | {batch:>18.4f} | {batch / n * 1e6:>14.2f}")
+        rows.append(dict(views=n, add_url_s=single, add_urls_s=batch))
+    return rows
+
+
+def bench_resolve(n_models=RESOLVE_MODELS, n_views=RESOLVE_VIEWS, number=2000):
+    """
+    Compare URL resolve times with custom URLs mounted via :class:`.CustomURLResolver` (current layout), against the
+    previous layout, where :attr:`.CustomAdmin.custom_urls` were appended after the standard admin URLs.
+    """
+    site = CustomAdmin('bench_admin')
+    # On Django 3.2+ the legacy layout's custom URLs would be swallowed by the admin catch-all view, so disable it
+    # to compare like for like.
+    site.final_catch_all_view = False
+    for m in synth_models(n_models):
+        site.register(m)
+    for i in range(n_views):
+        site.add_url(_bench_view, {f'report_{i}/': f'report_{i}', f'report_{i}/<int:id>/': f'report_{i}_by_id'})
+    
+    legacy_urls = super(CustomAdmin, site).get_urls() + list(site.custom_urls)
+    layouts = dict(
+        legacy=URLResolver(RegexPattern(r'^/'), [path('admin/', (legacy_urls, 'admin', site.name))]),
+        resolver=URLResolver(RegexPattern(r'^/'), [path('admin/', site.urls)]),
+    )
+    paths = dict(
+        static_first='/admin/report_0/', static_last=f'/admin/report_{n_views - 1}/',
+        param_last=f'/admin/report_{n_views - 1}/5/', model_changelist=f'/admin/adminplus/benchmodel{n_models - 1}/',
+        admin_index='/admin/',
+    )
+    rows = []
+    print(f"{n_models} models, {n_views * 2} custom URLs - average resolve time per request (us)\n")
+    print(f"{'path':>18} | {'legacy':>10} | {'resolver':>10}")
+    for pname, p in paths.items():
+        res = {}
+        for lname, r in layouts.items():
+            r.resolve(p)
+            res[lname] = _avg_us(lambda: r.resolve(p), number)
+        print(f"{pname:>18} | {res['legacy']:>10.2f} | {res['resolver']:>10.2f}")
+        rows.append(dict(path=pname, legacy_us=res['legacy'], resolver_us=res['resolver']))
+    return rows
+
+
+def _stream_rows(n: int):
+    return (dict(id=i, title=f'Comment {i}', user='someone') for i in range(n))
+
+
+def bench_stream(n=STREAM_ROWS):
+    """
+    Compare peak memory use and time to first byte when exporting ``n`` rows as one :class:`.JsonResponse`, against
+    streaming them as NDJSON / CSV with :func:`.stream_response`
+    """
+    def json_response():
+        res = JsonResponse(dict(rows=list(_stream_rows(n))))
+        yield res.content
+    
+    def streamed(fmt):
+        return lambda: iter(stream_response(_stream_rows(n), fmt).streaming_content)
+    
+    rows = []
+    print(f"{n} rows\n")
+    print(f"{'mode':>14} | {'first byte (ms)':>16} | {'total (s)':>10} | {'peak memory (KiB)':>18}")
+    for mode, make in dict(json_response=json_response, ndjson=streamed('ndjson'), csv=streamed('csv')).items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        chunks = iter(make())
+        next(chunks)
+        first = time.perf_counter() - start
+        for _ in chunks:
+            pass
+        total = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{mode:>14} | {first * 1000:>16.2f} | {total:>10.3f} | {peak / 1024:>18.0f}")
+        rows.append(dict(mode=mode, rows=n, first_byte_ms=first * 1000, total_s=total, peak_kib=peak / 1024))
+    return rows
+
+
+def bench_metrics(number=METRICS_CALLS):
+    """
+    Measure the per-request overhead of :func:`.metered_view` - calling a trivial view directly, against calling it via
+    the metrics wrapper, with metrics kept in anonymous memory and in a file within ``ADMINPLUS_METRICS_DIR``
+    """
+    response = HttpResponse(b"ok")
+    
+    def view(request):
+        return response
+    
+    def timed(v):
+        v(None)
+        return _avg_us(lambda: v(None), number)
+    
+    base = timed(view)
+    rows = [dict(mode='unwrapped', per_call_us=base, overhead_us=0.0)]
+    print(f"{number} calls - average time per call (us)\n")
+    print(f"{'mode':>14} | {'per call':>10} | {'overhead':>10}")
+    print(f"{'unwrapped':>14} | {base:>10.3f} | {'-':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, metrics_dir in (('memory', None), ('mmap file', tmp)):
+            with override_settings(ADMINPLUS_METRICS_DIR=metrics_dir):
+                metrics._metrics = None
+                t = timed(metrics.metered_view(view, f'bench_admin\t{mode}'))
+                print(f"{mode:>14} | {t:>10.3f} | {t - base:>10.3f}")
+                rows.append(dict(mode=mode, per_call_us=t, overhead_us=t - base))
+        metrics._metrics = None
+    return rows
+
+
+def _superuser():
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    user = User.objects.filter(username='bench').first()
+    return user if user is not None else User.objects.create_superuser('bench', 'bench@example.com', 'bench')
+
+
+def _scale_case(n_views: int, n_models: int, user, number: int) -> dict:
+    # A singleton, so that pvx_context_processor finds the site by it's URL namespace
+    name = f'bench_scale_{n_views}'
+    site = CustomAdmin.admin_singleton(name)
+    bench_models = synth_models(n_models)
+    row = dict(views=n_views, models=n_models)
+    
+    def request():
+        req = RequestFactory().get('/admin/')
+        req.user, req.resolver_match = user, resolve('/admin/')
+        return req
+    
+    def context_processor():
+        ctx = pvx_context_processor(request())
+        return list(ctx['custom_pages']), len(ctx['custom_urls'])
+    
+    def index():
+        return site.index(request()).render()
+    
+    def sidebar():
+        req = request()
+        return render_to_string('admin/nav_sidebar.html', site.each_context(req), req)
+    
+    def add_urls(s: CustomAdmin):
+        s.add_urls(
+            (_bench_view, {f'report_{i}/': f'report_{i}', f'report_{i}/<int:id>/': f'report_{i}_by_id'}) for i in range(n_views)
+        )
+    
+    def peak_kib(func) -> float:
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+    
+    try:
+        row['register_models_ms'] = _timed_ms(lambda: [site.register(m) for m in bench_models])
+        row['add_urls_ms'] = _timed_ms(lambda: add_urls(site))
+        # Memory is measured separately, as tracing allocations slows everything down
+        row['registry_peak_kib'] = peak_kib(lambda: add_urls(CustomAdmin('bench_memory')))
+        row['url_is_registered_us'] = _avg_us(lambda: site.url_is_registered(f'report_{n_views - 1}/'), number)
+        
+        # "cold" is the first call after the registry changed, "warm" is every call after that
+        site.invalidate()
+        row['get_urls_cold_ms'] = _timed_ms(site.get_urls)
+        row['get_urls_warm_us'] = _avg_us(site.get_urls, number)
+        
+        urlconf = ModuleType('bench_urls')
+        urlconf.urlpatterns = [path('admin/', site.urls)]
+        with override_settings(ROOT_URLCONF=urlconf):
+            site.invalidate()
+            row['custom_urls_reverse_cold_ms'] = _timed_ms(lambda: site.custom_urls_reverse)
+            row['custom_urls_reverse_warm_us'] = _avg_us(lambda: site.custom_urls_reverse, number)
+            
+            paths = dict(
+                static_last=f'/admin/report_{n_views - 1}/', param_last=f'/admin/report_{n_views - 1}/5/',
+                model_changelist=f'/admin/adminplus/benchmodel{n_models - 1}/', admin_index='/admin/',
+            )
+            for pname, p in paths.items():
+                resolve(p)
+                row[f'resolve_{pname}_us'] = _avg_us(lambda: resolve(p), number)
+            
+            site.invalidate()
+            row['context_processor_cold_ms'] = _timed_ms(context_processor)
+            row['context_processor_warm_us'] = _avg_us(context_processor, number)
+            
+            renders = max(1, number // 100)
+            site.invalidate()
+            row['index_cold_ms'] = _timed_ms(index)
+            site.invalidate()
+            row['index_cold_peak_kib'] = peak_kib(index)
+            row['index_warm_ms'] = _avg_us(index, renders) / 1000
+            row['sidebar_warm_ms'] = _avg_us(sidebar, renders) / 1000
+    finally:
+        site.unregister([m for m in bench_models if site.is_registered(m)])
+        CustomAdmin._ct_admins.pop(name, None)
+    return row
+
+
+def bench_scale(sizes=SCALE_SIZES, max_models=SCALE_MAX_MODELS, number=1000):
+    """
+    Measure how the registry and admin pages scale with ``n`` custom views (each with a static and a parameterised URL)
+    and ``min(n, max_models)`` models: registration time and memory, :meth:`.CustomAdmin.url_is_registered`,
+    :meth:`.CustomAdmin.get_urls`, :attr:`.CustomAdmin.custom_urls_reverse`, :func:`.pvx_context_processor`, URL
+    resolving, and rendering the admin index / nav sidebar as a superuser.
+    """
+    user = _superuser()
+    cols = (
+        ('views', 'views', 7, 'd'), ('models', 'models', 6, 'd'), ('add_urls (ms)', 'add_urls_ms', 13, '.1f'),
+        ('registry (KiB)', 'registry_peak_kib', 14, '.0f'), ('is_registered (us)', 'url_is_registered_us', 18, '.3f'),
+        ('get_urls cold (ms)', 'get_urls_cold_ms', 18, '.2f'), ('reverse cold (ms)', 'custom_urls_reverse_cold_ms', 17, '.2f'),
+        ('context (us)', 'context_processor_warm_us', 12, '.1f'), ('resolve (us)', 'resolve_param_last_us', 12, '.2f'),
+        ('index cold (ms)', 'index_cold_ms', 15, '.1f'), ('index (ms)', 'index_warm_ms', 10, '.1f'),
+        ('sidebar (ms)', 'sidebar_warm_ms', 12, '.1f'),
+    )
+    rows = []
+    print(" | ".join(f"{title:>{width}}" for title, _, width, _ in cols))
+    for n in sizes:
+        row = _scale_case(n, min(n, max_models), user, number)
+        print(" | ".join(f"{row[key]:>{width}{fmt}}" for _, key, width, fmt in cols))
+        rows.append(row)
+    return rows
+
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+from django.conf import settings
+settings.configure(DATABASES={}, INSTALLED_APPS=[
+    'django.contrib.auth', 'django.contrib.contenttypes', 'django.contrib.sessions', 'django.contrib.messages',
+    'privex.adminplus.apps.PrivexAdminPlusConfig',
+])
+from django.contrib.auth.apps import AuthConfig
+from privex.adminplus.apps import PrivexAdminPlusConfig
+if sys.argv[1] == 'reinit':
+    PrivexAdminPlusConfig.inject_apps = lambda self: False
+ready_calls, _ready = [], AuthConfig.ready
+AuthConfig.ready = lambda self: (ready_calls.append(1), _ready(self))[1]
+import django
+start = time.perf_counter()
+django.setup()
+print(json.dumps(dict(setup_ms=(time.perf_counter() - start) * 1000, auth_ready_calls=len(ready_calls))))
+"""
+
+
+def bench_startup(runs=STARTUP_RUNS):
+    """
+    Compare ``django.setup()`` time in a fresh interpreter when ``PVXAdmin`` is missing from ``INSTALLED_APPS`` - injected
+    while the app registry loads (:meth:`.PrivexAdminPlusConfig.inject_apps`), against the ``_reinit_apps`` fallback,
+    which re-populates every app (running their ``ready()`` twice).
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [
+        os.path.dirname(os.path.abspath(__file__)), os.environ.get('PYTHONPATH')
+    ])))
+    env.pop('DJANGO_SETTINGS_MODULE', None)
+    rows = []
+    print(f"{runs} runs per mode\n")
+    print(f"{'mode':>8} | {'median setup (ms)':>18} | {'min setup (ms)':>15} | {'AuthConfig.ready calls':>22}")
+    for mode in ('inject', 'reinit'):
+        results = [
+            json.loads(subprocess.run(
+                [sys.executable, '-c', _STARTUP_SCRIPT, mode], env=env, check=True, capture_output=True, text=True
+            ).stdout)
+            for _ in range(runs)
+        ]
+        times = [r['setup_ms'] for r in results]
+        row = dict(mode=mode, median_setup_ms=statistics.median(times), min_setup_ms=min(times),
+                   auth_ready_calls=results[0]['auth_ready_calls'])
+        print(f"{mode:>8} | {row['median_setup_ms']:>18.2f} | {row['min_setup_ms']:>15.2f} | {row['auth_ready_calls']:>22}")
+        rows.append(row)
+    return rows
+
+
+_PLURAL_TEMPLATE = """{% load blocktranslate %}{% for cl in changelists %}
+{% blocktranslate trimmed with name=cl.name count counter=cl.result_count %}
+    {{ counter }} {{ name }} matches your search.
+{% plural %}
+    {{ counter }} {{ name }} match your search - showing 100% of them.
+{% endblocktranslate %}
+{% endfor %}"""
+
+
+def bench_blocktranslate(number=BLOCKTRANS_RENDERS):
+    """
+    Compare rendering templates using the backported ``{% blocktranslate %}`` tag, with it's message format strings built
+    once when the template is parsed (:class:`.BlockTranslateNode`), against rebuilding them on every render (as the tag
+    did before). The backported tags are loaded explicitly, so this runs on any Django version - though the admin only
+    uses them on Django 2.2 / 3.0.
+    """
+    from django.template import Context, Engine
+    from privex.adminplus.backports.templatetags.blocktranslate import BlockTranslateNode
+    
+    class PerRenderNode(BlockTranslateNode):
+        def render(self, context, nested=False):
+            self.singular_message, self.singular_vars = self.render_token_list(self.singular)
+            if self.plural:
+                self.plural_message, self.plural_vars = self.render_token_list(self.plural)
+            return super().render(context, nested)
+    
+    engine = Engine(libraries={
+        'i18n': 'django.templatetags.i18n', 'blocktranslate': 'privex.adminplus.backports.templatetags.blocktranslate',
+    })
+    app_list_path = os.path.join(os.path.dirname(adminplus.__file__), 'backports', 'templates', 'admin', 'app_list.html')
+    with open(app_list_path) as fh:
+        app_list = fh.read()
+    app_ctx = dict(request=RequestFactory().get('/admin/'), show_changelinks=True, app_list=[
+        dict(app_label=f'app{a}', app_url=f'/admin/app{a}/', name=f'App {a}', models=[
+            dict(object_name=f'Model{m}', name=f'Model {m}', admin_url=f'/admin/app{a}/model{m}/',
+                 add_url=f'/admin/app{a}/model{m}/add/', view_only=False)
+            for m in range(10)
+        ]) for a in range(20)
+    ])
+    plural_ctx = dict(changelists=[dict(name=f'Model {i}', result_count=i % 3) for i in range(50)])
+    
+    rows = []
+    print(f"{number} renders - average time per render (us)\n")
+    print(f"{'template':>24} | {'per render':>11} | {'precomputed':>11} | {'saved':>7}")
+    for name, source, ctx in (('admin/app_list.html', app_list, app_ctx), ('plural (synthetic)', _PLURAL_TEMPLATE, plural_ctx)):
+        precomputed, per_render = engine.from_string(source), engine.from_string(source)
+        for node in per_render.nodelist.get_nodes_by_type(BlockTranslateNode):
+            node.__class__ = PerRenderNode
+        assert precomputed.render(Context(ctx)) == per_render.render(Context(ctx))
+        old_us = _avg_us(lambda: per_render.render(Context(ctx)), number)
+        new_us = _avg_us(lambda: precomputed.render(Context(ctx)), number)
+        saved = (old_us - new_us) / old_us * 100
+        print(f"{name:>24} | {old_us:>11.2f} | {new_us:>11.2f} | {saved:>6.1f}%")
+        rows.append(dict(template=name, per_render_us=old_us, precomputed_us=new_us, saved_pct=saved))
+    return rows
+
+
+def _environment() -> dict:
+    return dict(
+        adminplus=adminplus.VERSION, django=django.get_version(), python=platform.python_version(),
+        implementation=platform.python_implementation(), platform=platform.platform(),
+        time=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def main(argv=None):
+    import logging
+    logging.getLogger('privex.adminplus').setLevel(logging.ERROR)
+    
+    benches = {k[len('bench_'):]: v for k, v in globals().items() if k.startswith('bench_') and callable(v)}
+    parser = argparse.ArgumentParser(description="Privex AdminPlus micro-benchmarks")
+    parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run (default: all) - {', '.join(benches.keys())}")
+    parser.add_argument('--json', metavar='PATH', help="Save the results as JSON to PATH ('-' for stdout, tables go to stderr)")
+    parser.add_argument('--sizes', type=int, nargs='+', help="Number of views for bench_registry / bench_scale")
+    parser.add_argument('--max-models', type=int, default=SCALE_MAX_MODELS, help="Maximum number of models for bench_scale")
+    args = parser.parse_args(argv)
+    selected = args.benchmarks or list(benches.keys())
+    unknown = [b for b in selected if b not in benches]
+    if len(unknown) > 0:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+    
+    results = {}
+    with redirect_stdout(sys.stderr if args.json == '-' else sys.stdout):
+        for b in selected:
+            kwargs = {}
+            if args.sizes and b in ('registry', 'scale'):
+                kwargs['sizes'] = args.sizes
+            if b == 'scale':
+                kwargs['max_models'] = args.max_models
+            print(f"\n=== {b} ===\n")
+            results[b] = benches[b](**kwargs)
+    
+    if args.json:
+        out = json.dumps(dict(environment=_environment(), results=results), indent=2)
+        if args.json == '-':
+            print(out)
+        else:
+            with open(args.json, 'w') as fh:
+                fh.write(out + '\n')
+
+
+if __name__ == "__main__":
+    main()
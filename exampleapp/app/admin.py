@@ -5,6 +5,7 @@ from django.views import View
 from privex.adminplus.admin import ct_register, register_url, CustomAdmin
 from app.models import Comment, Post
 import logging
+import time
 
 log = logging.getLogger(__name__)
 
@@ -36,8 +37,8 @@ def debug_urls(request):
     log.warning("ctadmin.custom_url_map: %s", ctadmin.custom_url_map)
     return JsonResponse(dict(
         custom_urls=[str(u) for u in ctadmin.custom_urls],
-        custom_url_map=ctadmin.custom_url_map,
-        custom_urls_reverse=ctadmin.custom_urls_reverse
+        custom_url_map=dict(ctadmin.custom_url_map),
+        custom_urls_reverse=dict(ctadmin.custom_urls_reverse)
     ))
 
 
@@ -83,6 +84,42 @@ def post_info(request: HttpRequest, post_id=None):
     return JsonResponse(dict(error=True, message="no post id in URL"))
 
 
+@register_url('post_info/<int:post_id>/comments.ndjson', name='post_comments_ndjson', stream='ndjson',
+              permissions=['app.view_comment'])
+def post_comments_export(request: HttpRequest, post_id):
+    """Streams a post's comments as NDJSON - unlike ``post_comments``, the comments are never all held in memory"""
+    return Comment.objects.filter(post_id=post_id).values('id', 'title', 'content', 'user__username')
+
+
+@register_url('comments.csv', human='Export Comments (CSV)', permissions=['app.view_comment'],
+              stream=dict(format='csv', filename='comments.csv', fields=['id', 'post_id', 'title', 'username']))
+def comments_csv(request: HttpRequest):
+    return Comment.objects.order_by('id').values_list('id', 'post_id', 'title', 'user__username')
+
+
+@register_url('slow_report/', human='Slow Report (Background Job)', background=True)
+def slow_report(request: HttpRequest):
+    """Ran as a background job - the request redirects straight to the job's status page, which links to this response"""
+    time.sleep(5)
+    return JsonResponse(dict(posts=Post.objects.count(), comments=Comment.objects.count()))
+
+
+def latest_comment_etag(request: HttpRequest):
+    return str(Comment.objects.order_by('-pk').values_list('pk', flat=True).first())
+
+
+@register_url('latest_comments/', human='Latest Comments (Conditional GET)', etag=latest_comment_etag)
+def latest_comments(request: HttpRequest):
+    """Answers polling clients with HTTP 304 until a new comment is posted - without running the query below"""
+    return JsonResponse(dict(comments=list(Comment.objects.order_by('-pk').values('id', 'title', 'user__username')[:50])))
+
+
+@register_url('post_stats/', human='Post Stats (Cached)', cache_timeout=60)
+def post_stats(request: HttpRequest):
+    """Cached for 60 seconds per set of user permissions - call ``clear_view_cache('post_stats')`` to refresh it early"""
+    return JsonResponse(dict(posts=Post.objects.count(), comments=Comment.objects.count(), generated=time.time()))
+
+
 def yet_another_test_view(request: HttpRequest):
     return JsonResponse(dict(hello='world'))
 
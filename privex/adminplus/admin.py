@@ -1,19 +1,50 @@
+import collections.abc
 import copy
+import gc
+import hashlib
+import time
+import hmac
+import itertools
+import os
 import re
 import threading
-from inspect import isclass
-from typing import List, Optional, Union, Dict
+from datetime import datetime, timezone
+from functools import update_wrapper
+from inspect import isclass, isfunction, unwrap
+from types import MappingProxyType
+from typing import Any, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union, Dict
 from django.contrib import admin
 from django.db.models import Model
-from django.http import HttpRequest
-from django.urls import URLResolver, URLPattern, path, reverse
+from django.db.models.base import ModelBase
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.template import TemplateDoesNotExist, loader
+from django.template.response import TemplateResponse
+from django.conf import settings
+from django.urls import NoReverseMatch, Resolver404, URLResolver, URLPattern, get_resolver, get_script_prefix, get_urlconf, \
+    path, reverse, set_script_prefix
+from django.urls.resolvers import RoutePattern
+from django.utils.functional import SimpleLazyObject, cached_property
+from django.utils.module_loading import import_string
+from django.utils.translation import get_language, override
 from django.views import View
-from privex.helpers import camel_to_snake, empty, human_name, empty_if, DictObject
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_protect
+from privex.helpers import camel_to_snake, empty, human_name, empty_if, is_true, DictObject
+from privex.adminplus.cache import cached_view, invalidate_version
+from privex.adminplus.jobs import background_view, get_store
+from privex.adminplus.manifest import load_manifest
+from privex.adminplus.metrics import LATENCY_BUCKETS, collect, metered_view, prometheus_text, quantile
+from privex.adminplus.profiler import get_profiles, profiled_view, profiling_enabled
+from privex.adminplus.resolvers import CustomURLResolver
+from privex.adminplus.streaming import streaming_view
+from privex.adminplus.views import ASYNC_VIEWS, LazyView, aget_user, async_to_sync, conditional_view, iscoroutinefunction, \
+    require_permissions, sync_to_async
 import logging
 
 log = logging.getLogger(__name__)
 
-STORE = DictObject(is_setup=False)
+STORE = DictObject(is_setup=False, manifest=None)
 
 _RE_ANGLE_PARAMS = re.compile(r'<[a-zA-Z0-9_:-]+>')
 _RE_BRACKET_PARAMS = re.compile(r'\(\?P.*\)')
@@ -22,50 +53,953 @@ URL_TYPES = Optional[Union[str, List[str], Dict[str, str]]]
 
 PATH_TYPES = Union[URLResolver, URLPattern]
 
+VISIBLE_CACHE_SIZE = 1024
+"""Maximum number of permission signatures :meth:`.CustomAdmin.get_visible_urls` caches per generation before starting afresh"""
+
+APP_LIST_CACHE_SIZE = 1024
+"""Maximum number of app lists :meth:`.CustomAdmin.get_app_list` caches per generation before starting afresh"""
+
+_SUPERUSER = '*'
+"""Permission signature used for active superusers, who can see every custom URL"""
+
+_UNSET = object()
+
+_GENERATIONS = itertools.count(1)
+"""Source of unique :attr:`.CustomAdmin.generation` values. ``next()`` on a count is atomic, so concurrent bumps never collide."""
+
+URL_SPEC_TYPES = Union[dict, Tuple[Any, URL_TYPES], Tuple[Any, URL_TYPES, dict]]
+
+WARM_UP_TEMPLATES = (
+    'admin/base.html', 'admin/base_site.html', 'admin/index.html', 'admin/nav_sidebar.html', 'admin/custom_pages_box.html',
+    'admin/app_list.html', 'admin/change_list.html', 'admin/change_form.html', 'admin/login.html',
+)
+"""Templates compiled by :meth:`.CustomAdmin.warm_up` - override with ``settings.ADMINPLUS_WARM_UP_TEMPLATES``"""
+
+
+class VisibleURLs(tuple):
+    """A tuple of the custom URL entries visible to a user, as returned by :meth:`.CustomAdmin.get_visible_urls`"""
+    
+    @cached_property
+    def digest(self) -> str:
+        """A hash of the visible entries' routes, URLs and human names - suitable for use in cache keys"""
+        return hashlib.sha1('\n'.join(f"{o.route}\t{o.url}\t{o.human}" for o in self).encode('utf-8')).hexdigest()
+
+
+class SnapshotSequence(collections.abc.Sequence):
+    """
+    A read-only view of the first ``size`` items of an append-only list, which is shared between every
+    :class:`.RegistrySnapshot` of a registry. Items appended after the view was created are never visible through it.
+    """
+    __slots__ = ('_items', '_size')
+    
+    def __init__(self, items: list, size: int):
+        self._items, self._size = items, size
+    
+    def __len__(self):
+        return self._size
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self._items[:self._size][i])
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError('SnapshotSequence index out of range')
+        return self._items[i]
+    
+    def __iter__(self):
+        # islice stops at our size, even if the list is appended to while iterating
+        return itertools.islice(self._items, self._size)
+    
+    def __eq__(self, other):
+        if not isinstance(other, (tuple, list, SnapshotSequence)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({self._size} items)>"
+
+
+class SnapshotMap(collections.abc.Mapping):
+    """
+    A read-only view of the first ``size`` keys of an append-only mapping, which is shared between every
+    :class:`.RegistrySnapshot` of a registry. ``data`` maps each key to a tuple of ``(index in keys, value)``, and keys
+    added after the view was created are never visible through it.
+    """
+    __slots__ = ('_data', '_keys', '_size')
+    
+    def __init__(self, data: Dict[Any, Tuple[int, Any]], keys: list, size: int):
+        self._data, self._keys, self._size = data, keys, size
+    
+    def __getitem__(self, key):
+        i, value = self._data[key]
+        if i >= self._size:
+            raise KeyError(key)
+        return value
+    
+    def get(self, key, default=None):
+        hit = self._data.get(key)
+        return hit[1] if hit is not None and hit[0] < self._size else default
+    
+    def __contains__(self, key):
+        hit = self._data.get(key)
+        return hit is not None and hit[0] < self._size
+    
+    def __iter__(self):
+        return itertools.islice(self._keys, self._size)
+    
+    def __len__(self):
+        return self._size
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({self._size} keys)>"
+
+
+class _RegistryLog:
+    """
+    The append-only storage behind a :class:`.CustomAdmin`'s registry snapshots. Writers (holding
+    :attr:`.CustomAdmin._write_lock`) only ever append to it, then publish a snapshot of :class:`.SnapshotSequence` /
+    :class:`.SnapshotMap` views sized to the new contents - so publishing costs O(entries added), rather than a copy
+    of the whole registry, and readers holding an older snapshot never see the new entries.
+    """
+    __slots__ = ('urls', 'routes', 'route_data', 'spec_data', 'names', 'name_data')
+    
+    def __init__(self):
+        self.urls: List[PATH_TYPES] = []
+        self.routes: List[str] = []
+        self.route_data: Dict[str, Tuple[int, DictObject]] = {}
+        self.spec_data: Dict[str, Tuple[int, Optional[DictObject]]] = {}
+        self.names: List[str] = []
+        self.name_data: Dict[str, Tuple[int, DictObject]] = {}
+
+
+class RegistrySnapshot(NamedTuple):
+    """
+    An immutable, self-consistent view of a :class:`.CustomAdmin`'s custom URL registry, as returned by
+    :attr:`.CustomAdmin.snapshot`.
+    
+    Writers never modify a snapshot - they append to the registry's shared storage (which the snapshot's views can't see
+    past their own size) and swap in a new snapshot, so anything holding a snapshot (e.g. a request thread half way
+    through rendering the custom pages list) keeps a consistent view of the registry, without locking.
+    The :class:`.DictObject` entries within :attr:`.url_map` / :attr:`.url_names` are shared between snapshots, and
+    must be treated as read-only.
+    """
+    generation: int
+    """The :attr:`.CustomAdmin.generation` this snapshot was published as"""
+    urls: Sequence[PATH_TYPES]
+    """The custom URL patterns, in registration order"""
+    url_map: Mapping[str, DictObject]
+    """Custom URL entries keyed by their route, in registration order"""
+    url_names: Mapping[str, DictObject]
+    """Custom URL entries keyed by their URL ``name`` (the first route registered with a name wins)"""
+    permissions: frozenset
+    """Every permission required by at least one custom URL"""
+    specs: Mapping[str, DictObject] = MappingProxyType({})
+    """How each route was registered (the arguments of it's :meth:`.CustomAdmin.add_url` call), keyed by route - entries
+    registered by the same call share one spec. Used to save the registry to a manifest (:mod:`privex.adminplus.manifest`)."""
+    
+    @classmethod
+    def empty(cls) -> "RegistrySnapshot":
+        return cls(0, (), MappingProxyType({}), MappingProxyType({}), frozenset())
+
+
+def _import_admin_class(admin_path: str, admin_site: "CustomAdmin") -> type:
+    # The ModelAdmin's module may re-register views (and the ModelAdmin) which were already loaded from a manifest
+    sites = {id(s): s for s in [admin_site, *CustomAdmin._ct_admins.values()]}.values()
+    for site in sites:
+        site._loading_manifest = True
+    try:
+        return import_string(admin_path)
+    finally:
+        for site in sites:
+            site._loading_manifest = False
+
+
+class LazyModelAdmin:
+    """
+    Stands in for a ModelAdmin in :attr:`.CustomAdmin._registry`, and only instantiates the ModelAdmin class (running it's
+    ``__init__``, and building it's form / media machinery) the first time something other than it's URLs is needed -
+    e.g. when one of it's views is dispatched, or :meth:`.CustomAdmin.get_app_list` checks it's permissions.
+    
+    ``model``, ``opts`` and ``admin_site`` are available without instantiating. Methods are returned as wrappers which look
+    the method up on the real instance when they're called, so a ModelAdmin's URL patterns (including any added by an
+    overridden ``get_urls``) can be built with this proxy as ``self``, and it's only instantiated once one of it's views is
+    dispatched. Every other attribute is read from (or written to) the real instance, and ``__class__`` reports the
+    ModelAdmin class, so ``isinstance`` checks (and ``super()`` within ModelAdmin methods) still work.
+    
+    The ModelAdmin class may also be passed as it's dotted path (e.g. by :func:`.load_manifest`), in which case it's module
+    isn't imported until the class is first needed - when the admin URLs are built, or the ModelAdmin is instantiated.
+    """
+    __slots__ = ('_admin_class', 'model', 'opts', 'admin_site', '_instance', '_lock')
+    
+    def __init__(self, admin_class: Union[type, str], model: type, admin_site: "CustomAdmin"):
+        object.__setattr__(self, '_admin_class', admin_class)
+        object.__setattr__(self, 'model', model)
+        object.__setattr__(self, 'opts', model._meta)
+        object.__setattr__(self, 'admin_site', admin_site)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+    
+    @property
+    def admin_class(self) -> type:
+        """The ModelAdmin class - imported on first access if this proxy was created with it's dotted path"""
+        admin_class = self._admin_class
+        if isinstance(admin_class, str):
+            log.debug("Importing ModelAdmin %s for model %s on admin site '%s'", admin_class, self.opts.label, self.admin_site.name)
+            admin_class = _import_admin_class(admin_class, self.admin_site)
+            object.__setattr__(self, '_admin_class', admin_class)
+        return admin_class
+    
+    @property
+    def admin_path(self) -> str:
+        """The dotted path of the ModelAdmin class (available without importing it)"""
+        admin_class = self._admin_class
+        return admin_class if isinstance(admin_class, str) else f"{admin_class.__module__}.{admin_class.__qualname__}"
+    
+    @property
+    def is_imported(self) -> bool:
+        """``True`` once the ModelAdmin class has been imported (always ``True`` if the proxy was created with the class)"""
+        return not isinstance(self._admin_class, str)
+    
+    def _adopt_class(self, admin_class: type) -> bool:
+        """
+        Use the class ``admin_class`` if it's the (not yet imported) ModelAdmin class at :attr:`.admin_path` - i.e. when the
+        ModelAdmin's module re-registers the model (via ``@admin.register``) as it's imported
+        """
+        if self.is_imported or not isclass(admin_class) or f"{admin_class.__module__}.{admin_class.__qualname__}" != self.admin_path:
+            return False
+        object.__setattr__(self, '_admin_class', admin_class)
+        return True
+    
+    @property
+    def __class__(self):
+        return self.admin_class
+    
+    @property
+    def instance(self) -> admin.ModelAdmin:
+        """The real ModelAdmin instance - created on first access"""
+        if self._instance is None:
+            admin_class = self.admin_class
+            with self._lock:
+                if self._instance is None:
+                    log.debug("Instantiating %s for model %s on admin site '%s'", admin_class.__name__,
+                              self.opts.label, self.admin_site.name)
+                    object.__setattr__(self, '_instance', admin_class(self.model, self.admin_site))
+        return self._instance
+    
+    @property
+    def is_loaded(self) -> bool:
+        """``True`` once the real ModelAdmin has been instantiated"""
+        return self._instance is not None
+    
+    def get_urls(self) -> List[PATH_TYPES]:
+        if self._instance is not None:
+            return self._instance.get_urls()
+        return self.admin_class.get_urls(self)
+    
+    @property
+    def urls(self) -> List[PATH_TYPES]:
+        if self._instance is not None or self.admin_class.urls is not admin.ModelAdmin.urls:
+            return self.instance.urls
+        return self.get_urls()
+    
+    def _lazy_method(self, name: str, func: callable) -> callable:
+        def _method(*args, **kwargs):
+            return getattr(self.instance, name)(*args, **kwargs)
+        return update_wrapper(_method, func)
+    
+    def __getattr__(self, name):
+        # Unset slots and dunder lookups (e.g. by copy / pickle) must not instantiate the ModelAdmin
+        if name in LazyModelAdmin.__slots__ or name.startswith('__'):
+            raise AttributeError(name)
+        if self._instance is None:
+            func = getattr(self.admin_class, name, None)
+            if isfunction(func):
+                return self._lazy_method(name, func)
+        return getattr(self.instance, name)
+    
+    def __setattr__(self, name, value):
+        if name in LazyModelAdmin.__slots__:
+            return object.__setattr__(self, name, value)
+        setattr(self.instance, name, value)
+    
+    def __delattr__(self, name):
+        delattr(self.instance, name)
+    
+    def __str__(self):
+        return f"{self.opts.app_label}.{self.admin_path.rpartition('.')[2]}"
+    
+    def __repr__(self):
+        return f"<{type(self).__name__}: {self.admin_path} model={self.model.__qualname__} " \
+               f"site={self.admin_site!r} loaded={self.is_loaded}>"
+
 
 class CustomAdmin(admin.AdminSite):
     """
     To allow for custom admin views, we override AdminSite, so we can add custom URLs, among other things.
-    """
-    custom_urls: List[PATH_TYPES] = []
-    custom_url_map: Dict[str, DictObject] = DictObject()
     
-    _ct_admins = {}
+    Each instance has it's own registry of custom URLs - to run several admin sites, create one singleton per site
+    using :meth:`.admin_singleton`, and register views onto them with ``register_url(site=...)``.
+    """
+    _ct_admins: Dict[str, "CustomAdmin"] = {}
     _sngl_lock = threading.Lock()
     
+    profile_sql: Optional[bool] = None
+    """
+    Set to ``True`` / ``False`` to enable / disable the SQL profiler (see :mod:`privex.adminplus.profiler`) for this site,
+    regardless of ``settings.ADMINPLUS_PROFILE_SQL``
+    """
+    
     def __init__(self, name='custom_admin'):
-        # self.custom_urls = []
-        # self.custom_url_map = DictObject()
+        self._snapshot: RegistrySnapshot = RegistrySnapshot.empty()
+        """The currently published registry snapshot - replaced (never modified) by writers while holding :attr:`._write_lock`"""
+        self._write_lock = threading.RLock()
+        """Serialises registry writers. Readers never take this lock - they just read :attr:`._snapshot`"""
+        self._log = _RegistryLog()
+        """Append-only storage shared by the registry snapshots - only modified while holding :attr:`._write_lock`"""
+        self._urls_cache: Optional[Tuple[int, List[PATH_TYPES]]] = None
+        self._reverse_cache: Optional[Tuple[int, Dict[str, Mapping[str, DictObject]]]] = None
+        self._admin_roots: Dict[tuple, str] = {}
+        self._visible_cache: Optional[Tuple[int, Dict[tuple, VisibleURLs]]] = None
+        self._app_list_cache: Optional[Tuple[int, Dict[tuple, List[dict]]]] = None
+        self._loading_manifest = False
+        """``True`` while a ModelAdmin module registered from a manifest is imported, re-registering views already loaded from it"""
         super().__init__(name)
     
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """
+        The current :class:`.RegistrySnapshot` of the custom URL registry. Reading it never blocks - if you need several
+        registry attributes to agree with each other, read them all from the same snapshot.
+        """
+        return self._snapshot
+    
+    @property
+    def custom_urls(self) -> Sequence[PATH_TYPES]:
+        """The registered custom URL patterns (a read-only sequence - use :meth:`.add_url` / :meth:`.add_urls` to register URLs)"""
+        return self._snapshot.urls
+    
+    @property
+    def custom_url_map(self) -> Mapping[str, DictObject]:
+        """A read-only mapping of custom URL routes to their entry, e.g. ``{'hello/': {'name': 'hello', 'human': 'Hello', ...}}``"""
+        return self._snapshot.url_map
+    
+    @property
+    def custom_url_names(self) -> Mapping[str, DictObject]:
+        """A read-only index of :attr:`.custom_url_map` entries keyed by their URL ``name``"""
+        return self._snapshot.url_names
+    
+    @property
+    def generation(self) -> int:
+        """
+        A counter which changes whenever custom URLs are added, or models are registered / unregistered. Anything derived
+        from the registry (e.g. :meth:`.get_urls`) is cached against the generation it was built for.
+        """
+        return self._snapshot.generation
+    
+    def _publish(self, snapshot: RegistrySnapshot) -> RegistrySnapshot:
+        # A single attribute assignment is atomic, so readers see either the old or the new snapshot - never a mix.
+        self._snapshot = snapshot
+        return snapshot
+    
+    def invalidate(self) -> int:
+        """
+        Bump :attr:`.generation`, so that anything cached from the registry is rebuilt on next use. This is called for you by
+        :meth:`.add_url`, :meth:`.register` and :meth:`.unregister` - you only need to call it if you modify ``_registry``
+        directly.
+        
+        :return int generation: The new generation
+        """
+        with self._write_lock:
+            return self._publish(self._snapshot._replace(generation=next(_GENERATIONS))).generation
+    
+    def register(self, model_or_iterable, admin_class=None, **options):
+        """
+        Same as :meth:`django.contrib.admin.AdminSite.register`, except that the ModelAdmin classes aren't instantiated
+        until they're first used - each model is registered with a :class:`.LazyModelAdmin`, so booting a worker doesn't
+        construct a ModelAdmin for every model, only for those it actually serves.
+        
+        ``admin_class`` may also be the dotted path of the ModelAdmin class, which is then only imported once it's needed
+        (see :class:`.LazyModelAdmin`). Registering a model again with the class at that path, while it hasn't been
+        imported yet (e.g. by an ``@admin.register`` decorator as it's module is imported), is ignored.
+        
+        Set ``settings.ADMINPLUS_LAZY_ADMINS = False`` to instantiate ModelAdmins on registration, as Django does.
+        """
+        with self._write_lock:
+            try:
+                lazy = is_true(getattr(settings, 'ADMINPLUS_LAZY_ADMINS', True))
+                if isinstance(model_or_iterable, ModelBase):
+                    model_or_iterable = [model_or_iterable]
+                if isinstance(admin_class, str) and (options or not lazy):
+                    model_or_iterable, registered = list(model_or_iterable), set(self._registry.keys())
+                    admin_class = _import_admin_class(admin_class, self)
+                    # Skip models which importing the ModelAdmin's module has just registered (e.g. via @admin.register)
+                    model_or_iterable = [m for m in model_or_iterable if m in registered or not self.is_registered(m)]
+                if not lazy:
+                    return super().register(model_or_iterable, admin_class, **options)
+                admin_class = admin_class or admin.ModelAdmin
+                for model in model_or_iterable:
+                    existing = self._registry.get(model)
+                    if isinstance(existing, LazyModelAdmin) and not options and existing._adopt_class(admin_class):
+                        continue
+                    if model._meta.abstract or getattr(model._meta, 'is_composite_pk', False) or self.is_registered(model):
+                        # Let Django raise the appropriate (version specific) exception
+                        super().register(model, admin_class, **options)
+                    # Ignore the registration if the model has been swapped out
+                    if model._meta.swapped:
+                        continue
+                    model_admin = admin_class
+                    if options:
+                        # Same as Django - build a subclass of admin_class with the options
+                        options['__module__'] = admin.sites.__name__
+                        model_admin = type(f"{model.__name__}Admin", (admin_class,), options)
+                    self._registry[model] = LazyModelAdmin(model_admin, model, self)
+            finally:
+                self.invalidate()
+    
+    def unregister(self, model_or_iterable):
+        with self._write_lock:
+            super().unregister(model_or_iterable)
+            self.invalidate()
+    
     @classmethod
-    def admin_singleton(cls, singleton_name='default', *args, **kwargs):
+    def admin_singleton(cls, singleton_name='default', *args, **kwargs) -> "CustomAdmin":
+        """
+        Get or create the :class:`.CustomAdmin` instance named ``singleton_name``. Each singleton has it's own custom URL
+        registry, so separate admin sites (e.g. ``'staff'`` and ``'ops'``) only carry their own views::
+        
+            >>> ops_admin = CustomAdmin.admin_singleton('ops')
+            >>> ops_admin.name
+            'ops'
+            >>> urlpatterns = [path('ops-admin/', ops_admin.urls), path('admin/', admin.site.urls)]
+        
+        Singletons other than ``'default'`` use ``singleton_name`` as their site ``name`` (URL instance namespace), unless
+        a ``name`` is passed, so that each site reverses it's own URLs when mounted in the same URLconf.
+        """
         with cls._sngl_lock:
             n = singleton_name
             if empty(cls._ct_admins.get(n, None)):
+                if n != 'default' and len(args) == 0 and 'name' not in kwargs:
+                    kwargs['name'] = n
                 log.debug("Creating new CustomAdmin singleton '%s'... args: %s | kwargs: %s", n, args, kwargs)
                 cls._ct_admins[n] = cls(*args, **kwargs)
         return cls._ct_admins[n]
     
+    @classmethod
+    def get_site(cls, site: Optional[Union[str, "CustomAdmin"]] = None) -> "CustomAdmin":
+        """
+        Resolve the ``site`` argument accepted by :func:`.register_url` and friends - ``None`` for the default singleton
+        (:attr:`.ctadmin`), a singleton name (see :meth:`.admin_singleton`), or a :class:`.CustomAdmin` instance.
+        """
+        if site is None:
+            return cls.admin_singleton()
+        if isinstance(site, str):
+            return cls.admin_singleton(site)
+        return site
+    
+    @classmethod
+    def site_for_request(cls, request: HttpRequest) -> "CustomAdmin":
+        """
+        Returns the :class:`.CustomAdmin` singleton which ``request`` was resolved into (matched by URL instance namespace,
+        i.e. the site's ``name``), falling back to the default singleton for requests outside of any admin site.
+        """
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and len(match.namespaces) > 0:
+            sites = {s.name: s for s in list(cls._ct_admins.values())}
+            for ns in reversed(match.namespaces):
+                if ns in sites:
+                    return sites[ns]
+        return cls.admin_singleton()
+    
     def get_urls(self) -> List[PATH_TYPES]:
-        """Returns a list of merged URLs by combining :meth:`.get_urls` via superclass with :attr:`.custom_urls`"""
-        _urls = super(CustomAdmin, self).get_urls()
-        urls = self.custom_urls
-        return _urls + urls
+        """
+        Returns a list of merged URLs by combining :meth:`.get_urls` via superclass with :attr:`.custom_urls`
+        
+        The static custom routes (e.g. ``hello/``) are mounted as a :class:`.CustomURLResolver` ahead of the standard admin
+        URLs, so they resolve with a dict lookup, rather than after failing to match every ModelAdmin pattern. Parameterised
+        custom routes are mounted as a second :class:`.CustomURLResolver` after the standard admin URLs, so routes such as
+        ``<str:username>/`` can't capture admin pages like ``login/`` or ``<app_label>/`` - but still before the admin's
+        catch-all view on newer Django versions, so they aren't swallowed by it. Static routes which would replace an admin
+        page (e.g. ``login/`` or ``auth/user/``) are logged as a warning, and mounted after the admin URLs too - see
+        :meth:`.split_custom_urls`.
+        
+        The URLs are built once per :attr:`.generation` - repeat calls (e.g. when the URLconf is reloaded) return a copy of
+        the cached list until the registry changes, or :meth:`.invalidate` is called.
+        """
+        snap, cached = self._snapshot, self._urls_cache
+        if cached is None or cached[0] != snap.generation:
+            _urls = super(CustomAdmin, self).get_urls()
+            # On Django 3.2+ the admin URLs end with a catch-all view, which must stay last
+            n = len(_urls) - 1 if getattr(self, 'final_catch_all_view', False) else len(_urls)
+            front, back = self.split_custom_urls(snap.urls, _urls[:n])
+            cached = self._urls_cache = (
+                snap.generation,
+                [CustomURLResolver(front)] + _urls[:n] + self.get_job_urls() + self.get_metrics_urls() +
+                [CustomURLResolver(back)] + _urls[n:]
+            )
+        # Return a copy, since subclasses commonly extend the list returned by super().get_urls() in place
+        return list(cached[1])
+    
+    def split_custom_urls(self, custom_urls: Iterable[PATH_TYPES], admin_urls: List[PATH_TYPES]) -> Tuple[list, list]:
+        """
+        Split ``custom_urls`` into the patterns which :meth:`.get_urls` mounts ahead of the standard admin URLs
+        (``admin_urls``), and those mounted after them.
+        
+        Static routes go first, unless the admin URLs already resolve that path (e.g. ``login/``, ``auth/`` or a registered
+        model's ``auth/user/``) - a custom view must never silently replace an admin page, so such routes are logged as
+        a warning, and mounted after the admin URLs, along with every parameterised route. Only static routes whose first
+        path segment starts an admin URL are resolved against the admin URLs, so the check stays cheap for large registries.
+        
+        :param custom_urls: The custom URL patterns, e.g. :attr:`.custom_urls`
+        :param admin_urls: The standard admin URL patterns (without the catch-all view)
+        :return Tuple[list,list] split: ``(front, back)`` - the patterns to mount before / after the admin URLs
+        """
+        segments, check_all = set(), False
+        for u in admin_urls:
+            if not isinstance(u.pattern, RoutePattern):
+                # AdminSite's app index is a regex pattern, matching any registered app label
+                segments.update(m._meta.app_label for m in self._registry)
+                continue
+            segment = u.pattern._route.split('/', 1)[0]
+            check_all = check_all or '<' in segment
+            segments.add(segment)
+        
+        front, back = [], []
+        for p in custom_urls:
+            if not CustomURLResolver.is_static(p):
+                back.append(p)
+                continue
+            route = p.pattern._route
+            if (check_all or route.split('/', 1)[0] in segments) and self._admin_resolves(admin_urls, route):
+                log.warning("Custom URL %s on admin site '%s' collides with an admin page - mounting it after the admin URLs",
+                            route, self.name)
+                back.append(p)
+            else:
+                front.append(p)
+        return front, back
+    
+    @staticmethod
+    def _admin_resolves(admin_urls: List[PATH_TYPES], route: str) -> bool:
+        for u in admin_urls:
+            try:
+                if u.resolve(route):
+                    return True
+            except Resolver404:
+                continue
+        return False
     
     @property
-    def custom_urls_reverse(self):
+    def custom_urls_reverse(self) -> Mapping[str, DictObject]:
         """
-        Iterates over :attr:`.custom_url_map` and ensures all URL dictionaries have a ``url`` field, which
+        A read-only copy of :attr:`.custom_url_map`, where every non-hidden URL dictionary has a ``url`` field, which
         points to their reversed URL based on their ``name``
+        
+        The table is built once per :attr:`.generation`, URLconf and script prefix (the first time it's needed, once the
+        URLconf is ready), so reading it is just a dict lookup. Nothing in :attr:`.custom_url_map` is modified.
         """
-        for _, obj in self.custom_url_map.items():
-            if obj.hidden:
-                continue
-            if 'url' not in obj:
-                obj['url'] = reverse(f"admin:{obj.name}")
+        return self._reverse_table(self._snapshot)
+    
+    @staticmethod
+    def _url_key() -> tuple:
+        # Reversed URLs depend on the current URLconf (e.g. request.urlconf) as well as the script prefix
+        return get_urlconf(settings.ROOT_URLCONF), get_script_prefix()
+    
+    def _reverse_table(self, snap: RegistrySnapshot) -> Mapping[str, DictObject]:
+        key, cache = self._url_key(), self._reverse_cache
+        if cache is None or cache[0] != snap.generation:
+            cache = self._reverse_cache = (snap.generation, {})
+        table = cache[1].get(key)
+        if table is None:
+            table = cache[1][key] = self._build_reverse_table(snap)
+        return table
+    
+    @property
+    def admin_root(self) -> Optional[str]:
+        """
+        The path which this admin site is mounted on, including the script prefix (e.g. ``/admin/``), or ``None`` if the site
+        isn't mounted in the URLconf. Cached per URLconf and script prefix.
+        """
+        key = self._url_key()
+        root = self._admin_roots.get(key)
+        if root is None:
+            try:
+                root = self._admin_roots[key] = reverse('admin:index', current_app=self.name)
+            except NoReverseMatch:
+                return None
+        return root
+    
+    def permission_signature(self, user) -> Optional[Union[frozenset, str]]:
+        """
+        Returns a hashable summary of which custom URL permissions ``user`` holds - users with the same signature can see
+        the same custom URLs, so it's used as the cache key for :meth:`.get_visible_urls`.
+        
+        Only permissions used by at least one custom URL are included, so most users share a handful of signatures. If no
+        custom URLs require permissions, the user's permissions aren't loaded at all.
+        
+        :return frozenset|str|None sig: ``None`` for anonymous/inactive users, ``'*'`` for active superusers,
+                                        otherwise a frozenset of permission names
+        """
+        if user is None or not getattr(user, 'is_active', False):
+            return None
+        if user.is_superuser:
+            return _SUPERUSER
+        permissions = self._snapshot.permissions
+        if len(permissions) == 0:
+            return frozenset()
+        return frozenset(permissions.intersection(user.get_all_permissions()))
+    
+    async def apermission_signature(self, user) -> Optional[Union[frozenset, str]]:
+        """Async version of :meth:`.permission_signature`, which loads the user's permissions without blocking the event loop"""
+        permissions = self._snapshot.permissions
+        if user is None or not getattr(user, 'is_active', False) or user.is_superuser or len(permissions) == 0:
+            return self.permission_signature(user)
+        if hasattr(user, 'aget_all_permissions'):
+            return frozenset(permissions.intersection(await user.aget_all_permissions()))
+        return frozenset(permissions.intersection(await sync_to_async(user.get_all_permissions)()))
+    
+    @staticmethod
+    def _signature_allows(sig: Optional[Union[frozenset, str]], permissions: Iterable[str]) -> bool:
+        if empty(permissions, itr=True):
+            return True
+        if sig is None:
+            return False
+        return sig == _SUPERUSER or sig.issuperset(permissions)
+    
+    def get_visible_urls(self, request: HttpRequest) -> VisibleURLs:
+        """
+        Returns the non-hidden entries from :attr:`.custom_urls_reverse` which ``request.user`` has the permissions to view,
+        in registration order. This is what the "Custom Pages" box renders.
+        
+        The list is computed once per :meth:`.permission_signature` (plus URLconf and script prefix), and cached until the
+        registry changes.
+        Since the signature is derived from the user's current permissions, granting or revoking a permission (directly
+        or via a group) simply results in a different cache entry.
+        """
+        snap = self._snapshot
+        # Async admin views compute the signature up-front (see admin_view), as the permissions can't be loaded from the event loop
+        sig = getattr(request, '_adminplus_signature', _UNSET)
+        if sig is _UNSET:
+            sig = self.permission_signature(getattr(request, 'user', None))
+        key, gen = (*self._url_key(), sig), snap.generation
+        cache = self._visible_cache
+        if cache is None or cache[0] != gen:
+            cache = self._visible_cache = (gen, {})
+        visible = cache[1].get(key)
+        if visible is None:
+            if len(cache[1]) >= VISIBLE_CACHE_SIZE:
+                cache[1].clear()
+            visible = cache[1][key] = VisibleURLs(
+                obj for obj in self._reverse_table(snap).values()
+                if not obj.hidden and self._signature_allows(sig, obj.permissions)
+            )
+        return visible
+    
+    @staticmethod
+    def app_list_signature(user) -> Optional[Union[frozenset, str]]:
+        """
+        Returns a hashable summary of every permission ``user`` holds (directly, or via their groups) - used as part of the
+        cache key for :meth:`.get_app_list`. Unlike :meth:`.permission_signature`, this isn't limited to the permissions
+        used by custom URLs, as any model permission can affect the app list.
         
-        return self.custom_url_map
+        :return frozenset|str|None sig: ``None`` for anonymous/inactive users, ``'*'`` for active superusers,
+                                        otherwise a frozenset of permission names
+        """
+        if user is None or not getattr(user, 'is_active', False):
+            return None
+        if user.is_superuser:
+            return _SUPERUSER
+        return frozenset(user.get_all_permissions())
+    
+    def get_app_list(self, request, *args, **kwargs) -> List[dict]:
+        """
+        Returns the sorted list of apps (and their models) which ``request.user`` can access, as rendered by the admin index
+        (``app_list``) and the nav sidebar (``available_apps``).
+        
+        The stock :meth:`django.contrib.admin.AdminSite.get_app_list` checks the module and model permissions of every
+        registered ModelAdmin on each call - and it's called twice per admin index request. Here, the list is built once per
+        :meth:`.app_list_signature` (plus URLconf, script prefix, language and ``app_label``), and cached until the registry
+        changes. Granting or revoking permissions (directly or via a group) changes the user's signature, so they simply
+        get a different cache entry.
+        
+        Each call returns copies of the cached app / model dictionaries, so callers may modify them freely.
+        
+        If any of your ModelAdmins' ``has_*_permission`` methods depend on more than the user's permissions (e.g. the time
+        of day, or the request's IP), set ``settings.ADMINPLUS_CACHE_APP_LIST = False`` to disable the cache.
+        """
+        if not is_true(getattr(settings, 'ADMINPLUS_CACHE_APP_LIST', True)):
+            return super().get_app_list(request, *args, **kwargs)
+        # Django 4.1+ passes app_label when rendering an app's index page
+        app_label = args[0] if len(args) > 0 else kwargs.get('app_label')
+        sig = self.app_list_signature(getattr(request, 'user', None))
+        key, gen = (*self._url_key(), get_language(), sig, app_label), self._snapshot.generation
+        cache = self._app_list_cache
+        if cache is None or cache[0] != gen:
+            cache = self._app_list_cache = (gen, {})
+        app_list = cache[1].get(key)
+        if app_list is None:
+            if len(cache[1]) >= APP_LIST_CACHE_SIZE:
+                cache[1].clear()
+            app_list = cache[1][key] = super().get_app_list(request, *args, **kwargs)
+        return [dict(app, models=[dict(m, perms=dict(m['perms'])) for m in app['models']]) for app in app_list]
+    
+    def _build_reverse_table(self, snap: RegistrySnapshot) -> Mapping[str, DictObject]:
+        table = {}
+        for route, obj in snap.url_map.items():
+            obj = DictObject(obj)
+            if not obj.hidden:
+                obj['url'] = reverse(f"admin:{obj.name}", current_app=self.name)
+            table[route] = obj
+        return MappingProxyType(table)
+    
+    def warm_up(self, model_admins: bool = False, views: bool = False) -> DictObject:
+        """
+        Do the work which would otherwise happen on the first admin request: build :meth:`.get_urls` and the URL resolvers
+        (compiling every URL pattern), reverse the custom URLs (:attr:`.custom_urls_reverse` / :attr:`.admin_root`), load the
+        default language's translations, and compile the admin templates (:attr:`.WARM_UP_TEMPLATES`).
+        
+        Call it in the master process before forking workers (e.g. gunicorn with ``--preload`` - see :func:`.warm_up`), and
+        every worker shares the result copy-on-write, instead of each paying for it on their first admin request.
+        
+        :param bool model_admins: If ``True``, also instantiate every :class:`.LazyModelAdmin`
+        :param bool views: If ``True``, also import every :class:`.LazyView` (custom views registered by dotted path)
+        :return DictObject timings: The milliseconds taken by each step
+        """
+        timings = DictObject()
+        
+        def _step(name, func):
+            start = time.perf_counter()
+            func()
+            timings[name] = (time.perf_counter() - start) * 1000
+        
+        def _resolvers():
+            get_resolver(get_urlconf()).url_patterns
+            if self.admin_root is None:
+                log.debug("Admin site '%s' isn't mounted in the URLconf - only warming up it's own URLs", self.name)
+                return
+            # Reversing populates the root and admin resolvers (including every ModelAdmin's), and resolving compiles the
+            # patterns on the way to the admin index
+            get_resolver(get_urlconf()).resolve(self.admin_root)
+            self.custom_urls_reverse
+        
+        def _templates():
+            for name in getattr(settings, 'ADMINPLUS_WARM_UP_TEMPLATES', WARM_UP_TEMPLATES):
+                try:
+                    loader.get_template(name)
+                except TemplateDoesNotExist:
+                    log.debug("Skipping warm up of template '%s' - it doesn't exist", name)
+        
+        def _model_admins():
+            for model_admin in list(self._registry.values()):
+                if isinstance(model_admin, LazyModelAdmin):
+                    model_admin.instance
+        
+        def _views():
+            for pattern in self._snapshot.urls:
+                view = unwrap(pattern.callback)
+                view = getattr(view, 'lazy_view', view)
+                if isinstance(view, LazyView):
+                    view.view
+        
+        prefix = get_script_prefix()
+        # Requests are served under FORCE_SCRIPT_NAME (when set), so reverse the URLs with the same prefix
+        if getattr(settings, 'FORCE_SCRIPT_NAME', None) is not None:
+            set_script_prefix(settings.FORCE_SCRIPT_NAME)
+        try:
+            with override(settings.LANGUAGE_CODE):
+                _step('urls', self.get_urls)
+                _step('resolvers', _resolvers)
+                _step('templates', _templates)
+                if model_admins:
+                    _step('model_admins', _model_admins)
+                if views:
+                    _step('views', _views)
+        finally:
+            set_script_prefix(prefix)
+        log.debug("Warmed up admin site '%s' in %.1f ms: %s", self.name, sum(timings.values()), dict(timings))
+        return timings
+    
+    def get_job_urls(self) -> List[URLPattern]:
+        """
+        URLs for the status / result pages of background jobs (see the ``background`` option of :meth:`.add_url`). They're
+        under the reserved ``adminplus/`` prefix, and mounted after the ModelAdmin URLs, so they can't hide the pages of an
+        app labelled ``jobs``.
+        """
+        return [
+            path('adminplus/jobs/<str:job_id>/', self.admin_view(self.job_status_view), name='adminplus_job_status'),
+            path('adminplus/jobs/<str:job_id>/result/', self.admin_view(self.job_result_view), name='adminplus_job_result'),
+        ]
+    
+    @staticmethod
+    def _get_job(request: HttpRequest, job_id: str) -> DictObject:
+        job = get_store().get(job_id)
+        if job is None:
+            raise Http404("No such background job")
+        # Results may contain anything the requesting user could see - so only they (or a superuser) can view the job
+        if job.user_id != request.user.pk and not request.user.is_superuser:
+            raise PermissionDenied
+        return job
+    
+    def job_status_view(self, request: HttpRequest, job_id: str):
+        """Shows a background job's status - or returns it's metadata as JSON when requested with ``?format=json``"""
+        job = self._get_job(request, job_id)
+        if request.GET.get('format') == 'json':
+            return JsonResponse(job)
+        result_url = None
+        if job.status == 'done':
+            result_url = reverse('admin:adminplus_job_result', args=[job.id], current_app=self.name)
+        job_times = {k: None if job[k] is None else datetime.fromtimestamp(job[k], timezone.utc) for k in ('created', 'started', 'finished')}
+        request.current_app = self.name
+        return TemplateResponse(request, 'admin/adminplus_job.html', {
+            **self.each_context(request), 'title': f"Background job: {job.view}", 'job': job, 'job_times': job_times,
+            'result_url': result_url,
+        })
+    
+    def job_result_view(self, request: HttpRequest, job_id: str):
+        """Serves the stored response of a finished background job"""
+        job = self._get_job(request, job_id)
+        if job.status != 'done':
+            raise Http404("This background job has no result yet")
+        try:
+            fh = open(get_store().result_path(job.id), 'rb')
+        except FileNotFoundError:
+            raise Http404("This background job's result has been deleted")
+        res = FileResponse(fh, content_type=job.content_type, status=job.status_code)
+        if job.disposition:
+            res['Content-Disposition'] = job.disposition
+        return res
+    
+    def index_etag(self, request: HttpRequest, extra_context: dict = None) -> str:
+        """
+        Returns the ETag of the admin index page for ``request`` - used when ``settings.ADMINPLUS_INDEX_CONDITIONAL`` is enabled.
+        
+        It covers what the index renders: the registry :attr:`.generation` (registered models and custom pages), the
+        user and their :meth:`.app_list_signature` (which apps, models and custom pages they can see), the language,
+        their latest admin log entry ("Recent actions"), and their session / CSRF cookies (used by the logout form). Override it if
+        your index template shows anything else.
+        """
+        from django.contrib.admin.models import LogEntry
+        user = request.user
+        last_action = LogEntry.objects.filter(user_id=user.pk).order_by('-pk').values_list('pk', flat=True).first()
+        sig = self.app_list_signature(user)
+        raw = '\n'.join(str(v) for v in (
+            self.generation, get_script_prefix(), get_language(), user.pk, user.get_username(),
+            sig if sig is None or isinstance(sig, str) else ','.join(sorted(sig)), last_action,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME), request.COOKIES.get(settings.SESSION_COOKIE_NAME), extra_context,
+        ))
+        return 'W/"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    
+    @property
+    def profiling(self) -> bool:
+        """``True`` if admin requests should be SQL profiled - :attr:`.profile_sql`, or ``settings.ADMINPLUS_PROFILE_SQL``"""
+        if self.profile_sql is not None:
+            return self.profile_sql
+        return profiling_enabled()
+    
+    def profiler_view(self, request: HttpRequest):
+        """Shows the SQL profiles of recent admin requests to this site, and the likely N+1 queries found within them"""
+        profiles = [p for p in reversed(get_profiles()) if p.site == self.name]
+        suspects = {}
+        for p in profiles:
+            for q in p.n_plus_one:
+                s = suspects.get((p.origin, q.sql))
+                if s is None:
+                    s = suspects[(p.origin, q.sql)] = DictObject(origin=p.origin, sql=q.sql, requests=0, max_count=0, caller=q.caller)
+                s.requests += 1
+                s.max_count = max(s.max_count, q.count)
+        request.current_app = self.name
+        return TemplateResponse(request, 'admin/adminplus_profiler.html', {
+            **self.each_context(request), 'title': "SQL profiler", 'profiling': self.profiling, 'profiles': profiles,
+            'suspects': sorted(suspects.values(), key=lambda s: s.max_count, reverse=True),
+        })
+    
+    def get_metrics_urls(self) -> List[URLPattern]:
+        """
+        URLs for the custom view metrics page, the Prometheus metrics endpoint (see :mod:`privex.adminplus.metrics`), and
+        the SQL profiler page (see :mod:`privex.adminplus.profiler`). Like :meth:`.get_job_urls`, they're under the reserved
+        ``adminplus/`` prefix, and mounted after the ModelAdmin URLs.
+        """
+        return [
+            path('adminplus/metrics/', self.admin_view(self.metrics_view), name='adminplus_metrics'),
+            path('adminplus/metrics/prometheus/', self.prometheus_view, name='adminplus_metrics_prometheus'),
+            path('adminplus/profiler/', self.admin_view(self.profiler_view), name='adminplus_profiler'),
+        ]
+    
+    def metrics_view(self, request: HttpRequest):
+        """Shows the call counts, errors and latency of this site's custom views, summed across all worker processes"""
+        def _ms(v: Optional[float]) -> Optional[str]:
+            if v is None:
+                return None
+            return f"> {LATENCY_BUCKETS[-1] * 1000:g}" if v == float('inf') else f"≤ {v * 1000:g}"
+        
+        metrics = collect(self.name)
+        for m in metrics:
+            m.update(
+                average=m.total / m.calls * 1000 if m.calls else 0, p50=_ms(quantile(m.buckets, 0.5)),
+                p95=_ms(quantile(m.buckets, 0.95)), p99=_ms(quantile(m.buckets, 0.99)),
+            )
+        request.current_app = self.name
+        return TemplateResponse(request, 'admin/adminplus_metrics.html', {
+            **self.each_context(request), 'title': "Custom view metrics", 'metrics': metrics,
+            'prometheus_url': reverse('admin:adminplus_metrics_prometheus', current_app=self.name),
+        })
+    
+    def prometheus_view(self, request: HttpRequest):
+        """
+        Exports this site's custom view metrics in the Prometheus text format. Requests need either a staff session, or
+        ``Authorization: Bearer <settings.ADMINPLUS_METRICS_TOKEN>``.
+        """
+        token = getattr(settings, 'ADMINPLUS_METRICS_TOKEN', None)
+        auth = request.META.get('HTTP_AUTHORIZATION', '')
+        if not (token and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:].encode(), str(token).encode())):
+            if not hasattr(request, 'user') or not self.has_permission(request):
+                raise PermissionDenied
+        return HttpResponse(prometheus_text(collect(self.name)), content_type='text/plain; version=0.0.4; charset=utf-8')
+    
+    async def ahas_permission(self, request: HttpRequest) -> bool:
+        """Async version of :meth:`.has_permission` - expects ``request.user`` to already be loaded (see :func:`.aget_user`)"""
+        if type(self).has_permission is admin.AdminSite.has_permission:
+            # The stock check only reads is_active / is_staff from the already loaded user
+            return self.has_permission(request)
+        return await sync_to_async(self.has_permission)(request)
+    
+    def admin_view(self, view, cacheable=False):
+        """
+        Same as :meth:`django.contrib.admin.AdminSite.admin_view`, except that async views (on Django 5.0+) get an async
+        wrapper, so they're dispatched natively under ASGI rather than via the sync thread pool.
+        
+        The wrapper loads the user with ``request.auser()``, and computes their :meth:`.permission_signature` up-front - so
+        neither the login check, nor the context processor's custom pages list, query the database from the event loop.
+        
+        When ``settings.ADMINPLUS_INDEX_CONDITIONAL`` is ``True``, the admin index is wrapped with :func:`.conditional_view`
+        using :meth:`.index_etag`, so unchanged index pages are answered with HTTP 304.
+        
+        Sync views are wrapped with :func:`.profiled_view`, so they're SQL profiled while :attr:`.profiling` is enabled.
+        """
+        profile = view != self.profiler_view
+        if view == self.index and is_true(getattr(settings, 'ADMINPLUS_INDEX_CONDITIONAL', False)):
+            view, cacheable = conditional_view(view, etag=self.index_etag), True
+        if profile and not iscoroutinefunction(view):
+            view = profiled_view(view, self)
+        if not (ASYNC_VIEWS and iscoroutinefunction(view)):
+            return super().admin_view(view, cacheable)
+        
+        async def inner(request, *args, **kwargs):
+            user = await aget_user(request)
+            if not await self.ahas_permission(request):
+                if request.path == reverse('admin:logout', current_app=self.name):
+                    return HttpResponseRedirect(reverse('admin:index', current_app=self.name))
+                from django.contrib.auth.views import redirect_to_login
+                return redirect_to_login(request.get_full_path(), reverse('admin:login', current_app=self.name))
+            request._adminplus_signature = await self.apermission_signature(user)
+            return await view(request, *args, **kwargs)
+        
+        if not cacheable:
+            inner = never_cache(inner)
+        if not getattr(view, 'csrf_exempt', False):
+            inner = csrf_protect(inner)
+        return update_wrapper(inner, view)
     
     # def each_context(self, request):
     #     ctx = super().each_context(request)
@@ -73,18 +1007,36 @@ class CustomAdmin(admin.AdminSite):
     #     return ctx
     
     def url_is_registered(self, url: str, fail=False) -> bool:
-        """Returns ``True`` if the URL ``url`` exists within :attr:`.custom_urls` otherwise ``False``"""
+        """
+        Returns ``True`` if the URL ``url`` exists within :attr:`.custom_urls` otherwise ``False``
+        
+        This is a constant time lookup against :attr:`.custom_url_map`, rather than a scan of :attr:`.custom_urls`
+        """
         if url is None:
             return False
-        for u in self.custom_urls:
-            # noinspection PyProtectedMember
-            if u.pattern._route == url:
-                log.warning("URL %s is already registered with CustomAdmin... Not registering!", url)
-                if fail:
-                    raise FileExistsError(f"URL '{url}' is already registered with CustomAdmin!")
-                return True
+        if url in self._snapshot.url_map:
+            (log.debug if self._loading_manifest else log.warning)("URL %s is already registered with CustomAdmin... Not registering!", url)
+            if fail:
+                raise FileExistsError(f"URL '{url}' is already registered with CustomAdmin!")
+            return True
         return False
     
+    def name_is_registered(self, name: str) -> bool:
+        """Returns ``True`` if a custom URL with the URL name ``name`` exists within :attr:`.custom_url_names`"""
+        return name is not None and name in self._snapshot.url_names
+    
+    def get_url_by_name(self, name: str) -> Optional[DictObject]:
+        """
+        Look up a custom URL's :attr:`.custom_url_map` entry by it's URL ``name``::
+        
+            >>> ctadmin.get_url_by_name('user_info_index')
+            {'name': 'user_info_index', 'route': 'user_info/', 'human': 'User Info', 'hidden': False, 'permissions': ()}
+        
+        :param str name: The URL name to look up (without the ``admin:`` prefix)
+        :return DictObject|None entry: The URL's entry from :attr:`.custom_url_map`, or ``None`` if no URL has that name.
+        """
+        return self._snapshot.url_names.get(name)
+    
     @staticmethod
     def detect_human(obj: Union[callable, View, object, type]) -> Optional[str]:
         """
@@ -162,7 +1114,7 @@ class CustomAdmin(admin.AdminSite):
         return False
     
     def add_url(self, view_obj, url: URL_TYPES, human: str = None, hidden: bool = False, name: str = None, **kwargs) \
-            -> Optional[List[PATH_TYPES]]:
+            -> Optional[Sequence[PATH_TYPES]]:
         """
         Register a custom admin view with :class:`.CustomAdmin`
         
@@ -197,6 +1149,9 @@ class CustomAdmin(admin.AdminSite):
         
         :param callable|View view_obj: A Django view (function-based or class-based) to register a URL for
         
+        :param str view_obj: The dotted path to a Django view, e.g. ``'reports.views.big_report'`` - the view's module won't be
+                             imported until the URL is first dispatched (see :class:`.LazyView`)
+        
         :param str url: An individual URL as a string to register the view under
         
         :param List[str] url: With :class:`.list` form, simply specify a list of string URLs. Each URL will be given a name with
@@ -223,13 +1178,64 @@ class CustomAdmin(admin.AdminSite):
         :keyword bool hide_params: If hide_params is True, URLs which contain route parameters (e.g. ``<str:username>``) will be hidden
                                    by default, to prevent errors caused by trying to reverse their URL in the admin panel custom view list.
         
-        :return List[PATH_TYPES] custom_urls: If successful, returns the current list of URLs from :attr:`.custom_urls`
+        :keyword List[str] permissions: Permissions (e.g. ``['app.view_report']``) which a user must have to access the view.
+                                        The view is wrapped with :meth:`.admin_view` (staff login check), returning HTTP 403 for
+                                        staff without the permissions, and it's only listed for users holding them.
+        
+        :keyword str|dict stream: Stream the rows returned by the view (a queryset, generator etc.) as ``'ndjson'`` or ``'csv'``,
+                                  instead of the view returning a response. Pass a dict to set :func:`.stream_response`
+                                  options, e.g. ``dict(format='csv', filename='posts.csv', chunk_size=5000)``
+        
+        :keyword bool background: If ``True``, the view is ran as a background job on a bounded thread pool (see
+                                  :mod:`privex.adminplus.jobs`). The request is answered straight away with a redirect to the
+                                  job's status page (staff only), which links to the stored response once the job is done.
+        
+        :keyword int cache_timeout: Cache the view's successful ``GET`` responses for this many seconds, using Django's cache
+                                    framework (see :mod:`privex.adminplus.cache`). Cached views are always wrapped with
+                                    :meth:`.admin_view`, as a cache hit skips any checks within the view. Use
+                                    :meth:`.clear_view_cache` to clear the cached responses early.
+        
+        :keyword bool vary_on_user: (Default: ``False``) When ``cache_timeout`` is set, cache responses separately per user
+        
+        :keyword bool vary_on_perms: (Default: ``True``) When ``cache_timeout`` is set, cache responses separately per set of
+                                     user permissions - disable it for views which show the same content to all staff
+        
+        :keyword str cache_alias: When ``cache_timeout`` is set, the cache alias to use instead of ``settings.ADMINPLUS_CACHE``
+        
+        :keyword callable etag: A cheap function returning the ETag of the view's content (called with the same arguments as
+                                the view), e.g. a version number or hash. It's evaluated before the view runs, and clients
+                                whose copy is still fresh get HTTP 304 without the view running (see :func:`.conditional_view`)
+        
+        :keyword callable last_modified: Like ``etag``, but returns a :class:`datetime.datetime` of when the content last changed
+        
+        :keyword bool is_async: Only needed for views passed as a dotted path - set to ``True`` if the view is async. Async
+                                function / class-based views passed directly are detected automatically, and stay async
+                                (including the permission checks) when served under ASGI.
+        
+        :return Sequence[PATH_TYPES] custom_urls: If successful, returns the current URLs from :attr:`.custom_urls`
         """
         if empty(view_obj):
             log.error(
                 f"view_obj is empty, cannot register! url: {url} | human: {human} | hidden: {hidden} | name: {name} | kwargs: {kwargs}"
             )
             return None
+        with self._write_lock:
+            entries = self._expand_url(view_obj, url, human=human, hidden=hidden, name=name, skip=self.url_is_registered, **kwargs)
+            return self._commit_urls(entries).urls
+    
+    def _expand_url(self, view_obj, url: URL_TYPES, human: str = None, hidden: bool = False, name: str = None,
+                    skip: callable = None, **kwargs) -> List[Tuple[DictObject, callable]]:
+        """
+        Expand the arguments of a single :meth:`.add_url` call into one ``(entry, view)`` tuple per URL, where ``entry``
+        is the :class:`.DictObject` which will be stored in :attr:`.custom_url_map`.
+        
+        This only resolves names / human names / hidden flags - nothing is registered. URLs for which ``skip(url)`` returns
+        ``True`` are left out before names are numbered, matching the behaviour of :meth:`.add_url` with duplicate URLs.
+        """
+        # How the view was registered - shared by each of it's entries, and moved into RegistrySnapshot.specs when committed
+        spec = DictObject(view=view_obj, hidden=hidden, options=dict(kwargs))
+        # Views passed as a dotted path string are only imported when they're first dispatched
+        view_obj = LazyView(view_obj, is_async=kwargs.get('is_async', False)) if isinstance(view_obj, str) else view_obj
         url = camel_to_snake(view_obj.__name__) + '/' if empty(url) else url
         # When more than one URL is specified in ``url`` using a list/dict, if hide_extra is True, then only the first URL
         # in the list/dict of URLs will use the user-specified ``hidden`` parameter.
@@ -238,84 +1244,224 @@ class CustomAdmin(admin.AdminSite):
         # If hide_params is True, URLs which contain route parameters (e.g. ``<str:username>``) will be hidden by default, to prevent
         # errors caused by trying to reverse their URL in the admin panel custom view list.
         hide_params = kwargs.get('hide_params', True)
+        # Permissions which the user needs to access the view. Views with permissions are wrapped with the admin auth check.
+        permissions = tuple(empty_if(kwargs.get('permissions'), (), itr=True))
+        # Views with stream set return the rows to export, which are streamed as NDJSON / CSV
+        stream = kwargs.get('stream')
+        # Views with background set are ran on the background job pool, rather than within the request
+        background = is_true(kwargs.get('background', False))
+        # Each URL's calls, errors and latency are recorded by privex.adminplus.metrics, unless disabled
+        metrics = is_true(getattr(settings, 'ADMINPLUS_METRICS', True))
+        # Views with cache_timeout set have their responses cached, scoped to this site and the view's (first) URL name
+        cache_timeout = kwargs.get('cache_timeout')
+        if cache_timeout is not None and (background or stream is not None):
+            raise ValueError("cache_timeout can't be combined with the background or stream options")
+        # Views with etag / last_modified set answer conditional GETs with HTTP 304 before the view runs
+        etag, last_modified = kwargs.get('etag'), kwargs.get('last_modified')
+        conditional = etag is not None or last_modified is not None
+        if conditional and background:
+            raise ValueError("etag / last_modified can't be combined with the background option")
+        skip = (lambda u: False) if skip is None else skip
         
         name = name if not empty(name) else self.detect_name(view_obj)
         human = human if not empty(human) else self.detect_human(empty_if(view_obj, name))
-        
-        ####
-        # Handle URLs specified as a list
-        ####
-        if isinstance(url, list):
-            url = [u for u in list(url) if not self.url_is_registered(u)]
-            name_number = 1
-            orig_name = name
-            orig_hidden = hidden
-            for u in url:
-                if name_number > 1:
-                    name = f"{orig_name}_{name_number}"
-                    if hide_extra:
-                        hidden = True
-                if self.regex_has_params(u) and hide_params:
-                    hidden = True
-
-                self.add_url(view_obj, url=u, human=human, hidden=hidden, name=name, **kwargs)
-                name_number += 1
-                hidden = orig_hidden
-            
-            return self.custom_urls
-        ####
-        # Handle URLs specified as a dict of url:name
-        ####
-        elif isinstance(url, dict):
-            # url = {u: n for u, n in dict(url).items() if not self.url_is_registered(u)}
-            orig_hidden = hidden
-            name_number = 1
-            for u, n in url.items():
-                if self.url_is_registered(u):
-                    continue
-                if name_number > 1 and hide_extra:
-                    hidden = True
-                if self.regex_has_params(u) and hide_params:
-                    hidden = True
-                self.add_url(view_obj, url=u, human=human, hidden=hidden, name=n, **kwargs)
-                name_number += 1
-                hidden = orig_hidden
-            return self.custom_urls
-        ####
-        # Handle a plain string URL
-        ####
-        elif isinstance(url, str):
-            if self.url_is_registered(url):
-                return self.custom_urls
-
-        ####
-        # String URL handling continued
-        ####
         if empty(name):
-            # if hasattr(view_obj, '__name__'):
-            #     name = camel_to_snake(view_obj.__name__)
-            # else:
             log.warning("No name specified by user for view, and cannot infer from view_obj.__name__ ...")
             name = None
+        human = empty_if(human, human_name(empty_if(name, "unknown_custom_view")))
+        spec.human = human
         
-        # If a URL contains Django route parameters e.g. ``<str:example>``, it's best to hide them by default, otherwise
-        # they'll cause issues when they're reversed in .custom_urls_reverse
-        if self.regex_has_params(url) and hide_params:
-            hidden = True
+        if isinstance(url, list):
+            # URLs specified as a list get the view name, with their position appended for all but the first URL
+            routes = [(u, name if i == 0 else f"{name}_{i + 1}") for i, u in enumerate([u for u in url if not skip(u)])]
+        elif isinstance(url, dict):
+            # URLs specified as a dict of url:name
+            routes = [(u, n) for u, n in url.items() if not skip(u)]
+        elif isinstance(url, str):
+            routes = [] if skip(url) else [(url, name)]
+        else:
+            raise TypeError(f"url must be a str, list or dict - not {type(url)}")
+        cache_group = None if cache_timeout is None or len(routes) == 0 else empty_if(routes[0][1], routes[0][0])
         
-        # Class-based views need to be registered using .as_view()
+        # Class-based views need to be registered using .as_view() - which marks the view as async for async class-based views
         view_obj = view_obj.as_view() if isclass(view_obj) else view_obj
+        # Django only dispatches real coroutine functions natively, so async lazy views are registered via an async def wrapper
+        view_obj = view_obj.as_async() if isinstance(view_obj, LazyView) and view_obj.is_async else view_obj
+        if stream is not None:
+            stream = dict(format=stream) if isinstance(stream, str) else dict(stream)
+            view_obj = streaming_view(view_obj, stream.pop('format', 'ndjson'), **stream)
+        if background:
+            view_obj = background_view(view_obj, self, human)
+        if cache_group is not None:
+            view_obj = cached_view(
+                view_obj, self, cache_group, cache_timeout, vary_on_user=is_true(kwargs.get('vary_on_user', False)),
+                vary_on_perms=is_true(kwargs.get('vary_on_perms', True)), alias=kwargs.get('cache_alias'),
+            )
+        if conditional:
+            view_obj = conditional_view(view_obj, etag=etag, last_modified=last_modified)
+        if len(permissions) > 0:
+            if not ASYNC_VIEWS and iscoroutinefunction(view_obj):
+                # The decorators used by admin_view can only wrap sync views before Django 5.0
+                view_obj = async_to_sync(view_obj)
+            # never_cache would stop browsers from keeping conditional responses, which conditional_view marks as no-cache itself
+            view_obj = self.admin_view(require_permissions(view_obj, permissions), cacheable=conditional)
+        elif background or cache_group is not None:
+            # Each background job ties up a job thread, so only logged in staff may start them - and cache hits skip the view
+            # (including any checks within it), so cached views must be limited to staff too
+            if not ASYNC_VIEWS and iscoroutinefunction(view_obj):
+                view_obj = async_to_sync(view_obj)
+            view_obj = self.admin_view(view_obj, cacheable=conditional)
+        elif not iscoroutinefunction(view_obj):
+            # Views wrapped with admin_view are profiled by it
+            view_obj = profiled_view(view_obj, self)
         
-        self.custom_urls.append(
-            path(url, view_obj, name=name)
-        )
-        self.custom_url_map[url] = DictObject(
-            name=name,
-            route=url,
-            human=empty_if(human, human_name(empty_if(name, "unknown_custom_view"))),
-            hidden=hidden
-        )
-        return self.custom_urls
+        entries = []
+        for i, (u, n) in enumerate(routes):
+            h = hidden
+            if i > 0 and hide_extra:
+                h = True
+            # If a URL contains Django route parameters e.g. ``<str:example>``, it's best to hide them by default, otherwise
+            # they'll cause issues when they're reversed in .custom_urls_reverse
+            if self.regex_has_params(u) and hide_params:
+                h = True
+            entries.append((DictObject(
+                name=n, route=u, human=human, hidden=h, permissions=permissions,
+                cache=None if cache_group is None else DictObject(group=cache_group, alias=kwargs.get('cache_alias')), spec=spec,
+            ), metered_view(view_obj, f"{self.name}\t{empty_if(n, u)}") if metrics else view_obj))
+        return entries
+    
+    def _commit_urls(self, entries: List[Tuple[DictObject, callable]]) -> RegistrySnapshot:
+        """
+        Publish a new :class:`.RegistrySnapshot` containing the current registry plus the already validated
+        ``(entry, view)`` tuples (from :meth:`._expand_url`), in one atomic swap.
+        
+        The entries are appended to the registry's shared storage (:class:`._RegistryLog`), which existing snapshots can't
+        see past their own size - so each commit costs O(entries), no matter how large the registry already is.
+        """
+        with self._write_lock:
+            snap, store = self._snapshot, self._log
+            if len(entries) == 0:
+                return snap
+            # Build every pattern first, so an invalid route can't leave half of the entries appended
+            url_objs = [path(entry.route, view, name=entry.name) for entry, view in entries]
+            permissions = snap.permissions
+            for (entry, _), url_obj in zip(entries, url_objs):
+                if entry.route in store.route_data:
+                    log.warning("URL %s is specified more than once - only registering the first", entry.route)
+                    continue
+                i = len(store.routes)
+                store.route_data[entry.route] = (i, entry)
+                store.spec_data[entry.route] = (i, entry.pop('spec', None))
+                store.routes.append(entry.route)
+                store.urls.append(url_obj)
+                if not permissions.issuperset(entry.permissions):
+                    permissions = permissions.union(entry.permissions)
+                if entry.name is None:
+                    continue
+                if entry.name in store.name_data:
+                    log.warning("URL name '%s' is already used by route '%s' - route '%s' will not be reachable via get_url_by_name",
+                                entry.name, store.name_data[entry.name][1].route, entry.route)
+                else:
+                    store.name_data[entry.name] = (len(store.names), entry)
+                    store.names.append(entry.name)
+            n_routes, n_names = len(store.routes), len(store.names)
+            return self._publish(RegistrySnapshot(
+                generation=next(_GENERATIONS), urls=SnapshotSequence(store.urls, n_routes),
+                url_map=SnapshotMap(store.route_data, store.routes, n_routes),
+                url_names=SnapshotMap(store.name_data, store.names, n_names), permissions=permissions,
+                specs=SnapshotMap(store.spec_data, store.routes, n_routes),
+            ))
+    
+    @staticmethod
+    def _parse_url_spec(spec: URL_SPEC_TYPES) -> Tuple[Any, URL_TYPES, dict]:
+        """Normalise a view spec passed to :meth:`.add_urls` into a tuple of ``(view, url, options)``"""
+        if isinstance(spec, dict):
+            opts = dict(spec)
+            view = opts.pop('view') if 'view' in opts else opts.pop('view_obj', None)
+            return view, opts.pop('url', None), opts
+        if isinstance(spec, (list, tuple)) and 1 <= len(spec) <= 3:
+            view, url, opts = (list(spec) + [None, None])[:3]
+            return view, url, dict(empty_if(opts, {}))
+        raise TypeError(f"Invalid view spec (expected dict, or tuple of (view, url[, options])): {spec!r}")
+    
+    def add_urls(self, specs: Iterable[URL_SPEC_TYPES], fail: bool = False) -> Sequence[PATH_TYPES]:
+        """
+        Register many custom admin views at once. All of the views are validated together against the registry (and against
+        each other), and every conflict is reported in one pass, before the accepted URLs are added to :attr:`.custom_urls`
+        and :attr:`.custom_url_map` in a single step.
+        
+        Each spec is either a dict of :meth:`.add_url` arguments (with the view as ``view``), or a tuple of
+        ``(view, url)`` / ``(view, url, options)``::
+        
+            >>> ctadmin.add_urls([
+            ...     dict(view=sales_report, url='reports/sales/', human='Sales Report'),
+            ...     (stock_report, 'reports/stock/'),
+            ...     (user_report, {'reports/users/': 'user_report', 'reports/users/<int:id>/': 'user_report_by_id'}),
+            ... ])
+        
+        :param specs: An iterable of view specs, see above.
+        :param bool fail: (Default: ``False``) If ``True``, raise :class:`.FileExistsError` listing every conflict, without
+                          registering any of the views. If ``False``, conflicting URLs are logged and skipped, while the
+                          rest are registered.
+        :raises FileExistsError: When ``fail`` is ``True`` and one or more URLs / URL names conflict.
+        :return Sequence[PATH_TYPES] custom_urls: Returns the current URLs from :attr:`.custom_urls`
+        """
+        entries = []
+        for spec in specs:
+            view, url, opts = self._parse_url_spec(spec)
+            if empty(view):
+                raise ValueError(f"View spec has no view, cannot register! spec: {spec!r}")
+            entries.extend(self._expand_url(view, url, **opts))
+        with self._write_lock:
+            return self._validate_and_commit(entries, fail=fail).urls
+    
+    def _validate_and_commit(self, entries: List[Tuple[DictObject, callable]], fail: bool = False) -> RegistrySnapshot:
+        """Check ``entries`` against the current snapshot (and each other) for :meth:`.add_urls`, then commit the accepted ones"""
+        snap = self._snapshot
+        accepted, conflicts = [], []
+        routes, names = set(), set()
+        for entry, view in entries:
+            r, n = entry.route, entry.name
+            if r in snap.url_map:
+                conflicts.append(f"URL '{r}' is already registered")
+            elif r in routes:
+                conflicts.append(f"URL '{r}' is specified more than once")
+            if n is not None and n in snap.url_names:
+                conflicts.append(f"URL name '{n}' (for URL '{r}') is already registered by URL '{snap.url_names[n].route}'")
+            elif n is not None and n in names:
+                conflicts.append(f"URL name '{n}' (for URL '{r}') is specified more than once")
+            # Duplicate names are registered with a warning (the same as add_url) - only duplicate URLs are skipped
+            if r not in snap.url_map and r not in routes:
+                accepted.append((entry, view))
+            routes.add(r)
+            names.add(n)
+        
+        if len(conflicts) > 0:
+            if fail:
+                raise FileExistsError(f"{len(conflicts)} conflict(s) while registering URLs with CustomAdmin: " + '; '.join(conflicts))
+            log.warning("%d conflict(s) while registering URLs with CustomAdmin - skipping duplicate URLs: %s",
+                        len(conflicts), '; '.join(conflicts))
+        
+        return self._commit_urls(accepted)
+    
+    def clear_view_cache(self, name: str) -> bool:
+        """
+        Clear every cached response of a view registered with ``cache_timeout`` (see :mod:`privex.adminplus.cache`), e.g.
+        after the data it shows has changed::
+        
+            >>> ctadmin.clear_view_cache('dashboard')
+        
+        Responses are cleared by bumping the view's cache version, so this takes effect in every process sharing the cache.
+        
+        :param str name: Any URL name the view was registered with (or the route, for views registered without a name)
+        :return bool cleared: ``True`` if the cache was cleared - ``False`` if no cached view is registered as ``name``
+        """
+        snap = self._snapshot
+        entry = snap.url_names.get(name, snap.url_map.get(name))
+        if entry is None or entry.get('cache') is None:
+            return False
+        invalidate_version(self.name, entry.cache.group, entry.cache.alias)
+        return True
     
     def wrap_register(self, view, model: Model = None, url: URL_TYPES = None, human: str = None, hidden: bool = False, name: str = None,
                       **kwargs):
@@ -350,14 +1496,21 @@ class CustomAdmin(admin.AdminSite):
 ctadmin = CustomAdmin.admin_singleton()
 
 
-def ct_register(model: Model = None, url: URL_TYPES = None, human: str = None, hidden: bool = False, name: str = None, **kwargs):
+def default_site() -> CustomAdmin:
+    """Returns the default :class:`.CustomAdmin` singleton (:attr:`.ctadmin`) - used as ``PVXAdmin.default_site``"""
+    return CustomAdmin.admin_singleton()
+
+
+def ct_register(model: Model = None, url: URL_TYPES = None, human: str = None, hidden: bool = False, name: str = None,
+                site: Union[str, CustomAdmin] = None, **kwargs):
     """
     Generally not needed, as :func:`django.contrib.admin.decorators.register` should still work.
     
-    Works the same as ``@admin.register(MyModel)`` but registers the view + model onto :attr:`.ctadmin`
+    Works the same as ``@admin.register(MyModel)`` but registers the view + model onto :attr:`.ctadmin` (or onto ``site``,
+    see :meth:`.CustomAdmin.get_site`)
     """
     def _decorator(cls):
-        ctadmin.wrap_register(
+        CustomAdmin.get_site(site).wrap_register(
             cls, model=model, url=url, human=human, hidden=hidden, name=name, **kwargs
         )
         return cls
@@ -365,7 +1518,8 @@ def ct_register(model: Model = None, url: URL_TYPES = None, human: str = None, h
     return _decorator
 
 
-def register_url(url: URL_TYPES = None, human: str = None, hidden: bool = False, name: str = None, **kwargs):
+def register_url(url: URL_TYPES = None, human: str = None, hidden: bool = False, name: str = None,
+                 site: Union[str, CustomAdmin] = None, **kwargs):
     """
     Register a custom admin view with PVXAdmin
     
@@ -402,10 +1556,16 @@ def register_url(url: URL_TYPES = None, human: str = None, hidden: bool = False,
         >>> def some_internal_view(request):
         ...     return HttpResponse(b"this is an internal view, not for just browsing!")
     
+    By default, views are registered onto the default admin site (:attr:`.ctadmin`). Pass ``site`` (a singleton name, or a
+    :class:`.CustomAdmin` instance) to register a view onto another admin site - it'll only be routed and listed there::
+    
+        >>> @register_url('queues/', site='ops')
+        >>> def queue_status(request):
+        ...     return HttpResponse(b"all queues are healthy")
     
     """
     def _decorator(cls):
-        ctadmin.wrap_register(
+        CustomAdmin.get_site(site).wrap_register(
             cls,
             url=camel_to_snake(cls.__name__) + '/' if empty(url) else url,
             human=human, hidden=hidden, name=name, **kwargs
@@ -418,6 +1578,59 @@ def register_url(url: URL_TYPES = None, human: str = None, hidden: bool = False,
 # Alias for somewhat basic drop-in compatibility when used as a replacement for django-adminplus
 register_view = register_url
 
+
+def register_urls(specs: Iterable[URL_SPEC_TYPES], fail: bool = False, site: Union[str, CustomAdmin] = None) -> Sequence[PATH_TYPES]:
+    """
+    Register many custom admin views with PVXAdmin in one batch - intended for generated views, where calling
+    :func:`.register_url` once per view would be wasteful. See :meth:`.CustomAdmin.add_urls` for the spec format.
+    
+        >>> from privex.adminplus.admin import register_urls
+        >>> register_urls([(report_view, f'reports/{r}/', dict(name=f'report_{r}')) for r in ('sales', 'stock')])
+    
+    :param specs: An iterable of view specs - dicts of :meth:`.CustomAdmin.add_url` arguments, or ``(view, url[, options])`` tuples
+    :param bool fail: (Default: ``False``) Raise :class:`.FileExistsError` listing every conflict instead of skipping conflicting URLs
+    :param str|CustomAdmin site: The admin site to register onto - a singleton name or instance (default: :attr:`.ctadmin`)
+    """
+    return CustomAdmin.get_site(site).add_urls(specs, fail=fail)
+
+
+def clear_view_cache(name: str, site: Union[str, CustomAdmin] = None) -> bool:
+    """
+    Clear every cached response of the view registered as ``name`` with ``cache_timeout`` on :attr:`.ctadmin` (or on
+    ``site``) - see :meth:`.CustomAdmin.clear_view_cache`::
+    
+        >>> from privex.adminplus.admin import clear_view_cache
+        >>> clear_view_cache('dashboard')
+    """
+    return CustomAdmin.get_site(site).clear_view_cache(name)
+
+
+def warm_up(sites: Iterable[Union[str, CustomAdmin]] = None, freeze: bool = False, **kwargs) -> Dict[str, DictObject]:
+    """
+    Run :meth:`.CustomAdmin.warm_up` for every :class:`.CustomAdmin` singleton (or for ``sites``), after loading the
+    URLconf (so views registered from ``urls.py`` are included). Call it before your web server forks it's workers, e.g. in
+    gunicorn's ``when_ready`` hook with ``preload_app = True``::
+    
+        >>> def when_ready(server):
+        ...     from privex.adminplus.admin import warm_up
+        ...     warm_up(freeze=True)
+    
+    :param sites: Singleton names / :class:`.CustomAdmin` instances to warm up (default: every singleton)
+    :param bool freeze: If ``True``, call :func:`gc.freeze` afterwards, so that garbage collections in the workers don't
+                        write to (and un-share) the objects created before the fork
+    :param kwargs: Passed to :meth:`.CustomAdmin.warm_up`
+    :return Dict[str,DictObject] timings: The timings of each site, keyed by site name
+    """
+    if getattr(settings, 'ROOT_URLCONF', None):
+        get_resolver().url_patterns
+    sites = list(CustomAdmin._ct_admins.values()) if sites is None else [CustomAdmin.get_site(s) for s in sites]
+    timings = {site.name: site.warm_up(**kwargs) for site in sites}
+    # gc.freeze is only available on Python 3.7+
+    if freeze and hasattr(gc, 'freeze'):
+        gc.freeze()
+    return timings
+
+
 CONTEXT_PROCESSORS = (
     'privex.adminplus.admin.pvx_context_processor',
 )
@@ -428,11 +1641,26 @@ def pvx_context_processor(request: HttpRequest) -> dict:
     A simple Django **Template Context Processor** which allows us to ensure that various different
     variables are available from within all views' templates, without having to modify/replace each view
     to inject the context.
+    
+    ``custom_urls`` is a lazy object - :attr:`.CustomAdmin.custom_urls_reverse` is only looked up if a template actually
+    reads it, so templates which don't use it (e.g. your public site) don't pay for it.
+    
+    The context is taken from the admin site which the request was resolved into (see :meth:`.CustomAdmin.site_for_request`),
+    so each admin site only lists it's own custom views. Requests outside of any admin site get the default site's context.
+    
+    If ``settings.ADMINPLUS_CONTEXT_ADMIN_ONLY`` is ``True``, the processor returns an empty context for requests which
+    aren't under the admin's mount path (see :attr:`.CustomAdmin.admin_root`).
     """
+    site = CustomAdmin.site_for_request(request)
+    if is_true(getattr(settings, 'ADMINPLUS_CONTEXT_ADMIN_ONLY', False)):
+        root = site.admin_root
+        if root is None or not request.path.startswith(root):
+            return {}
     ctx = dict(
-        custom_urls=ctadmin.custom_urls_reverse,
-        custom_url_map=ctadmin.custom_url_map,
-        ctadmin=ctadmin
+        custom_urls=SimpleLazyObject(lambda: site.custom_urls_reverse),
+        custom_pages=SimpleLazyObject(lambda: site.get_visible_urls(request)),
+        custom_url_map=site.custom_url_map,
+        ctadmin=site
     )
     # log.debug("pvx_context_processor :: URL = %s", request.get_full_path())
     # log.debug("pvx_context_processor :: PATH = %s ", request.path)
@@ -507,7 +1735,9 @@ def setup_admin(old_admin, discover=True, inject_context=True, force=False) -> C
         >>> setup_admin(admin)
     
     :param django.contrib.admin old_admin: This should be a reference to :mod:`django.contrib.admin`
-    :param bool discover: If ``True``, runs ``admin.autodiscover()`` after registration is finished
+    :param bool discover: If ``True``, runs ``admin.autodiscover()`` after registration is finished - or, if
+                          ``settings.ADMINPLUS_MANIFEST`` is set and the file exists, registers the views and models recorded
+                          in that manifest instead (see :mod:`privex.adminplus.manifest`)
     :param bool inject_context: If ``True``, runs :func:`.inject_context_processors` after registration is finished, which will
                                 automatically add any missing :attr:`.CONTEXT_PROCESSORS` to ``settings.TEMPLATE_CONTEXT_PROCESSORS``
     """
@@ -522,13 +1752,21 @@ def setup_admin(old_admin, discover=True, inject_context=True, force=False) -> C
     admin.site = ctadmin
     # noinspection PyProtectedMember
     admin.site._registry = copy.copy(old._registry)
+    admin.site.invalidate()
     admin.sites.site = admin.site
 
     if inject_context:
         inject_context_processors()
     
     if discover:
-        admin.autodiscover()
+        manifest = getattr(settings, 'ADMINPLUS_MANIFEST', None)
+        if not empty(manifest) and os.path.exists(str(manifest)):
+            load_manifest(str(manifest))
+            STORE.manifest = str(manifest)
+        else:
+            if not empty(manifest):
+                log.warning("ADMINPLUS_MANIFEST '%s' doesn't exist - falling back to admin.autodiscover()", manifest)
+            admin.autodiscover()
     
     STORE.is_setup = True
     
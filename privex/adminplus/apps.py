@@ -1,5 +1,5 @@
 from collections import OrderedDict
-from typing import Iterable, List, Union
+from typing import Iterable, List, Optional, Union
 
 from django.apps import AppConfig
 from django.apps.registry import Apps
@@ -15,6 +15,9 @@ log = logging.getLogger(__name__)
 
 QUIET = is_true(getattr(settings, 'ADMINPLUS_QUIET', False))
 
+PVX_ADMIN_APP = 'privex.adminplus.apps.PVXAdmin'
+BACKPORTS_APP = 'privex.adminplus.backports'
+
 # def ap_quiet():
 #     return is_true(getattr(settings, 'ADMINPLUS_QUIET', False))
 
@@ -33,6 +36,14 @@ def _inject_app(entry: str, index: int = None, after: str = None):
     return settings.INSTALLED_APPS
 
 
+def _app_loaded(entry: str) -> bool:
+    """Returns ``True`` if the app ``entry`` (an app module, or an AppConfig class path) is in the app registry"""
+    from django.apps import apps
+    return any(
+        c.name == entry or f"{type(c).__module__}.{type(c).__name__}" == entry for c in list(apps.app_configs.values())
+    )
+
+
 def _append_app(entry: str):
     settings.INSTALLED_APPS += [entry]
     return settings.INSTALLED_APPS
@@ -63,6 +74,10 @@ def _reinit_apps(inst_apps: List[str]):
     """
     Resets :mod:`django.apps.apps` and then loads all Django apps listed in ``inst_apps``.
     
+    This is only used as a fallback by :meth:`.PrivexAdminPlusConfig.ready`, when the missing apps couldn't be injected
+    while the app registry was loading (see :meth:`.PrivexAdminPlusConfig.inject_apps`) - re-populating runs every app's
+    ``ready()`` twice, roughly doubling startup time.
+    
     This allows dynamically adding new apps to ``settings.INSTALLED_APPS``, albeit it's not very efficient,
     since :class:`django.apps.registry.Apps` doesn't allow for initialising a singular app.
     
@@ -130,6 +145,10 @@ class PrivexAdminPlusConfig(AppConfig):
     version = VERSION
     django_min_backport = (3, 1)
     
+    def __init__(self, app_name, app_module):
+        super().__init__(app_name, app_module)
+        self.inject_apps()
+    
     # def _check_django_version(self):
     #     import django
     #     v = django.VERSION
@@ -154,27 +173,79 @@ class PrivexAdminPlusConfig(AppConfig):
         if QUIET: return
         log.info(msg, *args, **kwargs)
     
-    def _handle_backports(self):
+    def _needs_backports(self) -> bool:
         import django
         if version_eq_gt(self.django_min_backport, django.VERSION):
-            return True
-    
-        auto_backport = is_true(getattr(settings, 'AUTO_BACKPORT', True))
-    
-        if not auto_backport:
+            return False
+        if not is_true(getattr(settings, 'AUTO_BACKPORT', True)):
             log.debug(" [!!!] settings.AUTO_BACKPORT is false - not checking if backports loaded...")
-            return True
+            return False
+        return True
     
-        if _app_installed('privex.adminplus.backports'):
+    def _handle_backports(self):
+        import django
+        if not self._needs_backports():
+            return True
+        
+        if _app_loaded(BACKPORTS_APP):
             log.debug(" [+++] backports already loaded. skipping auto-backport.")
             return True
         
         self.lwarn(" [...] PrivexAdminPlusConfig.ready :: Django version is < 3.1.0 :: Ver is: %s", django.get_version())
         self.lwarn(" [...] 'privex.adminplus.backports' not in INSTALLED_APPS... Dynamically injecting into INSTALLED_APPS ...")
-        # settings.INSTALLED_APPS += ['privex.adminplus.backports']
-        _prepend_app('privex.adminplus.backports')
+        if not _app_installed(BACKPORTS_APP):
+            _prepend_app(BACKPORTS_APP)
         return False
     
+    def _installed_entry(self) -> Optional[str]:
+        """Returns the ``INSTALLED_APPS`` entry which loaded this app (its module or its AppConfig path), if any"""
+        own_entries = (self.name, f"{type(self).__module__}.{type(self).__name__}")
+        return next((entry for entry in settings.INSTALLED_APPS if entry in own_entries), None)
+    
+    def inject_apps(self) -> bool:
+        """
+        Called by :meth:`.__init__` - if Django is currently loading ``INSTALLED_APPS`` (``apps.populate``), and
+        ``PVXAdmin`` / ``backports`` are needed but missing, then add them to the app registry within the same pass, so that
+        every app is only loaded once:
+        
+          * ``privex.adminplus.apps.PVXAdmin`` is inserted into ``settings.INSTALLED_APPS`` directly after ``privex.adminplus``.
+            Since ``apps.populate`` is iterating over that same list, Django loads it right after this app.
+          
+          * ``privex.adminplus.backports`` is created and added to the app registry directly (so it's loaded just before
+            ``privex.adminplus``), and a copy of ``INSTALLED_APPS`` with backports before ``privex.adminplus`` replaces
+            the setting - inserting it into the list being iterated would make Django load this app a second time.
+        
+        If the apps couldn't be injected (e.g. ``INSTALLED_APPS`` is a tuple), :meth:`.ready` falls back to re-populating
+        the app registry using :func:`._reinit_apps`.
+        
+        :return bool injected: ``True`` if any apps were injected, otherwise ``False``
+        """
+        from django.apps import apps
+        if not apps.loading or apps.apps_ready:
+            return False
+        inst_apps = settings.INSTALLED_APPS
+        if not isinstance(inst_apps, list):
+            return False
+        entry = self._installed_entry()
+        if entry is None:
+            return False
+        index = inst_apps.index(entry)
+        
+        injected = False
+        if not _app_installed(PVX_ADMIN_APP):
+            self.lwarn(" [...] '%s' is not in INSTALLED_APPS - injecting it after '%s'. Add it to INSTALLED_APPS "
+                       "directly after '%s' to silence this warning.", PVX_ADMIN_APP, inst_apps[index], inst_apps[index])
+            inst_apps.insert(index + 1, PVX_ADMIN_APP)
+            injected = True
+        if self._needs_backports() and not _app_installed(BACKPORTS_APP):
+            self.lwarn(" [...] '%s' is not in INSTALLED_APPS - injecting it before '%s'.", BACKPORTS_APP, inst_apps[index])
+            bp_config = AppConfig.create(BACKPORTS_APP)
+            apps.app_configs[bp_config.label] = bp_config
+            bp_config.apps = apps
+            settings.INSTALLED_APPS = inst_apps[:index] + [BACKPORTS_APP] + inst_apps[index:]
+            injected = True
+        return injected
+    
     def _setup_admin(self):
         auto_admin = is_true(getattr(settings, 'AUTO_SETUP_ADMIN', True))
         if not auto_admin:
@@ -189,13 +260,17 @@ class PrivexAdminPlusConfig(AppConfig):
         When ``privex.adminplus`` is loaded, we run some verification checks to see if we need to auto-load additional applications,
         and automatically register the admin site with Django once we're all ready.
         
-          * If ``privex.adminplus.apps.PVXAdmin`` isn't present in ``INSTALLED_APPS``, then we'll inject it into
-            INSTALLED_APPS directly below ``privex.adminplus``
+          * ``privex.adminplus.apps.PVXAdmin`` (and ``privex.adminplus.backports`` on older Django versions) are normally
+            injected while the app registry is loading, by :meth:`.inject_apps`
+            
+          * If ``privex.adminplus.apps.PVXAdmin`` still isn't loaded, then we'll inject it into INSTALLED_APPS directly
+            below ``privex.adminplus``
             
-          * If we're running on an older Django version that requires our backports, then we'll inject ``privex.adminplus.backports``
-            into INSTALLED_APPS
+          * If we're running on an older Django version that requires our backports, and they still aren't loaded, then
+            we'll inject ``privex.adminplus.backports`` into INSTALLED_APPS
             
-          * If we had to inject PVXAdmin or backports, then :func:`._reinit_apps` will be called to re-load all apps in INSTALLED_APPS
+          * If we had to inject PVXAdmin or backports here, then :func:`._reinit_apps` will be called to re-load all apps
+            in INSTALLED_APPS
           
           * Finally, :meth:`._setup_admin` is called, which auto-registers the admin site using :func:`.setup_admin`, so long as
             the user hasn't disabled automatic registration by setting ``AUTO_SETUP_ADMIN=False``
@@ -203,15 +278,20 @@ class PrivexAdminPlusConfig(AppConfig):
         
         """
         need_reload = False
-        # Inject privex.adminplus.apps.PVXAdmin into INSTALLED_APPS if it's not present
-        if not _app_installed('privex.adminplus.apps.PVXAdmin'):
+        # Inject privex.adminplus.apps.PVXAdmin into INSTALLED_APPS if it's not present (and inject_apps couldn't load it)
+        if not _app_loaded(PVX_ADMIN_APP):
             self.lerror(" ------------------------------------------------------------------\n")
             self.lerror(" [!!!] 'privex.adminplus.apps.PVXAdmin' is not in your INSTALLED_APPS.")
             self.lerror(" [!!!] To prevent potential issues, and speedup your app's startup time, add 'privex.adminplus.apps.PVXAdmin' "
                         "to INSTALLED_APPS directly after 'privex.adminplus'\n")
             self.lerror(" ------------------------------------------------------------------\n")
             self.lerror(" [+++] Dynamically injecting apps.PVXAdmin into INSTALLED_APPS ...")
-            _inject_app('privex.adminplus.apps.PVXAdmin', after='privex.adminplus')
+            if not _app_installed(PVX_ADMIN_APP):
+                entry = self._installed_entry()
+                if entry is None:
+                    _append_app(PVX_ADMIN_APP)
+                else:
+                    _inject_app(PVX_ADMIN_APP, after=entry)
             need_reload = True
             # _init_app('privex.adminplus.apps.PVXAdmin')
         # If we're on an older Django version, inject privex.adminplus.backports into INSTALLED_APPS if it's not present
@@ -234,7 +314,9 @@ class PrivexAdminPlusConfig(AppConfig):
         
 
 class PVXAdmin(AdminConfig):
-    default_site = 'privex.adminplus.admin.CustomAdmin'
+    # Django's default admin site (admin.site) is the default CustomAdmin singleton, rather than a separate instance with an
+    # empty custom URL registry.
+    default_site = 'privex.adminplus.admin.default_site'
     
     def ready(self):
         
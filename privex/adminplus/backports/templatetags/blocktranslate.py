@@ -88,6 +88,12 @@ class BlockTranslateNode(Node):
         self.trimmed = trimmed
         self.asvar = asvar
         self.tag_name = tag_name
+        # The message format strings (and the variables they use) only depend on the parsed tokens, so they're built
+        # once here instead of on every render
+        self.singular_message, self.singular_vars = self.render_token_list(self.singular)
+        self.singular_vars = tuple(self.singular_vars)
+        self.plural_message, self.plural_vars = self.render_token_list(self.plural) if self.plural else (None, ())
+        self.plural_vars = tuple(self.plural_vars)
     
     def render_token_list(self, tokens):
         result = []
@@ -111,17 +117,17 @@ class BlockTranslateNode(Node):
         # Update() works like a push(), so corresponding context.pop() is at
         # the end of function
         context.update({var: val.resolve(context) for var, val in self.extra_context.items()})
-        singular, vars = self.render_token_list(self.singular)
+        singular, vars = self.singular_message, self.singular_vars
         if self.plural and self.countervar and self.counter:
             count = self.counter.resolve(context)
             context[self.countervar] = count
-            plural, plural_vars = self.render_token_list(self.plural)
+            plural = self.plural_message
             if message_context:
                 result = translation.npgettext(message_context, singular,
                                                plural, count)
             else:
                 result = translation.ngettext(singular, plural, count)
-            vars.extend(plural_vars)
+            vars = vars + self.plural_vars
         else:
             if message_context:
                 result = translation.pgettext(message_context, singular)
@@ -0,0 +1,205 @@
+"""
+Server-side response caching for read-heavy custom admin views - see the ``cache_timeout`` option of
+:meth:`.CustomAdmin.add_url`::
+
+    >>> @register_url('dashboard/', cache_timeout=300, permissions=['app.view_post'])
+    >>> def dashboard(request):
+    ...     return TemplateResponse(request, 'dashboard.html', dict(stats=expensive_aggregates()))
+
+Rendered responses are stored with Django's cache framework, keyed by the admin site, the registry entry (the name the
+view was registered with), a version number, and a hash of the request URL, language and (optionally) the user / their
+permissions.
+
+Pages containing a CSRF token (e.g. any page extending ``admin/base_site.html``) are only valid for the CSRF cookie they
+were rendered for, so they're additionally keyed by the request's CSRF cookie. A marker is stored under the plain key,
+which tells later requests to look up their CSRF specific key instead.
+
+Each entry's version number is also kept in the cache, so :func:`.clear_view_cache` (or
+:meth:`.CustomAdmin.clear_view_cache`) invalidates every cached response of a view at once - across all processes
+sharing the cache - by simply bumping it.
+
+Settings:
+
+  * ``ADMINPLUS_CACHE`` - (default: ``'default'``) the alias of the cache (from ``settings.CACHES``) to store
+    responses in, unless a view sets ``cache_alias``
+
+"""
+import hashlib
+import time
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.middleware.csrf import CSRF_SESSION_KEY
+from django.utils.translation import get_language
+
+from privex.adminplus.views import iscoroutinefunction, sync_to_async
+import logging
+
+log = logging.getLogger(__name__)
+
+VIEW_CACHE_PREFIX = 'adminplus:view'
+"""Prefix of every cache key used by cached custom views"""
+
+VARY_ON_CSRF = 'adminplus:vary_on_csrf'
+"""Stored in place of a response whose page uses the CSRF token - the response is cached under :func:`._csrf_key`"""
+
+
+def get_cache(alias: Optional[str] = None):
+    """Returns the cache used for cached views - ``alias``, or ``settings.ADMINPLUS_CACHE`` (default: ``'default'``)"""
+    return caches[alias if alias is not None else getattr(settings, 'ADMINPLUS_CACHE', 'default')]
+
+
+def _version_key(site_name: str, group: str) -> str:
+    return f"{VIEW_CACHE_PREFIX}:{site_name}:{group}:version"
+
+
+def _new_version() -> int:
+    # A time based version (rather than 1) ensures responses cached before the version key was evicted can't be served again
+    return time.time_ns()
+
+
+def get_version(site_name: str, group: str, alias: Optional[str] = None) -> int:
+    """Returns the current cache version of the view registered as ``group`` on the site ``site_name``"""
+    cache, key = get_cache(alias), _version_key(site_name, group)
+    version = cache.get(key)
+    if version is None:
+        # add() only sets the version if no other process has just done so
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_version(site_name: str, group: str, alias: Optional[str] = None) -> int:
+    """Bump the cache version of the view registered as ``group`` on ``site_name``, orphaning all of it's cached responses"""
+    cache, key = get_cache(alias), _version_key(site_name, group)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _new_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def _cache_key(request, prefix: str, version: int, user_part: str) -> str:
+    raw = '\n'.join((request.build_absolute_uri(), str(get_language()), user_part))
+    return f"{prefix}:{version}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def _csrf_cookie(request) -> Optional[str]:
+    """Returns the CSRF cookie (or session value with ``CSRF_USE_SESSIONS``) which the request was sent with, if any"""
+    if getattr(settings, 'CSRF_USE_SESSIONS', False):
+        session = getattr(request, 'session', None)
+        return None if session is None else session.get(CSRF_SESSION_KEY)
+    return request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+
+
+def _csrf_key(key: str, request) -> str:
+    return f"{key}:csrf:{hashlib.sha1(str(_csrf_cookie(request)).encode('utf-8')).hexdigest()}"
+
+
+def _signature_part(sig) -> str:
+    if sig is None or isinstance(sig, str):
+        return str(sig)
+    return ','.join(sorted(sig))
+
+
+def _uses_csrf(request) -> bool:
+    # CSRF_COOKIE_USED is set by get_token() before Django 4.1, CSRF_COOKIE_NEEDS_UPDATE since then
+    return bool(request.META.get('CSRF_COOKIE_USED') or request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+
+
+def _is_cacheable(request, response) -> bool:
+    if response.status_code != 200 or response.streaming or len(response.cookies) > 0:
+        return False
+    # Pages containing a CSRF token are cached per CSRF cookie - so the token must be for the cookie which the request
+    # was sent with, rather than a new (or rotated) one which only this response sets
+    cookie = _csrf_cookie(request)
+    return not _uses_csrf(request) or (cookie is not None and request.META.get('CSRF_COOKIE') == cookie)
+
+
+def _render(response):
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    return response
+
+
+def cached_view(view: callable, site, group: str, timeout: Optional[float], vary_on_user: bool = False,
+                vary_on_perms: bool = True, alias: Optional[str] = None) -> callable:
+    """
+    Wrap ``view`` so that it's successful ``GET`` responses are cached for ``timeout`` seconds. Used by the
+    ``cache_timeout`` option of :meth:`.CustomAdmin.add_url`.
+
+    Only ``200`` responses to ``GET`` requests are cached - streaming responses and responses setting cookies are
+    always passed through. Pages which use the CSRF token (e.g. forms, or anything extending ``admin/base_site.html``)
+    are cached per CSRF cookie, and only for requests which were sent with one. Template responses are rendered before
+    being stored.
+
+    A cache hit skips the view entirely (including any checks within it), so :meth:`.CustomAdmin.add_url` always wraps
+    cached views with :meth:`.CustomAdmin.admin_view`.
+
+    :param callable view: The view to wrap
+    :param CustomAdmin site: The admin site which the view is registered on - cache keys are scoped per site
+    :param str group: The registry entry (URL name) the view was registered as - cache keys are scoped per entry, and
+                      :meth:`.CustomAdmin.clear_view_cache` clears a whole entry
+    :param float timeout: Seconds to cache responses for (``None`` caches them until the entry is cleared)
+    :param bool vary_on_user: (Default: ``False``) Cache responses separately for each user
+    :param bool vary_on_perms: (Default: ``True``) Cache responses separately for each set of user permissions (see
+                               :meth:`.CustomAdmin.app_list_signature`), so users only share responses with users who
+                               have the same permissions
+    :param str alias: The cache alias to use, instead of ``settings.ADMINPLUS_CACHE``
+    """
+    prefix = f"{VIEW_CACHE_PREFIX}:{site.name}:{group}"
+
+    def _user_part(user, sig) -> str:
+        return '\n'.join((
+            str(getattr(user, 'pk', None)) if vary_on_user else '',
+            _signature_part(sig) if vary_on_perms else '',
+        ))
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def _aview(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await view(request, *args, **kwargs)
+            cache, user = get_cache(alias), getattr(request, 'user', None)
+            sig = await sync_to_async(site.app_list_signature)(user) if vary_on_perms else None
+            version = await sync_to_async(get_version)(site.name, group, alias)
+            key = _cache_key(request, prefix, version, _user_part(user, sig))
+            aget = cache.aget if hasattr(cache, 'aget') else sync_to_async(cache.get)
+            aset = cache.aset if hasattr(cache, 'aset') else sync_to_async(cache.set)
+            res = await aget(key)
+            if res == VARY_ON_CSRF:
+                res = await aget(_csrf_key(key, request))
+            if res is not None:
+                return res
+            res = _render(await view(request, *args, **kwargs))
+            if _is_cacheable(request, res):
+                if _uses_csrf(request):
+                    await aset(key, VARY_ON_CSRF, timeout)
+                    key = _csrf_key(key, request)
+                await aset(key, res, timeout)
+            return res
+        return _aview
+
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view(request, *args, **kwargs)
+        cache, user = get_cache(alias), getattr(request, 'user', None)
+        sig = site.app_list_signature(user) if vary_on_perms else None
+        key = _cache_key(request, prefix, get_version(site.name, group, alias), _user_part(user, sig))
+        res = cache.get(key)
+        if res == VARY_ON_CSRF:
+            res = cache.get(_csrf_key(key, request))
+        if res is not None:
+            return res
+        res = _render(view(request, *args, **kwargs))
+        if _is_cacheable(request, res):
+            if _uses_csrf(request):
+                cache.set(key, VARY_ON_CSRF, timeout)
+                key = _csrf_key(key, request)
+            cache.set(key, res, timeout)
+        return res
+    return _view
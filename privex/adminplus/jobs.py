@@ -0,0 +1,251 @@
+"""
+Background jobs for long-running custom admin views - see the ``background`` option of :meth:`.CustomAdmin.add_url`.
+
+Instead of running the view within the request (and risking the web server's worker timeout), the request is answered
+straight away with a redirect to the job's status page, while the view runs on a bounded thread pool. The view's response
+is written to a :class:`.JobStore` (files in ``settings.ADMINPLUS_JOBS_DIR``), and served from the job's result page once
+it's done.
+
+Settings:
+
+  * ``ADMINPLUS_JOBS_DIR`` - (default: ``<tmp dir>/adminplus_jobs``) directory for job metadata and results. Use a directory
+    shared by all of your web server's worker processes, so any worker can serve the status / result pages.
+  * ``ADMINPLUS_JOBS_WORKERS`` - (default: ``4``) number of threads running background jobs, per process
+  * ``ADMINPLUS_JOBS_MAX_PENDING`` - (default: ``100``) maximum number of queued + running jobs per process - once
+    reached, new jobs are refused with HTTP 503
+  * ``ADMINPLUS_JOBS_TTL`` - (default: ``86400``) seconds to keep finished jobs (and their results) for
+
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
+from django.urls import reverse
+from django.utils import translation
+from django.utils.datastructures import MultiValueDict
+from privex.helpers import DictObject
+
+from privex.adminplus.views import async_to_sync, iscoroutinefunction
+import logging
+
+log = logging.getLogger(__name__)
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+"""Possible values of a job's ``status``"""
+
+_RE_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_slots: Optional[threading.Semaphore] = None
+_store: Optional["JobStore"] = None
+
+
+class JobStore:
+    """
+    Stores background job metadata (``<job_id>.json``) and results (``<job_id>.result``) as files within ``path``.
+
+    Metadata is written to a temporary file and renamed into place, so readers (e.g. a status page served by another
+    worker process) never see a partially written job.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._last_prune = 0.0
+
+    def _file(self, job_id: str, ext: str) -> str:
+        # Job IDs end up in file paths, so only ever accept IDs in the format generated by create()
+        if not _RE_JOB_ID.match(str(job_id)):
+            raise ValueError(f"Invalid job ID: {job_id!r}")
+        return os.path.join(self.path, f"{job_id}.{ext}")
+
+    def create(self, **meta) -> DictObject:
+        """Create and save a new ``queued`` job, with ``meta`` as extra metadata (e.g. ``view`` / ``user_id``)"""
+        job = DictObject(meta, id=uuid.uuid4().hex, status='queued', created=time.time(), started=None, finished=None)
+        self.save(job)
+        return job
+
+    def save(self, job: DictObject):
+        path = self._file(job.id, 'json')
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump(job, fh)
+        os.replace(tmp, path)
+
+    def get(self, job_id: str) -> Optional[DictObject]:
+        """Load a job's metadata, returning ``None`` if the job doesn't exist (or ``job_id`` is invalid)"""
+        try:
+            with open(self._file(job_id, 'json')) as fh:
+                return DictObject(json.load(fh))
+        except (ValueError, FileNotFoundError):
+            return None
+
+    def result_path(self, job_id: str) -> str:
+        return self._file(job_id, 'result')
+
+    def prune(self, max_age: float, interval: float = 3600):
+        """
+        Delete jobs which finished more than ``max_age`` seconds ago - runs at most once per ``interval`` seconds.
+        Jobs which are still queued or running are never deleted, no matter how old they are.
+        """
+        now = time.time()
+        if now - self._last_prune < interval:
+            return
+        self._last_prune = now
+        for f in os.listdir(self.path):
+            job_id, _, ext = f.partition('.')
+            if ext not in ('json', 'result') or not _RE_JOB_ID.match(job_id):
+                continue
+            try:
+                if ext == 'result' and os.path.exists(self._file(job_id, 'json')):
+                    # Results are deleted along with their job's metadata
+                    continue
+                job = self.get(job_id) if ext == 'json' else None
+                if job is not None and job.get('finished') is None:
+                    continue
+                finished = os.path.getmtime(os.path.join(self.path, f)) if job is None else job.finished
+                if now - finished > max_age:
+                    if ext == 'json':
+                        self._remove(self.result_path(job_id))
+                    os.remove(os.path.join(self.path, f))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def get_store() -> JobStore:
+    """Returns the :class:`.JobStore` for ``settings.ADMINPLUS_JOBS_DIR``, creating it on first use"""
+    global _store
+    path = getattr(settings, 'ADMINPLUS_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'adminplus_jobs'))
+    if _store is None or _store.path != path:
+        with _lock:
+            if _store is None or _store.path != path:
+                _store = JobStore(path)
+    return _store
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool which runs background jobs (``settings.ADMINPLUS_JOBS_WORKERS`` threads), creating it on first use"""
+    global _executor, _slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _slots = threading.Semaphore(int(getattr(settings, 'ADMINPLUS_JOBS_MAX_PENDING', 100)))
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, 'ADMINPLUS_JOBS_WORKERS', 4)), thread_name_prefix='adminplus-job'
+                )
+    return _executor
+
+
+def _copy_file(f) -> SimpleUploadedFile:
+    f.seek(0)
+    return SimpleUploadedFile(f.name, f.read(), f.content_type)
+
+
+def _detach_request(request) -> HttpRequest:
+    """
+    Returns a copy of ``request`` which a background job can use after the response has been returned - by then, the
+    web server has closed the request (deleting any uploaded files), and middleware may still be using the original.
+
+    The request body is read (and uploaded files are copied into memory) within the request thread. The copy has the
+    request's user, but no session or messages, as those are saved when the response is returned.
+    """
+    req = HttpRequest()
+    req.method, req.path, req.path_info = request.method, request.path, request.path_info
+    req.META, req.COOKIES = dict(request.META), dict(request.COOKIES)
+    req.GET = request.GET.copy()
+    if request.method not in ('GET', 'HEAD'):
+        if request.content_type == 'multipart/form-data':
+            # As with the original request, the raw body isn't available once multipart data has been parsed
+            req._read_started = True
+        else:
+            req._body = request.body
+        req.POST = request.POST.copy()
+        req.FILES = MultiValueDict({k: [_copy_file(f) for f in files] for k, files in request.FILES.lists()})
+    req.content_type, req.content_params = request.content_type, request.content_params
+    for attr in ('user', 'resolver_match', 'urlconf', 'current_app', 'LANGUAGE_CODE'):
+        if hasattr(request, attr):
+            setattr(req, attr, getattr(request, attr))
+    return req
+
+
+def _run_job(store: JobStore, job: DictObject, view: callable, request, args, kwargs):
+    job.update(status='running', started=time.time())
+    store.save(job)
+    try:
+        with translation.override(getattr(request, 'LANGUAGE_CODE', None) or job.get('language')):
+            res = view(request, *args, **kwargs)
+            if hasattr(res, 'render') and callable(res.render):
+                res = res.render()
+        with open(store.result_path(job.id), 'wb') as fh:
+            if res.streaming:
+                for chunk in res.streaming_content:
+                    fh.write(chunk)
+            else:
+                fh.write(res.content)
+        job.update(
+            status='done', status_code=res.status_code, content_type=res.get('Content-Type'),
+            disposition=res.get('Content-Disposition'),
+        )
+    except Exception as e:
+        log.exception("Background job %s (%s) failed", job.id, job.get('view'))
+        job.update(status='failed', error=f"{type(e).__name__}: {e!s}")
+    finally:
+        job.finished = time.time()
+        store.save(job)
+        # Each job thread gets it's own database connections - close them, rather than leaving them for the thread's next job
+        connections.close_all()
+        _slots.release()
+
+
+def background_view(view: callable, site, human: str = None) -> callable:
+    """
+    Wrap ``view`` so that it's ran as a background job on the job thread pool, instead of within the request.
+
+    The request is answered immediately with a redirect to the job's status page (``admin:adminplus_job_status``), with the
+    job ID in the ``X-Job-ID`` header. Used by the ``background`` option of :meth:`.CustomAdmin.add_url`.
+
+    :param callable view: The view to wrap (async views are ran using ``async_to_sync``)
+    :param CustomAdmin site: The admin site which serves the job status / result pages
+    :param str human: The view's human name, shown on the status page
+    """
+    run = async_to_sync(view) if iscoroutinefunction(view) else view
+
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        executor, store = get_executor(), get_store()
+        store.prune(float(getattr(settings, 'ADMINPLUS_JOBS_TTL', 86400)))
+        if not _slots.acquire(blocking=False):
+            return HttpResponse(b"Too many background jobs are running - please try again later.", status=503)
+        try:
+            # Load the user within the request thread, so the job runs as them
+            user = getattr(request, 'user', None)
+            job = store.create(
+                view=human, path=request.get_full_path(), user_id=getattr(user, 'pk', None), language=translation.get_language(),
+            )
+            executor.submit(_run_job, store, job, run, _detach_request(request), args, kwargs)
+        except BaseException:
+            _slots.release()
+            raise
+        res = HttpResponseRedirect(reverse('admin:adminplus_job_status', args=[job.id], current_app=site.name))
+        res['X-Job-ID'] = job.id
+        return res
+    return _view
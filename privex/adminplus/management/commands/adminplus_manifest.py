@@ -0,0 +1,50 @@
+import json
+import sys
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import get_resolver
+
+from privex.adminplus.admin import STORE
+from privex.adminplus.manifest import build_manifest, write_manifest
+
+
+class Command(BaseCommand):
+    help = "Record the admin registry (ModelAdmins and custom views of every AdminPlus site) as a manifest, which " \
+           "setup_admin loads instead of running admin.autodiscover() when settings.ADMINPLUS_MANIFEST is set"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output', default=None,
+            help="File to write the manifest to (default: settings.ADMINPLUS_MANIFEST) - use '-' for stdout"
+        )
+    
+    def handle(self, *args, **options):
+        output = options['output'] if options['output'] is not None else getattr(settings, 'ADMINPLUS_MANIFEST', None)
+        if output is None:
+            raise CommandError("No output file - pass --output, or set settings.ADMINPLUS_MANIFEST")
+        if STORE.manifest is not None:
+            raise CommandError(
+                f"The admin sites were loaded from the manifest '{STORE.manifest}' instead of admin.autodiscover(), so they "
+                f"may be out of date - delete it, then run this command again to rebuild it."
+            )
+        # Load the URLconf, so any views registered from urls.py (or a setup_admin call there) are included
+        if getattr(settings, 'ROOT_URLCONF', None):
+            get_resolver().url_patterns
+        if not STORE.is_setup:
+            raise CommandError("Privex AdminPlus isn't set up - setup_admin() must be called (AUTO_SETUP_ADMIN, or from urls.py)")
+        admin.autodiscover()
+        
+        try:
+            manifest = build_manifest() if output == '-' else write_manifest(str(output))
+        except ValueError as e:
+            raise CommandError(str(e))
+        if output == '-':
+            json.dump(manifest, sys.stdout, indent=2)
+            return
+        n_models = sum(len(s['models']) for s in manifest['sites'])
+        n_views = sum(len(s['views']) for s in manifest['sites'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote manifest of {n_models} models and {n_views} views ({len(manifest['sites'])} sites) to {output}"
+        ))
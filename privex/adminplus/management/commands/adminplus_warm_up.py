@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from privex.adminplus.admin import warm_up
+
+
+class Command(BaseCommand):
+    help = "Diagnostic only: warm up every AdminPlus site (URL resolvers, reversed custom URLs, admin templates) within " \
+           "this command's own process, and print how long each step took - i.e. the first request latency which " \
+           "calling warm_up() from your web server (e.g. gunicorn's when_ready / post_worker_init hooks) saves. It " \
+           "can't warm up a running server's processes"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('sites', nargs='*', help="Singleton names of the sites to warm up (default: every site)")
+        parser.add_argument('--model-admins', action='store_true', help="Also instantiate every lazy ModelAdmin")
+        parser.add_argument('--views', action='store_true', help="Also import every custom view registered by dotted path")
+    
+    def handle(self, *args, **options):
+        timings = warm_up(options['sites'] or None, model_admins=options['model_admins'], views=options['views'])
+        for name, steps in timings.items():
+            detail = ', '.join(f"{step} {ms:.1f} ms" for step, ms in steps.items())
+            self.stdout.write(self.style.SUCCESS(f"Warmed up admin site '{name}' in {sum(steps.values()):.1f} ms ({detail})"))
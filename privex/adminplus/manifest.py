@@ -0,0 +1,231 @@
+"""
+Build-time registry manifests, so production workers can skip ``admin.autodiscover()``.
+
+``autodiscover`` imports every app's ``admin.py`` on each worker boot, just to fill in the admin registry. A manifest records
+the final registry instead - the ModelAdmin class of each registered model, and the route, name, human name, hidden flag,
+options and dotted view path of each custom view. Build it as part of your deployment (after ``collectstatic`` etc.)::
+
+    python3 manage.py adminplus_manifest -o adminplus_manifest.json
+
+Then point ``settings.ADMINPLUS_MANIFEST`` at it::
+
+    ADMINPLUS_MANIFEST = os.path.join(BASE_DIR, 'adminplus_manifest.json')
+
+:func:`.setup_admin` then builds the admin sites from the manifest. Custom views are registered as :class:`.LazyView`'s, so
+their modules are only imported when they're first dispatched, and models are registered with the dotted path of their
+ModelAdmin class, which is only imported once the admin URLs are built (or the ModelAdmin is first used).
+
+Anything else your ``admin.py`` modules do when imported (e.g. connecting signals) won't happen until the module is imported
+for another reason, and views registered after ``setup_admin`` (e.g. from ``urls.py``) still register as usual. Rebuild the
+manifest whenever your admin registrations change - if the manifest file doesn't exist, ``setup_admin`` falls back to
+``autodiscover``.
+
+Settings:
+
+  * ``ADMINPLUS_MANIFEST`` - (default: ``None``) path to the manifest which :func:`.setup_admin` loads instead of
+    running ``admin.autodiscover()``
+
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from inspect import isclass
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from django.apps import apps
+from django.utils.module_loading import import_string
+from privex.helpers import DictObject
+
+from privex.adminplus import VERSION
+from privex.adminplus.views import LazyView, iscoroutinefunction
+import logging
+
+if TYPE_CHECKING:
+    from privex.adminplus.admin import CustomAdmin
+
+log = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+"""Format version of manifests written by :func:`.build_manifest` - :func:`.load_manifest` refuses any other version"""
+
+_CALLABLE_OPTIONS = ('etag', 'last_modified')
+"""add_url options which are callables - saved by their dotted path, and imported on first call"""
+
+
+def object_path(obj) -> str:
+    """
+    Returns the dotted path of the function / class ``obj``, e.g. ``'reports.views.big_report'``.
+
+    :raises ValueError: When ``obj`` can't be imported by it's dotted path (e.g. lambdas, nested functions, instances)
+    """
+    module, qualname = getattr(obj, '__module__', None), getattr(obj, '__qualname__', None)
+    if module is None or qualname is None or '<' in qualname:
+        raise ValueError(f"{obj!r} can't be imported by a dotted path")
+    obj_path = f"{module}.{qualname}"
+    try:
+        found = import_string(obj_path)
+    except ImportError:
+        found = None
+    if found is not obj:
+        raise ValueError(f"{obj!r} can't be imported by it's dotted path '{obj_path}'")
+    return obj_path
+
+
+def lazy_callable(func_path: str, is_async: bool = False) -> callable:
+    """
+    Returns a function which imports the function ``func_path`` on it's first call, and then calls it. Pass ``is_async=True``
+    for ``async def`` functions, so the returned function is a coroutine function too.
+    """
+    func, lock = None, threading.Lock()
+
+    def _load():
+        nonlocal func
+        if func is None:
+            with lock:
+                if func is None:
+                    func = import_string(func_path)
+        return func
+
+    if is_async:
+        async def _afunc(*args, **kwargs):
+            return await _load()(*args, **kwargs)
+        _afunc.__module__, _, _afunc.__qualname__ = func_path.rpartition('.')
+        return _afunc
+
+    def _func(*args, **kwargs):
+        return _load()(*args, **kwargs)
+    _func.__module__, _, _func.__qualname__ = func_path.rpartition('.')
+    return _func
+
+
+def _view_record(spec: DictObject) -> dict:
+    view, options = spec.view, dict(spec.options)
+    is_async = bool(options.pop('is_async', False))
+    if isinstance(view, str):
+        rec = dict(view=view, is_async=is_async)
+    elif isinstance(view, LazyView):
+        rec = dict(view=view.view_path, initkwargs=view.initkwargs, attrs=view._attrs, is_async=view.is_async)
+    elif hasattr(view, 'view_class'):
+        # The function returned by SomeView.as_view(**initkwargs)
+        rec = dict(view=object_path(view.view_class), initkwargs=view.view_initkwargs,
+                   is_async=bool(getattr(view.view_class, 'view_is_async', False)))
+    else:
+        is_async = getattr(view, 'view_is_async', False) if isclass(view) else iscoroutinefunction(view)
+        rec = dict(view=object_path(view), is_async=bool(is_async))
+    for k in _CALLABLE_OPTIONS:
+        if options.get(k) is not None:
+            options[k] = dict(callable=object_path(options[k]), is_async=iscoroutinefunction(options[k]))
+    rec.update(urls={}, human=spec.human, hidden=spec.hidden, options=options)
+    # Raises TypeError for options which can't be saved, e.g. objects passed as initkwargs
+    json.dumps(rec)
+    return rec
+
+
+def _site_record(key: str, site) -> dict:
+    errors, models, views, specs = [], [], [], {}
+    # noinspection PyProtectedMember
+    from privex.adminplus.admin import LazyModelAdmin
+    for model, model_admin in list(site._registry.items()):
+        try:
+            if isinstance(model_admin, LazyModelAdmin) and not model_admin.is_imported:
+                # Registered by a dotted path (e.g. from a previous manifest) which hasn't been imported yet
+                admin_path = model_admin.admin_path
+            else:
+                # __class__ rather than type(), as CustomAdmin registers models with a LazyModelAdmin proxy
+                admin_path = object_path(model_admin.__class__)
+            models.append(dict(model=model._meta.label, admin=admin_path))
+        except ValueError as e:
+            errors.append(f"site '{key}': ModelAdmin for {model._meta.label}: {e!s}")
+
+    # Each add_url call shares one spec between the entries it created, so group entries by their spec
+    snap = site.snapshot
+    for entry in snap.url_map.values():
+        spec = snap.specs.get(entry.route)
+        if spec is None:
+            errors.append(f"site '{key}': URL '{entry.route}' has no registration spec")
+            continue
+        if id(spec) not in specs:
+            try:
+                rec = _view_record(spec)
+            except (ValueError, TypeError) as e:
+                errors.append(f"site '{key}': view for URL '{entry.route}': {e!s}")
+                rec = None
+            specs[id(spec)] = rec
+            if rec is not None:
+                views.append(rec)
+        if specs[id(spec)] is not None:
+            specs[id(spec)]['urls'][entry.route] = entry.name
+    return dict(key=key, name=site.name, models=models, views=views, errors=errors)
+
+
+def build_manifest(sites: Optional[dict] = None) -> dict:
+    """
+    Build a manifest of the current registry of every :class:`.CustomAdmin` singleton (or of ``sites``, a dict of
+    singleton name to :class:`.CustomAdmin`).
+
+    :raises ValueError: Listing every view / ModelAdmin which can't be saved to a manifest (e.g. lambdas, nested functions,
+                        ModelAdmins created by passing options to ``register``), or views with options which aren't JSON
+                        serializable
+    """
+    from privex.adminplus.admin import CustomAdmin
+    sites = dict(CustomAdmin._ct_admins) if sites is None else sites
+    records, errors = [], []
+    for key, site in sites.items():
+        rec = _site_record(key, site)
+        errors.extend(rec.pop('errors'))
+        records.append(rec)
+    if len(errors) > 0:
+        raise ValueError(f"{len(errors)} registration(s) can't be saved to a manifest: " + '; '.join(errors))
+    return dict(
+        version=MANIFEST_VERSION, adminplus=VERSION, created=datetime.now(timezone.utc).isoformat(), sites=records,
+    )
+
+
+def write_manifest(file_path: str, manifest: Optional[dict] = None) -> dict:
+    """Write ``manifest`` (default: :func:`.build_manifest`) to ``file_path``, via a temporary file which is renamed into place"""
+    manifest = build_manifest() if manifest is None else manifest
+    tmp = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp, file_path)
+    return manifest
+
+
+def _view_spec(rec: dict) -> dict:
+    options = dict(rec.get('options', {}))
+    for k in _CALLABLE_OPTIONS:
+        if options.get(k) is not None:
+            options[k] = lazy_callable(options[k]['callable'], is_async=options[k].get('is_async', False))
+    view = LazyView(rec['view'], initkwargs=rec.get('initkwargs'), is_async=rec.get('is_async', False), **rec.get('attrs', {}))
+    return dict(options, view=view, url=rec['urls'], human=rec['human'], hidden=rec['hidden'])
+
+
+def load_manifest(manifest: Union[str, dict]) -> List["CustomAdmin"]:
+    """
+    Register the custom views and ModelAdmins recorded in ``manifest`` (a manifest dict, or the path to a manifest file)
+    onto their :class:`.CustomAdmin` singletons - used by :func:`.setup_admin` when ``settings.ADMINPLUS_MANIFEST`` is set.
+
+    Custom views are registered as :class:`.LazyView`'s, and models are registered with the dotted path of their ModelAdmin
+    class (unless they're already registered), so neither are imported until they're first needed.
+
+    :return List[CustomAdmin] sites: The admin sites which were loaded
+    """
+    from privex.adminplus.admin import CustomAdmin
+    if isinstance(manifest, str):
+        with open(manifest) as fh:
+            manifest = json.load(fh)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version {manifest.get('version')!r} (expected {MANIFEST_VERSION})")
+    sites = []
+    for rec in manifest['sites']:
+        key = rec['key']
+        site = CustomAdmin.admin_singleton(key, **({} if key == 'default' else dict(name=rec['name'])))
+        site.add_urls(_view_spec(v) for v in rec['views'])
+        for m in rec['models']:
+            model = apps.get_model(m['model'])
+            if not site.is_registered(model):
+                site.register(model, m['admin'])
+        log.debug("Loaded %d models and %d views onto admin site '%s' from manifest", len(rec['models']), len(rec['views']), key)
+        sites.append(site)
+    return sites
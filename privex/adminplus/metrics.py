@@ -0,0 +1,304 @@
+"""
+Low overhead latency / throughput metrics for custom admin views.
+
+Every view registered with :meth:`.CustomAdmin.add_url` is wrapped with :func:`.metered_view`, which records (per site
+and URL name) the number of calls, the number of errors (unhandled exceptions and HTTP 5xx responses), the total time
+spent, and a latency histogram.
+
+Counters are kept in a memory-mapped file per process - each worker process only ever writes to it's own file, so
+recording a call needs no inter-process locking, while :func:`.collect` sums the files of every worker. The metrics are
+shown on the admin page ``admin:adminplus_metrics``, and exported in the Prometheus text format by
+``admin:adminplus_metrics_prometheus``.
+
+Latency is measured until the view returns it's response - for streaming responses, that excludes sending the body.
+
+Settings:
+
+  * ``ADMINPLUS_METRICS`` - (default: ``True``) record metrics for custom views (read when views are registered)
+  * ``ADMINPLUS_METRICS_DIR`` - (default: ``None``) directory where each process keeps it's metrics file. Set it to a
+    directory shared by all of your web server's worker processes (and empty it when the server starts), so the metrics
+    pages show the totals of every worker. Without it, metrics are kept in anonymous memory, and each process only
+    reports it's own.
+  * ``ADMINPLUS_METRICS_MAX_VIEWS`` - (default: ``4096``) the number of URLs each process can record metrics for
+  * ``ADMINPLUS_METRICS_TOKEN`` - (default: ``None``) a bearer token which Prometheus can use to scrape the metrics
+    endpoint (``Authorization: Bearer <token>``), instead of a staff session
+
+"""
+import mmap
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from privex.helpers import DictObject
+
+from privex.adminplus.views import iscoroutinefunction
+import logging
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Upper bounds (in seconds) of the latency histogram buckets - the same as the Prometheus client's defaults"""
+
+_BUCKETS_NS = tuple(int(b * 1e9) for b in LATENCY_BUCKETS)
+
+_MAGIC = 0x31304d50  # "PM01"
+_HEADER = 8
+"""int64 slots at the start of each file: magic, record count, capacity, number of buckets"""
+_KEY_SLOTS = 16
+"""int64 slots (128 bytes) holding each record's UTF-8 key"""
+_RECORD = _KEY_SLOTS + 3 + len(LATENCY_BUCKETS) + 1
+"""int64 slots per record: key, calls, errors, total nanoseconds, then one count per bucket (plus ``+Inf``)"""
+
+_CLIENT_ERRORS = (Http404, PermissionDenied)
+"""Exceptions which Django turns into 4xx responses - they aren't counted as errors"""
+
+_lock = threading.Lock()
+_metrics: Optional["MetricsFile"] = None
+
+
+class MetricsFile:
+    """
+    A fixed size table of view metrics, stored in a memory-mapped file (or anonymous memory when ``path`` is ``None``).
+
+    Records are appended on first use of a key, and never removed. Only the owning process writes to the file, so a
+    :class:`threading.Lock` is enough to keep concurrent updates from being lost.
+    """
+
+    def __init__(self, path: Optional[str], capacity: int):
+        size = (_HEADER + _RECORD * capacity) * 8
+        if path is None:
+            self._mm = mmap.mmap(-1, size)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                # Start from zeroes, in case the file was left behind by an earlier process with the same PID
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                self._mm = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+        self.path, self.capacity = path, capacity
+        self._values = memoryview(self._mm).cast('q')
+        self._values[0], self._values[2], self._values[3] = _MAGIC, capacity, len(LATENCY_BUCKETS)
+        self._slots: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, key: str) -> int:
+        with self._lock:
+            base = self._slots.get(key)
+            if base is not None:
+                return base
+            count = self._values[1]
+            if count >= self.capacity:
+                log.warning("Metrics table is full (%d views) - not recording metrics for '%s'. Raise ADMINPLUS_METRICS_MAX_VIEWS.",
+                            self.capacity, key)
+                base = self._slots[key] = -1
+                return base
+            base = _HEADER + count * _RECORD
+            raw = key.encode('utf-8')[:_KEY_SLOTS * 8]
+            self._mm[base * 8:base * 8 + len(raw)] = raw
+            # The count is only bumped once the key is written, so readers never see a half written key
+            self._values[1] = count + 1
+            self._slots[key] = base
+            return base
+
+    def record(self, key: str, elapsed_ns: int, error: bool = False):
+        """Record a call to the view ``key`` which took ``elapsed_ns`` nanoseconds"""
+        base = self._slots.get(key)
+        if base is None:
+            base = self._slot(key)
+        if base < 0:
+            return
+        i, v = base + _KEY_SLOTS, self._values
+        with self._lock:
+            v[i] += 1
+            if error:
+                v[i + 1] += 1
+            v[i + 2] += elapsed_ns
+            v[i + 3 + bisect_left(_BUCKETS_NS, elapsed_ns)] += 1
+
+    def read(self) -> Dict[str, DictObject]:
+        return _parse(self._values, self._mm)
+
+
+def _parse(values: memoryview, raw) -> Dict[str, DictObject]:
+    if len(values) < _HEADER or values[0] != _MAGIC or values[3] != len(LATENCY_BUCKETS):
+        return {}
+    res = {}
+    for n in range(min(values[1], values[2])):
+        base = _HEADER + n * _RECORD
+        key = bytes(raw[base * 8:(base + _KEY_SLOTS) * 8]).rstrip(b'\0').decode('utf-8', errors='ignore')
+        i = base + _KEY_SLOTS
+        res[key] = DictObject(
+            calls=values[i], errors=values[i + 1], total=values[i + 2] / 1e9, buckets=list(values[i + 3:i + _RECORD - _KEY_SLOTS]),
+        )
+    return res
+
+
+def get_metrics() -> "MetricsFile":
+    """Returns this process's :class:`.MetricsFile`, creating it on first use"""
+    global _metrics
+    if _metrics is None:
+        with _lock:
+            if _metrics is None:
+                path = getattr(settings, 'ADMINPLUS_METRICS_DIR', None)
+                if path is not None:
+                    os.makedirs(path, exist_ok=True)
+                    path = os.path.join(path, f"adminplus-{os.getpid()}.metrics")
+                _metrics = MetricsFile(path, int(getattr(settings, 'ADMINPLUS_METRICS_MAX_VIEWS', 4096)))
+    return _metrics
+
+
+def _reset_after_fork():
+    # A forked worker must not keep writing to the file of the process it was forked from (e.g. gunicorn --preload)
+    global _metrics, _lock
+    _metrics, _lock = None, threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _read_file(path: str) -> Dict[str, DictObject]:
+    try:
+        with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            values = memoryview(mm).cast('q')
+            try:
+                return _parse(values, mm)
+            finally:
+                values.release()
+    except (OSError, ValueError, TypeError):
+        # Empty (just created) or truncated files
+        return {}
+
+
+def _merge(into: Dict[str, DictObject], metrics: Dict[str, DictObject]):
+    for key, m in metrics.items():
+        t = into.get(key)
+        if t is None:
+            into[key] = DictObject(m, buckets=list(m.buckets))
+            continue
+        t.calls, t.errors, t.total = t.calls + m.calls, t.errors + m.errors, t.total + m.total
+        t.buckets = [a + b for a, b in zip(t.buckets, m.buckets)]
+
+
+def collect(site_name: Optional[str] = None) -> List[DictObject]:
+    """
+    Returns the metrics of every view, summed across all processes writing to ``settings.ADMINPLUS_METRICS_DIR`` (or for
+    the current process only, if it's not set), sorted by total time spent - slowest first.
+
+    Each item has ``site``, ``view`` (the URL name, or route), ``calls``, ``errors``, ``total`` (seconds) and ``buckets``
+    (the number of calls per :attr:`.LATENCY_BUCKETS` bucket, plus a final ``+Inf`` bucket).
+
+    :param str site_name: Only return metrics of views registered on this admin site
+    """
+    totals = {}
+    path = getattr(settings, 'ADMINPLUS_METRICS_DIR', None)
+    if path is None:
+        _merge(totals, get_metrics().read())
+    elif os.path.isdir(path):
+        for f in os.listdir(path):
+            if f.endswith('.metrics'):
+                _merge(totals, _read_file(os.path.join(path, f)))
+    res = []
+    for key, m in totals.items():
+        site, _, view = key.partition('\t')
+        if site_name is None or site == site_name:
+            res.append(DictObject(m, site=site, view=view))
+    return sorted(res, key=lambda m: m.total, reverse=True)
+
+
+def quantile(buckets: List[int], q: float) -> Optional[float]:
+    """
+    Estimate the ``q`` quantile (e.g. ``0.95``) from histogram ``buckets``, as the upper bound of the bucket it falls into.
+    Returns ``None`` if there are no calls, or ``inf`` if it's beyond the largest bucket.
+    """
+    total = sum(buckets)
+    if total == 0:
+        return None
+    rank, seen = q * total, 0
+    for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), buckets):
+        seen += count
+        if seen >= rank:
+            return bound
+    return float('inf')
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(metrics: Iterable[DictObject]) -> str:
+    """Render metrics from :func:`.collect` in the Prometheus text exposition format"""
+    metrics = list(metrics)
+    lines = [
+        '# HELP adminplus_view_requests_total Requests handled by custom admin views.',
+        '# TYPE adminplus_view_requests_total counter',
+    ]
+    labels = [f'site="{_escape(m.site)}",view="{_escape(m.view)}"' for m in metrics]
+    lines += [f'adminplus_view_requests_total{{{lb}}} {m.calls}' for lb, m in zip(labels, metrics)]
+    lines += [
+        '# HELP adminplus_view_errors_total Requests to custom admin views which raised an exception or returned HTTP 5xx.',
+        '# TYPE adminplus_view_errors_total counter',
+    ]
+    lines += [f'adminplus_view_errors_total{{{lb}}} {m.errors}' for lb, m in zip(labels, metrics)]
+    lines += [
+        '# HELP adminplus_view_latency_seconds Time taken by custom admin views to return a response.',
+        '# TYPE adminplus_view_latency_seconds histogram',
+    ]
+    for lb, m in zip(labels, metrics):
+        seen = 0
+        for bound, count in zip([repr(b) for b in LATENCY_BUCKETS] + ['+Inf'], m.buckets):
+            seen += count
+            lines.append(f'adminplus_view_latency_seconds_bucket{{{lb},le="{bound}"}} {seen}')
+        lines.append(f'adminplus_view_latency_seconds_sum{{{lb}}} {m.total!r}')
+        lines.append(f'adminplus_view_latency_seconds_count{{{lb}}} {m.calls}')
+    return '\n'.join(lines) + '\n'
+
+
+def metered_view(view: callable, key: str) -> callable:
+    """
+    Wrap ``view`` so that each call is recorded in this process's :class:`.MetricsFile` under ``key``
+    (``<site name>\\t<URL name>``). Used for every view registered by :meth:`.CustomAdmin.add_url`.
+
+    :param callable view: The view to wrap
+    :param str key: The metrics key of the view
+    """
+    clock = time.perf_counter_ns
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def _aview(request, *args, **kwargs):
+            start = clock()
+            try:
+                res = await view(request, *args, **kwargs)
+            except _CLIENT_ERRORS:
+                (_metrics or get_metrics()).record(key, clock() - start)
+                raise
+            except BaseException:
+                (_metrics or get_metrics()).record(key, clock() - start, True)
+                raise
+            (_metrics or get_metrics()).record(key, clock() - start, getattr(res, 'status_code', 0) >= 500)
+            return res
+        return _aview
+
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        start = clock()
+        try:
+            res = view(request, *args, **kwargs)
+        except _CLIENT_ERRORS:
+            (_metrics or get_metrics()).record(key, clock() - start)
+            raise
+        except BaseException:
+            (_metrics or get_metrics()).record(key, clock() - start, True)
+            raise
+        (_metrics or get_metrics()).record(key, clock() - start, getattr(res, 'status_code', 0) >= 500)
+        return res
+    return _view
@@ -0,0 +1,186 @@
+"""
+An opt-in SQL query profiler and N+1 query detector for admin requests.
+
+When profiling is enabled (``settings.ADMINPLUS_PROFILE_SQL = True``, or :attr:`.CustomAdmin.profile_sql`), each admin
+view - custom views, the admin index, and ModelAdmin views - runs with a database ``execute_wrapper`` which counts
+queries and the time spent in the database. Queries are grouped by their fingerprint (the SQL, with literals and
+``IN (...)`` lists normalised), and a SELECT repeated many times within one request is flagged as a likely N+1 query,
+together with the view / ModelAdmin which ran it, and the first line of your code which triggered it.
+
+The most recent request profiles are kept in memory (per process), and shown on the admin page ``admin:adminplus_profiler``.
+
+Profiling adds overhead to every query - enable it while hunting slow pages, rather than permanently in production.
+Template responses are rendered within the profiled view (so queries made while rendering, e.g. by ``list_display``
+columns, are counted), and async views aren't profiled.
+
+Settings:
+
+  * ``ADMINPLUS_PROFILE_SQL`` - (default: ``False``) profile admin requests (checked on each request)
+  * ``ADMINPLUS_PROFILER_HISTORY`` - (default: ``100``) number of request profiles to keep, per process
+  * ``ADMINPLUS_PROFILER_NPLUSONE`` - (default: ``5``) how many times a SELECT must run within one request to be
+    flagged as a likely N+1 query
+
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Deque, List, Optional
+
+import django
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from privex.helpers import DictObject, is_true
+import logging
+
+log = logging.getLogger(__name__)
+
+_RE_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_RE_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_IGNORED_PATHS = (
+    os.path.dirname(django.__file__) + os.sep,
+    os.path.dirname(__file__) + os.sep,
+    os.path.dirname(os.__file__) + os.sep,
+)
+"""Frames from these directories (Django, AdminPlus, the standard library) are skipped when looking for a query's caller"""
+
+_lock = threading.Lock()
+_profiles: Optional[Deque[DictObject]] = None
+_enabled: Optional[bool] = None
+
+
+def profiling_enabled() -> bool:
+    """
+    Returns ``settings.ADMINPLUS_PROFILE_SQL`` - cached, as it's checked on every admin request, and looking up a missing
+    setting is comparatively slow. The cache is reset when the setting is changed (e.g. by ``override_settings``).
+    """
+    global _enabled
+    if _enabled is None:
+        _enabled = is_true(getattr(settings, 'ADMINPLUS_PROFILE_SQL', False))
+    return _enabled
+
+
+def _setting_changed(setting, **kwargs):
+    global _enabled
+    if setting == 'ADMINPLUS_PROFILE_SQL':
+        _enabled = None
+
+
+setting_changed.connect(_setting_changed)
+
+
+def fingerprint(sql: str) -> str:
+    """Normalise ``sql`` so that queries differing only by their literals / number of ``IN`` parameters are grouped together"""
+    return _RE_LITERALS.sub('?', _RE_IN_LIST.sub('IN (...)', sql))
+
+
+def _caller() -> Optional[str]:
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_IGNORED_PATHS) and 'site-packages' not in filename:
+            return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryProfiler:
+    """
+    A database ``execute_wrapper`` which counts queries and their time per :func:`.fingerprint`. The caller of a
+    fingerprint is only looked up once it repeats, so queries which run once cost no stack walking.
+    """
+
+    def __init__(self):
+        self.queries = {}
+        self.count = 0
+        self.db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.db_time += elapsed
+            fp = fingerprint(sql)
+            q = self.queries.get(fp)
+            if q is None:
+                q = self.queries[fp] = DictObject(sql=fp, count=0, time=0.0, caller=None)
+            elif q.caller is None:
+                q.caller = _caller()
+            q.count += 1
+            q.time += elapsed
+
+    def n_plus_one(self, threshold: int) -> List[DictObject]:
+        """Returns the SELECT fingerprints which ran at least ``threshold`` times, most repeated first"""
+        return sorted(
+            (q for q in self.queries.values() if q.count >= threshold and q.sql.lstrip().upper().startswith('SELECT')),
+            key=lambda q: q.count, reverse=True,
+        )
+
+
+def get_profiles() -> Deque[DictObject]:
+    """Returns the recent request profiles of this process (newest last), creating the store on first use"""
+    global _profiles
+    if _profiles is None:
+        with _lock:
+            if _profiles is None:
+                _profiles = deque(maxlen=int(getattr(settings, 'ADMINPLUS_PROFILER_HISTORY', 100)))
+    return _profiles
+
+
+def view_origin(request, view) -> str:
+    """Describe the view / ModelAdmin which handled ``request``, e.g. ``PostAdmin (app.Post)`` or ``admin:post_info``"""
+    model_admin = getattr(view, '__self__', None)
+    if not hasattr(model_admin, 'opts'):
+        model_admin = getattr(getattr(getattr(request, 'resolver_match', None), 'func', None), 'model_admin', None)
+    if model_admin is not None:
+        return f"{model_admin.__class__.__name__} ({model_admin.opts.label})"
+    match = getattr(request, 'resolver_match', None)
+    if match is not None:
+        return match.view_name
+    return f"{getattr(view, '__module__', '')}.{getattr(view, '__qualname__', repr(view))}"
+
+
+def profiled_view(view: callable, site) -> callable:
+    """
+    Wrap ``view`` so that while :attr:`.CustomAdmin.profiling` is enabled, the SQL queries it runs (including while
+    rendering a template response) are profiled, and the profile is added to :func:`.get_profiles`. Requests which are
+    already being profiled (e.g. a custom view wrapped by :meth:`.CustomAdmin.admin_view`) are only profiled once.
+
+    :param callable view: The (sync) view to wrap
+    :param CustomAdmin site: The admin site serving the view - profiles are shown on that site's profiler page
+    """
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        if not site.profiling or getattr(request, '_adminplus_profiler', None) is not None:
+            return view(request, *args, **kwargs)
+        profiler = request._adminplus_profiler = QueryProfiler()
+        started, start = datetime.now(timezone.utc), time.perf_counter()
+        res = None
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(profiler))
+                res = view(request, *args, **kwargs)
+                if hasattr(res, 'render') and callable(res.render):
+                    res = res.render()
+            return res
+        finally:
+            threshold = int(getattr(settings, 'ADMINPLUS_PROFILER_NPLUSONE', 5))
+            get_profiles().append(DictObject(
+                site=site.name, started=started, method=request.method, path=request.get_full_path(),
+                origin=view_origin(request, view), status=getattr(res, 'status_code', None),
+                duration=time.perf_counter() - start, queries=profiler.count, db_time=profiler.db_time,
+                similar=sorted(profiler.queries.values(), key=lambda q: q.time, reverse=True)[:20],
+                n_plus_one=profiler.n_plus_one(threshold),
+            ))
+    return _view
@@ -0,0 +1,84 @@
+"""
+URL resolver used to mount :attr:`privex.adminplus.admin.CustomAdmin.custom_urls` within the admin URLconf.
+"""
+from typing import Dict, Iterable, List
+
+from django.urls import URLPattern, Resolver404
+from django.urls.resolvers import RoutePattern, URLResolver
+
+
+class CustomURLResolver(URLResolver):
+    """
+    A prefix-less :class:`.URLResolver` holding all of a :class:`.CustomAdmin`'s custom URLs, which is mounted as a single
+    entry at the start of :meth:`.CustomAdmin.get_urls`.
+
+    Rather than trying every pattern in turn (like a normal resolver would), static routes - routes without any
+    parameters such as ``hello/`` - are resolved with a dict lookup on the path. Routes with parameters are bucketed by
+    their first path segment (when it's static), so only the routes sharing the request's first segment are tried,
+    along with any routes which start with a parameter.
+
+    Requests which aren't for a custom URL (e.g. ModelAdmin pages) therefore only pay for a dict miss and a bucket lookup
+    before falling through to the normal admin URLs, no matter how many custom URLs are registered.
+
+    .. NOTE:: Static routes take priority over parameterised routes - if ``user/<str:name>/`` and ``user/me/`` are both
+              registered, ``user/me/`` will always be resolved to the static route.
+
+    :meth:`.CustomAdmin.get_urls` mounts two of these - one holding the static routes ahead of the standard admin URLs,
+    and one after them, holding the parameterised routes (which could otherwise capture admin pages, e.g.
+    ``<str:username>/`` matching ``login/``) plus any static routes which collide with an admin page.
+    """
+
+    def __init__(self, url_patterns: Iterable[URLPattern]):
+        url_patterns = list(url_patterns)
+        super().__init__(RoutePattern(''), url_patterns)
+        self.static_routes: Dict[str, URLPattern] = {}
+        """Maps static routes (e.g. ``hello/``) to their :class:`.URLPattern`"""
+        self.wild_patterns: List[URLPattern] = []
+        """Parameterised patterns which can't be bucketed by their first segment, e.g. ``<int:id>/``"""
+        self.segment_patterns: Dict[str, List[URLPattern]] = {}
+        """Parameterised patterns bucketed by their static first path segment, merged (in order) with :attr:`.wild_patterns`"""
+
+        buckets: Dict[str, List[tuple]] = {}
+        wild = []
+        for i, p in enumerate(url_patterns):
+            route = getattr(p.pattern, '_route', None) if isinstance(p.pattern, RoutePattern) else None
+            if route is None:
+                wild.append((i, p))
+            elif '<' not in route:
+                # The first registered pattern wins, as it would with in-order resolution
+                self.static_routes.setdefault(route, p)
+            else:
+                segment = route.split('/', 1)[0]
+                if '<' in segment:
+                    wild.append((i, p))
+                else:
+                    buckets.setdefault(segment, []).append((i, p))
+        self.wild_patterns = [p for _, p in wild]
+        self.segment_patterns = {
+            segment: [p for _, p in sorted(pats + wild, key=lambda x: x[0])] for segment, pats in buckets.items()
+        }
+
+    @staticmethod
+    def is_static(pattern: URLPattern) -> bool:
+        """``True`` if ``pattern`` is a route without any parameters, e.g. ``hello/``"""
+        route = getattr(pattern.pattern, '_route', None) if isinstance(pattern.pattern, RoutePattern) else None
+        return route is not None and '<' not in route
+
+    def resolve(self, path):
+        path = str(path)
+        static = self.static_routes.get(path)
+        if static is not None:
+            match = static.resolve(path)
+            if match:
+                return match
+        tried = []
+        # As this resolver has no prefix, namespace or default kwargs, a sub-pattern's match can be returned as-is.
+        for pattern in self.segment_patterns.get(path.split('/', 1)[0], self.wild_patterns):
+            match = pattern.resolve(path)
+            if match:
+                return match
+            tried.append([pattern])
+        raise Resolver404({'tried': tried, 'path': path})
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({len(self.url_patterns)} custom URLs)>"
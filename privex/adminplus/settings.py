@@ -18,7 +18,15 @@ _lh = LogHelper('adminplus', formatter=LOG_FORMATTER, handler_level=LOG_LEVEL)
 
 _lh.add_console_handler()
 
-INSTALLED_APPS = ['django_nose', 'adminplus']
+INSTALLED_APPS = [
+    'django_nose',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'privex.adminplus.apps.PrivexAdminPlusConfig',
+    'privex.adminplus.apps.PVXAdmin',
+]
 
 DATABASES = {}
 
@@ -0,0 +1,190 @@
+"""
+Helpers for streaming large exports from custom admin views as NDJSON or CSV.
+
+Rows (from a :class:`.QuerySet`, generator, or any other iterable) are encoded and sent to the client as they're fetched,
+using :class:`django.http.StreamingHttpResponse` - so memory use stays flat, and the first bytes are sent straight away,
+no matter how many rows are exported.
+
+The easiest way to use them is the ``stream`` option of :func:`.register_url` / :meth:`.CustomAdmin.add_url`, where the
+view simply returns the rows to export::
+
+    >>> @register_url('comments.csv', stream='csv')
+    >>> def export_comments(request):
+    ...     return Comment.objects.values('id', 'title', 'user__username')
+
+"""
+import csv
+from functools import wraps
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional, Sequence, Union
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model, QuerySet
+from django.forms.models import model_to_dict
+from django.http import StreamingHttpResponse
+from django.http.response import HttpResponseBase
+
+from privex.adminplus.views import iscoroutinefunction
+
+STREAM_CHUNK_SIZE = 2000
+"""Default number of rows fetched per database round trip when streaming a :class:`.QuerySet` (``QuerySet.iterator(chunk_size)``)"""
+
+STREAM_BUFFER_SIZE = 64 * 1024
+"""After the first row, encoded rows are buffered into chunks of (roughly) this many characters before being sent"""
+
+STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+"""Supported stream formats, mapped to their content type"""
+
+
+def _row_dict(row) -> Any:
+    return model_to_dict(row) if isinstance(row, Model) else row
+
+
+class _Echo:
+    """A pseudo file for :func:`csv.writer`, which returns each written line instead of storing it"""
+    def write(self, value: str) -> str:
+        return value
+
+
+class _NDJSONEncoder:
+    def __init__(self, json_encoder=DjangoJSONEncoder):
+        # json.dumps(cls=...) would construct a new encoder for every row
+        self.encode = json_encoder().encode
+
+    def start(self) -> str:
+        return ''
+
+    def __call__(self, row) -> str:
+        return self.encode(_row_dict(row)) + '\n'
+
+
+class _CSVEncoder:
+    def __init__(self, fields: Sequence[str] = None, header: bool = True):
+        self.fields = None if fields is None else list(fields)
+        self.header = header
+        self.writer = csv.writer(_Echo())
+
+    def start(self) -> str:
+        # If the fields are known up-front, the header is sent even if there are no rows
+        if self.header and self.fields is not None:
+            self.header = False
+            return self.writer.writerow(self.fields)
+        return ''
+
+    def __call__(self, row) -> str:
+        row = _row_dict(row)
+        if isinstance(row, dict):
+            if self.fields is None:
+                self.fields = list(row.keys())
+            row = [row.get(f) for f in self.fields]
+        return self.start() + self.writer.writerow(row)
+
+
+def _iter_rows(rows: Iterable, chunk_size: int) -> Iterator:
+    return rows.iterator(chunk_size=chunk_size) if isinstance(rows, QuerySet) else iter(rows)
+
+
+async def _aiter_rows(rows: Iterable, chunk_size: int) -> AsyncIterator:
+    if isinstance(rows, QuerySet):
+        async for row in rows.aiterator(chunk_size=chunk_size):
+            yield row
+    elif hasattr(rows, '__aiter__'):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+def _encode(rows: Iterable, encoder, chunk_size: int) -> Iterator[bytes]:
+    buf, size = [encoder.start()], 0
+    for i, row in enumerate(_iter_rows(rows, chunk_size)):
+        line = encoder(row)
+        buf.append(line)
+        size += len(line)
+        # The first row is sent on it's own, so the client gets the first byte without waiting for a full buffer
+        if i == 0 or size >= STREAM_BUFFER_SIZE:
+            yield ''.join(buf).encode('utf-8')
+            buf, size = [], 0
+    if len(buf) > 0:
+        yield ''.join(buf).encode('utf-8')
+
+
+async def _aencode(rows: Iterable, encoder, chunk_size: int) -> AsyncIterator[bytes]:
+    buf, size, i = [encoder.start()], 0, 0
+    async for row in _aiter_rows(rows, chunk_size):
+        line = encoder(row)
+        buf.append(line)
+        size += len(line)
+        if i == 0 or size >= STREAM_BUFFER_SIZE:
+            yield ''.join(buf).encode('utf-8')
+            buf, size = [], 0
+        i += 1
+    if len(buf) > 0:
+        yield ''.join(buf).encode('utf-8')
+
+
+def stream_response(rows: Union[Iterable, QuerySet], format: str = 'ndjson', filename: Optional[str] = None,
+                    chunk_size: int = STREAM_CHUNK_SIZE, fields: Sequence[str] = None, header: bool = True,
+                    json_encoder=DjangoJSONEncoder, is_async: bool = False) -> StreamingHttpResponse:
+    """
+    Stream ``rows`` to the client as NDJSON (one JSON document per line) or CSV::
+
+        >>> def export_posts(request):
+        ...     return stream_response(Post.objects.values('id', 'title'), 'csv', filename='posts.csv')
+
+    Querysets are read with ``QuerySet.iterator(chunk_size=chunk_size)`` (or ``aiterator`` when ``is_async``), so rows
+    are fetched from the database in chunks rather than all at once, and aren't cached on the queryset.
+
+    :param rows: A :class:`.QuerySet`, generator, or other iterable of rows - dicts (e.g. from ``.values()``), model instances
+                 (converted with :func:`django.forms.models.model_to_dict`), or for CSV, lists/tuples of column values
+    :param str format: Either ``'ndjson'`` or ``'csv'``
+    :param str filename: If specified, the response is sent as an attachment with this filename
+    :param int chunk_size: The number of rows to fetch per database round trip when ``rows`` is a :class:`.QuerySet`
+    :param fields: (CSV only) The columns to output, and their order - defaults to the keys of the first dict row
+    :param bool header: (CSV only) (Default: ``True``) Whether to output a header row with the field names
+    :param json_encoder: (NDJSON only) The :class:`json.JSONEncoder` class used to encode each row
+    :param bool is_async: ``True`` if the response will be served by an async view - an async iterator is used, so that
+                          Django doesn't need to consume the rows in a thread (or all at once) under ASGI.
+                          ``rows`` may then also be an async iterable.
+    :raises ValueError: When ``format`` isn't a supported format (see :attr:`.STREAM_FORMATS`)
+    """
+    if format not in STREAM_FORMATS:
+        raise ValueError(f"Unsupported stream format '{format}' - expected one of: {', '.join(STREAM_FORMATS)}")
+    encoder = _CSVEncoder(fields, header) if format == 'csv' else _NDJSONEncoder(json_encoder)
+    content = _aencode(rows, encoder, chunk_size) if is_async else _encode(rows, encoder, chunk_size)
+    res = StreamingHttpResponse(content, content_type=STREAM_FORMATS[format])
+    if filename is not None:
+        res['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return res
+
+
+def streaming_view(view: callable, format: str = 'ndjson', **options) -> callable:
+    """
+    Wrap ``view`` - a view which returns rows to export, instead of a response - so that the rows are streamed with
+    :func:`.stream_response`. If the view returns a response (e.g. a redirect or error), it's passed through unchanged.
+
+    Used by the ``stream`` option of :meth:`.CustomAdmin.add_url`. Async views are streamed with an async iterator.
+
+    :param callable view: The view to wrap
+    :param str format: Either ``'ndjson'`` or ``'csv'``
+    :param options: Keyword arguments to pass to :func:`.stream_response`, e.g. ``filename`` / ``fields``
+    """
+    if format not in STREAM_FORMATS:
+        raise ValueError(f"Unsupported stream format '{format}' - expected one of: {', '.join(STREAM_FORMATS)}")
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def _aview(request, *args, **kwargs):
+            rows = await view(request, *args, **kwargs)
+            if isinstance(rows, HttpResponseBase):
+                return rows
+            return stream_response(rows, format, is_async=True, **options)
+        return _aview
+
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        rows = view(request, *args, **kwargs)
+        if isinstance(rows, HttpResponseBase):
+            return rows
+        return stream_response(rows, format, **options)
+    return _view
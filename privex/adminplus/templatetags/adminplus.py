@@ -0,0 +1,55 @@
+"""
+Template tags for rendering Privex AdminPlus components within admin templates.
+
+Load them with ``{% load adminplus %}``
+"""
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+from privex.helpers import is_true
+
+register = template.Library()
+
+PAGES_BOX_TEMPLATE = 'admin/custom_pages_box.html'
+
+
+@register.simple_tag(takes_context=True)
+def custom_pages_box(context):
+    """
+    Render ``admin/custom_pages_box.html`` (the "Custom Pages" list) using Django's cache framework.
+    
+    The rendered box only depends on which custom pages the user can see (and the language), so it's cached under a key
+    made from the language and the digest of :meth:`.CustomAdmin.get_visible_urls` - i.e. it's shared between every user
+    with the same visible pages, between requests, and between worker processes using a shared cache backend. A digest
+    is used rather than :attr:`.CustomAdmin.generation`, since generations aren't comparable between processes.
+    
+    Within a request, the rendered box is also kept on the request, as it's included by both ``admin/index.html``
+    and ``admin/nav_sidebar.html``.
+    
+    Settings:
+    
+      * ``ADMINPLUS_PAGES_BOX_CACHE`` - (default: ``True``) set to ``False`` to render the box on every include
+      * ``ADMINPLUS_PAGES_BOX_TIMEOUT`` - (default: ``300``) seconds to cache rendered boxes for
+      * ``ADMINPLUS_CACHE`` - (default: ``'default'``) the ``CACHES`` alias to use
+    
+    """
+    tpl = context.template.engine.get_template(PAGES_BOX_TEMPLATE)
+    request, pages = context.get('request'), context.get('custom_pages')
+    if request is None or pages is None or not is_true(getattr(settings, 'ADMINPLUS_PAGES_BOX_CACHE', True)):
+        return tpl.render(context)
+    
+    key = f"adminplus:pages_box:{get_language()}:{pages.digest}"
+    rendered = getattr(request, '_adminplus_pages_box', None)
+    if rendered is None:
+        rendered = request._adminplus_pages_box = {}
+    html = rendered.get(key)
+    if html is None:
+        cache = caches[getattr(settings, 'ADMINPLUS_CACHE', 'default')]
+        html = cache.get(key)
+        if html is None:
+            html = tpl.render(context)
+            cache.set(key, str(html), getattr(settings, 'ADMINPLUS_PAGES_BOX_TIMEOUT', 300))
+        rendered[key] = html
+    return mark_safe(html)
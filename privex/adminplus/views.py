@@ -0,0 +1,231 @@
+"""
+View wrappers used by :class:`privex.adminplus.admin.CustomAdmin` when registering custom admin views.
+"""
+import threading
+from functools import wraps
+from inspect import isclass
+from typing import Iterable, Optional
+
+import django
+from django.core.exceptions import PermissionDenied
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+from django.views.decorators.http import condition
+from privex.helpers import camel_to_snake, human_name
+import logging
+
+try:
+    from asgiref.sync import async_to_sync, sync_to_async
+except ImportError:  # Django < 3.0 doesn't depend on asgiref
+    async_to_sync = sync_to_async = None
+try:
+    from asgiref.sync import iscoroutinefunction
+except ImportError:  # asgiref < 3.6 can't detect class-based views marked with markcoroutinefunction
+    from inspect import iscoroutinefunction
+
+log = logging.getLogger(__name__)
+
+ASYNC_VIEWS = django.VERSION >= (5, 0)
+"""
+``True`` if async custom views can stay async end to end - Django 5.0+ is required, as that's when the decorators used by
+:meth:`django.contrib.admin.AdminSite.admin_view` (``never_cache`` / ``csrf_protect``) gained async support.
+"""
+
+
+async def aget_user(request):
+    """
+    Resolve ``request.user`` without blocking the event loop (via ``request.auser()`` when the auth middleware provides it),
+    replacing the lazy ``request.user`` with the loaded user - so that later sync code reading ``request.user`` (e.g.
+    ``has_permission`` or the view itself) doesn't need to query the database from the event loop.
+    """
+    if hasattr(request, 'auser'):
+        request.user = await request.auser()
+    return getattr(request, 'user', None)
+
+
+async def ahas_perms(user, permissions: Iterable[str]) -> bool:
+    """Async version of ``user.has_perms(permissions)`` - uses ``user.ahas_perms`` on Django 5.2+"""
+    if hasattr(user, 'ahas_perms'):
+        return await user.ahas_perms(permissions)
+    return await sync_to_async(user.has_perms)(permissions)
+
+
+class LazyView:
+    """
+    A stand-in for a view which is referenced by it's dotted path, e.g. ``'reports.views.big_report'``.
+
+    The view's module isn't imported until the view is first dispatched, and class-based views only have ``.as_view()``
+    called on first use. This keeps heavy view modules (and their dependencies) out of worker start-up, and out of
+    memory for workers which never serve those pages.
+
+    You generally don't need to create these yourself - passing a dotted path string as the view to
+    :meth:`.CustomAdmin.add_url` will wrap it in a :class:`.LazyView`::
+
+        >>> ctadmin.add_url('reports.views.big_report', 'big-report/')
+        >>> ctadmin.add_url('reports.views.SalesReport', 'sales-report/', human='Sales Report')
+
+    Since the view isn't imported during registration, attributes such as ``pvx_name`` / ``pvx_human_name`` on the real view
+    can't be detected - the URL name and human name are generated from the last segment of the dotted path instead.
+
+    Attributes which Django reads from the view *before* dispatching it (e.g. ``csrf_exempt``) must be passed as keyword
+    arguments, as they'd otherwise only exist on the real view::
+
+        >>> ctadmin.add_url(LazyView('reports.views.webhook', csrf_exempt=True), 'webhook/')
+    
+    Likewise, whether the view is async can't be detected without importing it - pass ``is_async=True`` for async views,
+    so they're dispatched natively under ASGI (see :meth:`.as_async`)::
+    
+        >>> ctadmin.add_url('reports.views.live_dashboard', 'dashboard/', is_async=True)
+    """
+
+    def __init__(self, view_path: str, initkwargs: Optional[dict] = None, is_async: bool = False, **attrs):
+        """
+        :param str view_path: The dotted path to a function view or class-based view, e.g. ``'reports.views.big_report'``
+        :param dict initkwargs: Keyword arguments to pass to ``.as_view()`` if the view turns out to be a class-based view
+        :param bool is_async: ``True`` if the view is an ``async def`` view, or an async class-based view
+        :param attrs: Extra attributes to set on this view wrapper, e.g. ``csrf_exempt=True``
+        """
+        self.view_path = view_path
+        self.is_async = is_async
+        self.initkwargs = {} if initkwargs is None else dict(initkwargs)
+        self._attrs = attrs
+        self._view = None
+        self._lock = threading.Lock()
+        # Django uses __module__ / __qualname__ for ResolverMatch._func_path and URLPattern.lookup_str - so we
+        # mirror the dotted path of the real view, without having to import it.
+        self.__module__, _, self.__name__ = view_path.rpartition('.')
+        self.__qualname__ = self.__name__
+        for k, v in attrs.items():
+            setattr(self, k, v)
+
+    @property
+    def pvx_name(self) -> str:
+        return camel_to_snake(self.__name__)
+
+    @property
+    def pvx_human_name(self) -> str:
+        return human_name(self.__name__)
+
+    @property
+    def is_loaded(self) -> bool:
+        """``True`` if the real view has already been imported"""
+        return self._view is not None
+
+    @property
+    def view(self) -> callable:
+        """Import the real view on first access (calling ``.as_view()`` for class-based views), and return it"""
+        if self._view is None:
+            with self._lock:
+                if self._view is None:
+                    log.debug("Importing lazy view '%s' on first use", self.view_path)
+                    v = import_string(self.view_path)
+                    self._view = v.as_view(**self.initkwargs) if isclass(v) else v
+        return self._view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+    
+    def as_async(self) -> callable:
+        """
+        Returns an ``async def`` function which dispatches to this lazy view. Django only treats real coroutine functions
+        as async views, so this is what's registered for a :class:`.LazyView` created with ``is_async=True``.
+        """
+        lazy = self
+        
+        async def _view(request, *args, **kwargs):
+            return await lazy.view(request, *args, **kwargs)
+        
+        _view.__module__, _view.__name__, _view.__qualname__ = self.__module__, self.__name__, self.__qualname__
+        _view.__dict__.update(self._attrs)
+        _view.lazy_view = self
+        return _view
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} '{self.view_path}' loaded={self.is_loaded}>"
+
+
+def require_permissions(view: callable, permissions: Iterable[str]) -> callable:
+    """
+    Wrap ``view`` so that it raises :class:`.PermissionDenied` (HTTP 403) unless the requesting user has every permission
+    in ``permissions`` (e.g. ``['app.view_post', 'app.change_post']``).
+    
+    This only checks the permissions - :meth:`.CustomAdmin.add_url` also wraps the result with
+    :meth:`django.contrib.admin.AdminSite.admin_view`, which handles the staff login check.
+    
+    Async views get an async wrapper, which checks the permissions without blocking the event loop.
+    """
+    permissions = tuple(permissions)
+    
+    if ASYNC_VIEWS and iscoroutinefunction(view):
+        @wraps(view)
+        async def _aview(request, *args, **kwargs):
+            if not await ahas_perms(await aget_user(request), permissions):
+                raise PermissionDenied
+            return await view(request, *args, **kwargs)
+        
+        _aview.pvx_permissions = permissions
+        return _aview
+    
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        if not request.user.has_perms(permissions):
+            raise PermissionDenied
+        return view(request, *args, **kwargs)
+    
+    _view.pvx_permissions = permissions
+    return _view
+
+
+async def _acall(func: Optional[callable], *args, **kwargs):
+    if func is None:
+        return None
+    if iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await sync_to_async(func)(*args, **kwargs)
+
+
+def conditional_view(view: callable, etag: Optional[callable] = None, last_modified: Optional[callable] = None) -> callable:
+    """
+    Wrap ``view`` with :func:`django.views.decorators.http.condition`, so that the cheap freshness functions ``etag`` /
+    ``last_modified`` are evaluated before the view runs, and HTTP 304 (Not Modified) is returned when the client's copy
+    is still fresh - skipping the view's queries and the response body entirely.
+    
+    Responses are marked ``Cache-Control: private, no-cache``, so browsers keep their copy, but revalidate it on every use.
+    
+    The freshness functions receive the same arguments as the view. For async views, they may be ``async def`` functions -
+    sync functions are ran with ``sync_to_async``, so they can query the database.
+    
+    :param callable view: The view to wrap
+    :param callable etag: Returns the ETag for the request (e.g. a hash or version number), or ``None``
+    :param callable last_modified: Returns a :class:`datetime.datetime` of when the requested content last changed, or ``None``
+    """
+    if etag is None and last_modified is None:
+        return view
+    
+    def _finish(response):
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
+    if iscoroutinefunction(view):
+        if not ASYNC_VIEWS:
+            # condition() can only wrap sync views before Django 5.0
+            view = async_to_sync(view)
+        else:
+            @wraps(view)
+            async def _aview(request, *args, **kwargs):
+                # condition() calls the freshness functions synchronously - so they're evaluated up-front, off the event loop
+                tag = await _acall(etag, request, *args, **kwargs)
+                modified = await _acall(last_modified, request, *args, **kwargs)
+                cond = condition(
+                    etag_func=None if etag is None else lambda *a, **k: tag,
+                    last_modified_func=None if last_modified is None else lambda *a, **k: modified,
+                )
+                return _finish(await cond(view)(request, *args, **kwargs))
+            return _aview
+    
+    conditional = condition(etag_func=etag, last_modified_func=last_modified)(view)
+    
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        return _finish(conditional(request, *args, **kwargs))
+    return _view
@@ -1,14 +1,795 @@
+import inspect
+import json
 import os
+from types import ModuleType
 from datetime import timedelta
-from django.test import TestCase
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
 from django.utils import timezone
+from django.views import View
+
+from django.urls import Resolver404, path, set_script_prefix
+from unittest import mock
+from privex.adminplus.admin import CustomAdmin, clear_view_cache, ctadmin, pvx_context_processor, register_url
+from privex.adminplus.resolvers import CustomURLResolver
+from privex.adminplus.views import LazyView
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "privex.adminplus.settings")
 
 
-class TestAdminPlus(TestCase):
+def example_view(request):
     pass
 
 
+class ExampleClassView(View):
+    def get(self, request):
+        return HttpResponse(b"lazy class view")
+
+
+async def example_async_view(request):
+    return HttpResponse(b"async view")
+
+
+class ExampleAsyncClassView(View):
+    async def get(self, request):
+        return HttpResponse(b"async class view")
+
+
+def mount(site: CustomAdmin, prefix='admin/'):
+    """Use a URLconf with ``site`` mounted at ``prefix`` for the duration of a ``with`` block / decorated test"""
+    urlconf = ModuleType('test_urls')
+    urlconf.urlpatterns = [path(prefix, site.urls)]
+    return override_settings(ROOT_URLCONF=urlconf)
+
+
+class TestAdminPlus(TestCase):
+    def test_url_is_registered(self):
+        site = CustomAdmin('test_admin')
+        self.assertFalse(site.url_is_registered('example/'))
+        site.add_url(example_view, 'example/')
+        self.assertTrue(site.url_is_registered('example/'))
+        with self.assertRaises(FileExistsError):
+            site.url_is_registered('example/', fail=True)
+    
+    def test_duplicate_url_not_registered(self):
+        site = CustomAdmin('test_admin')
+        site.add_url(example_view, 'example/')
+        site.add_url(example_view, ['example/', 'example/<int:id>/'])
+        self.assertEqual(len(site.custom_urls), 2)
+        self.assertEqual(list(site.custom_url_map.keys()), ['example/', 'example/<int:id>/'])
+    
+    def test_get_url_by_name(self):
+        site = CustomAdmin('test_admin')
+        site.add_url(example_view, {'ex/': 'ex_index', 'ex/<str:username>/': 'ex_by_username'})
+        self.assertTrue(site.name_is_registered('ex_by_username'))
+        self.assertEqual(site.get_url_by_name('ex_index').route, 'ex/')
+        self.assertTrue(site.get_url_by_name('ex_by_username').hidden)
+        self.assertIsNone(site.get_url_by_name('nonexistent'))
+    
+    def test_add_urls_batch(self):
+        site = CustomAdmin('test_admin')
+        site.add_urls([
+            dict(view=example_view, url='one/', human='First'),
+            (example_view, 'two/', dict(name='two')),
+            (example_view, {'three/': 'three', 'three/<int:id>/': 'three_by_id'}),
+        ])
+        self.assertEqual([e.route for e in site.custom_url_map.values()], ['one/', 'two/', 'three/', 'three/<int:id>/'])
+        self.assertEqual(site.custom_url_map['one/'].human, 'First')
+        self.assertTrue(site.name_is_registered('three_by_id'))
+    
+    def test_add_urls_reports_all_conflicts(self):
+        site = CustomAdmin('test_admin')
+        site.add_url(example_view, 'one/')
+        with self.assertRaises(FileExistsError) as e:
+            site.add_urls([(example_view, 'one/', dict(name='a')), (example_view, 'two/', dict(name='b')),
+                           (example_view, 'two/', dict(name='c'))], fail=True)
+        self.assertIn("'one/' is already registered", str(e.exception))
+        self.assertIn("'two/' is specified more than once", str(e.exception))
+        # Nothing should be registered when fail=True and there are conflicts
+        self.assertEqual(len(site.custom_urls), 1)
+        site.add_urls([(example_view, 'one/', dict(name='a')), (example_view, 'two/', dict(name='b'))])
+        self.assertEqual(list(site.custom_url_map.keys()), ['one/', 'two/'])
+    
+    def test_lazy_dotted_path_view(self):
+        site = CustomAdmin('test_admin')
+        site.add_url('tests.ExampleClassView', 'lazy/')
+        entry = site.custom_url_map['lazy/']
+        self.assertEqual(entry.name, 'example_class_view')
+        self.assertEqual(entry.human, 'Example Class View')
+        # Unwrap the metrics wrapper (see privex.adminplus.metrics)
+        view = inspect.unwrap(site.custom_urls[0].callback)
+        self.assertIsInstance(view, LazyView)
+        self.assertFalse(view.is_loaded)
+        res = view(RequestFactory().get('/lazy/'))
+        self.assertTrue(view.is_loaded)
+        self.assertEqual(res.content, b"lazy class view")
+    
+    def test_custom_url_resolver(self):
+        resolver = CustomURLResolver([
+            path('user/<str:username>/', example_view, name='user_by_name'),
+            path('user/me/', example_view, name='user_me'),
+            path('<int:id>/report/', example_view, name='report'),
+            path('hello/', example_view, name='hello'),
+        ])
+        self.assertEqual(resolver.resolve('hello/').url_name, 'hello')
+        self.assertEqual(resolver.resolve('user/me/').url_name, 'user_me')
+        self.assertEqual(resolver.resolve('user/john/').kwargs, dict(username='john'))
+        self.assertEqual(resolver.resolve('5/report/').url_name, 'report')
+        with self.assertRaises(Resolver404):
+            resolver.resolve('app/post/')
+    
+    def test_param_routes_dont_shadow_admin(self):
+        from django.contrib.auth.models import User
+        from django.urls import resolve
+        site = CustomAdmin('test_admin')
+        site.register(User)
+        site.add_url(example_view, '<str:username>/', name='profile')
+        site.add_url(example_view, 'hello/', name='hello')
+        with mount(site):
+            self.assertEqual(resolve('/admin/login/').url_name, 'login')
+            self.assertEqual(resolve('/admin/logout/').url_name, 'logout')
+            self.assertEqual(resolve('/admin/auth/').url_name, 'app_list')
+            self.assertEqual(resolve('/admin/hello/').url_name, 'hello')
+            self.assertEqual(resolve('/admin/john/').kwargs, dict(username='john'))
+    
+    def test_static_routes_dont_replace_admin(self):
+        from django.contrib import admin
+        from django.contrib.auth.models import User
+        from django.urls import resolve
+        site = CustomAdmin('test_admin')
+        site.register(User)
+        site.add_url(example_view, {'login/': 'my_login', 'auth/': 'my_auth', 'auth/user/': 'my_users', 'auth/report/': 'report'})
+        with mount(site), self.assertLogs('privex.adminplus.admin', 'WARNING') as logs:
+            admin_urls = admin.AdminSite.get_urls(site)
+            if getattr(site, 'final_catch_all_view', False):
+                admin_urls = admin_urls[:-1]
+            front, back = site.split_custom_urls(site.custom_urls, admin_urls)
+            self.assertEqual(resolve('/admin/login/').url_name, 'login')
+            self.assertEqual(resolve('/admin/auth/').url_name, 'app_list')
+            self.assertEqual(resolve('/admin/auth/user/').url_name, 'auth_user_changelist')
+            self.assertEqual(resolve('/admin/auth/report/').url_name, 'report')
+        self.assertEqual([p.name for p in front], ['report'])
+        self.assertEqual([p.name for p in back], ['my_login', 'my_auth', 'my_users'])
+        self.assertIn("Custom URL login/ on admin site 'test_admin' collides with an admin page", logs.output[0])
+    
+    def test_get_urls_cached_per_generation(self):
+        from django.contrib.auth.models import Group
+        site = CustomAdmin('test_admin')
+        site.add_url(example_view, 'one/')
+        urls = site.get_urls()
+        self.assertIs(site.get_urls()[0], urls[0])
+        gen = site.generation
+        site.add_url(example_view, 'two/')
+        self.assertNotEqual(site.generation, gen)
+        self.assertIsNot(site.get_urls()[0], urls[0])
+        self.assertEqual(len(site.get_urls()[0].url_patterns), 2)
+        # Registering a model must invalidate the cached URLs too
+        gen = site.generation
+        site.register(Group)
+        self.assertNotEqual(site.generation, gen)
+        self.assertTrue(any('auth/group/' in str(u.pattern) for u in site.get_urls()))
+        urls = site.get_urls()
+        site.invalidate()
+        self.assertIsNot(site.get_urls()[0], urls[0])
+    
+    def test_custom_urls_reverse_table(self):
+        from django.contrib.auth.models import AnonymousUser
+        site = CustomAdmin('test_admin')
+        site.add_url(example_view, {'one/': 'one', 'one/<int:id>/': 'one_by_id'})
+        with mount(site):
+            table = site.custom_urls_reverse
+            self.assertEqual(table['one/'].url, '/admin/one/')
+            self.assertNotIn('url', table['one/<int:id>/'])
+            self.assertNotIn('url', site.custom_url_map['one/'])
+            with self.assertRaises(TypeError):
+                table['two/'] = None
+            # The same table is returned until the registry or script prefix changes
+            self.assertIs(site.custom_urls_reverse, table)
+            set_script_prefix('/sub/')
+            try:
+                self.assertEqual(site.custom_urls_reverse['one/'].url, '/sub/admin/one/')
+            finally:
+                set_script_prefix('/')
+            self.assertIs(site.custom_urls_reverse, table)
+        site.add_url(example_view, 'two/')
+        with mount(site):
+            self.assertIsNot(site.custom_urls_reverse, table)
+            self.assertEqual(site.custom_urls_reverse['two/'].url, '/admin/two/')
+        # ... or the URLconf changes (e.g. request.urlconf, or another ROOT_URLCONF)
+        with mount(site, 'staff/'):
+            self.assertEqual(site.custom_urls_reverse['two/'].url, '/staff/two/')
+            self.assertEqual(site.admin_root, '/staff/')
+            self.assertEqual([o.url for o in site.get_visible_urls(self._request(AnonymousUser()))], ['/staff/one/', '/staff/two/'])
+    
+    def test_context_processor_lazy(self):
+        with mount(ctadmin), mock.patch.object(CustomAdmin, '_build_reverse_table', return_value={}) as build:
+            ctadmin.invalidate()
+            ctx = pvx_context_processor(RequestFactory().get('/admin/'))
+            build.assert_not_called()
+            self.assertEqual(dict(ctx['custom_urls'].items()), {})
+            build.assert_called_once()
+    
+    def test_context_processor_admin_only(self):
+        rf = RequestFactory()
+        with mount(ctadmin), self.settings(ADMINPLUS_CONTEXT_ADMIN_ONLY=True):
+            self.assertEqual(pvx_context_processor(rf.get('/public/page/')), {})
+            self.assertIn('custom_urls', pvx_context_processor(rf.get('/admin/')))
+        self.assertIn('custom_urls', pvx_context_processor(rf.get('/public/page/')))
+    
+    def _user(self, username, perms=(), **kwargs):
+        from django.contrib.auth.models import Permission, User
+        u = User.objects.create_user(username, is_staff=True, **kwargs)
+        for p in perms:
+            app_label, codename = p.split('.')
+            u.user_permissions.add(Permission.objects.get(content_type__app_label=app_label, codename=codename))
+        return User.objects.get(pk=u.pk)
+    
+    def _request(self, user, url='/admin/'):
+        req = RequestFactory().get(url)
+        req.user = user
+        return req
+    
+    def test_permission_view(self):
+        from django.contrib.auth.models import AnonymousUser
+        site = CustomAdmin('test_admin')
+        site.add_url(ExampleClassView, 'secret/', permissions=['auth.view_user'])
+        self.assertEqual(site.custom_url_map['secret/'].permissions, ('auth.view_user',))
+        with mount(site):
+            view = site.custom_urls[0].callback
+            self.assertEqual(view(self._request(AnonymousUser(), '/admin/secret/')).status_code, 302)
+            with self.assertRaises(PermissionDenied):
+                view(self._request(self._user('nope'), '/admin/secret/'))
+            res = view(self._request(self._user('yep', ['auth.view_user']), '/admin/secret/'))
+            self.assertEqual(res.content, b"lazy class view")
+    
+    def test_visible_urls(self):
+        site = CustomAdmin('test_admin')
+        site.add_url(example_view, 'public/', name='public')
+        site.add_url(example_view, 'secret/', name='secret', permissions=['auth.view_user'])
+        site.add_url(example_view, 'hidden/', name='hidden', hidden=True)
+        nope, yep = self._user('nope'), self._user('yep', ['auth.view_user'])
+        boss = self._user('boss', is_superuser=True)
+        with mount(site):
+            visible = site.get_visible_urls(self._request(nope))
+            self.assertEqual([o.route for o in visible], ['public/'])
+            self.assertEqual([o.url for o in site.get_visible_urls(self._request(yep))], ['/admin/public/', '/admin/secret/'])
+            self.assertEqual(len(site.get_visible_urls(self._request(boss))), 2)
+            # Users with the same permission signature share the cached list
+            self.assertIs(site.get_visible_urls(self._request(self._user('nope2'))), visible)
+    
+    def test_custom_pages_box_cached(self):
+        from django.core.cache import cache
+        from django.template import Context, Template
+        site = CustomAdmin('test_admin')
+        site.add_url(example_view, 'public/', name='public', human='Public Page')
+        with mount(site):
+            req = self._request(self._user('staff'))
+            pages = site.get_visible_urls(req)
+            tpl = Template('{% load adminplus %}{% custom_pages_box %}|{% custom_pages_box %}')
+            html = tpl.render(Context(dict(request=req, custom_pages=pages)))
+            first, second = html.split('|')
+            self.assertIn('<a href="/admin/public/">Public Page</a>', first)
+            self.assertEqual(first, second)
+            self.assertEqual(cache.get(f"adminplus:pages_box:en-us:{pages.digest}"), first)
+            # A different request with the same visible pages is served from the cache
+            req = self._request(self._user('staff2'))
+            uncached = mock.Mock(render=mock.Mock(return_value='uncached'))
+            with mock.patch('django.template.engine.Engine.get_template', return_value=uncached):
+                self.assertEqual(tpl.render(Context(dict(request=req, custom_pages=pages))).split('|')[0], first)
+    
+    def test_app_list_cached(self):
+        from django.contrib import admin
+        from django.contrib.auth.models import Group, User
+        site = CustomAdmin('test_admin')
+        site.register(User)
+        nope, yep = self._user('nope'), self._user('yep', ['auth.view_user'])
+        with mount(site), mock.patch.object(admin.ModelAdmin, 'has_module_permission', autospec=True,
+                                            side_effect=admin.ModelAdmin.has_module_permission) as checked:
+            self.assertEqual(site.get_app_list(self._request(nope)), [])
+            apps = site.get_app_list(self._request(yep))
+            self.assertEqual([m['object_name'] for m in apps[0]['models']], ['User'])
+            apps[0]['models'].clear()
+            self.assertEqual(len(site.get_app_list(self._request(self._user('yep2', ['auth.view_user'])))[0]['models']), 1)
+            self.assertEqual(checked.call_count, 2)
+            # Registering a model invalidates the cached lists
+            site.register(Group)
+            self.assertEqual(len(site.get_app_list(self._request(yep))[0]['models']), 1)
+            self.assertEqual(checked.call_count, 4)
+
+    async def test_async_views(self):
+        from asgiref.sync import iscoroutinefunction, sync_to_async
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import AsyncRequestFactory
+        site = CustomAdmin('test_admin')
+        site.add_url(example_async_view, 'async/', permissions=['auth.view_user'])
+        site.add_url(ExampleAsyncClassView, 'async_class/')
+        site.add_url('tests.example_async_view', 'async_lazy/', name='async_lazy', is_async=True)
+        views = [u.callback for u in site.custom_urls]
+        self.assertTrue(all(iscoroutinefunction(v) for v in views))
+        self.assertEqual((await views[2](AsyncRequestFactory().get('/admin/async_lazy/'))).content, b"async view")
+        
+        nope, yep = await sync_to_async(self._user)('nope'), await sync_to_async(self._user)('yep', ['auth.view_user'])
+        with mount(site):
+            req = AsyncRequestFactory().get('/admin/async/')
+            req.auser = mock.AsyncMock(return_value=AnonymousUser())
+            self.assertEqual((await views[0](req)).status_code, 302)
+            for user, expected in ((nope, PermissionDenied), (yep, b"async view")):
+                req = AsyncRequestFactory().get('/admin/async/')
+                req.auser = mock.AsyncMock(return_value=user)
+                if expected is PermissionDenied:
+                    with self.assertRaises(PermissionDenied):
+                        await views[0](req)
+                    continue
+                self.assertEqual((await views[0](req)).content, expected)
+                # The custom pages list can then be built from the event loop, without querying the database
+                self.assertEqual(req._adminplus_signature, frozenset({'auth.view_user'}))
+                self.assertEqual([o.route for o in site.get_visible_urls(req)], ['async/', 'async_class/', 'async_lazy/'])
+    
+    def test_stream_views(self):
+        from django.contrib.auth.models import User
+        for u in ('alice', 'bob', 'carol'):
+            User.objects.create_user(u)
+        site = CustomAdmin('test_admin')
+        site.add_url(lambda request: User.objects.order_by('username').values('username'), 'users.ndjson',
+                     name='users_ndjson', stream='ndjson')
+        site.add_url(lambda request: ([i, i * 2] for i in range(3)), 'numbers.csv', name='numbers_csv',
+                     stream=dict(format='csv', fields=['n', 'double'], filename='numbers.csv'))
+        req = RequestFactory().get('/')
+        res = site.custom_urls[0].callback(req)
+        chunks = list(res.streaming_content)
+        # The first row is sent on it's own, the rest are buffered
+        self.assertEqual(chunks, [b'{"username": "alice"}\n', b'{"username": "bob"}\n{"username": "carol"}\n'])
+        res = site.custom_urls[1].callback(req)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertEqual(res['Content-Disposition'], 'attachment; filename="numbers.csv"')
+        self.assertEqual(b''.join(res.streaming_content), b'n,double\r\n0,0\r\n1,2\r\n2,4\r\n')
+    
+    async def test_stream_async_view(self):
+        from django.test import AsyncRequestFactory
+        
+        async def rows(request):
+            async def _gen():
+                for i in range(3):
+                    yield dict(n=i)
+            return _gen()
+        
+        site = CustomAdmin('test_admin')
+        site.add_url(rows, 'rows.ndjson', name='rows', stream='ndjson')
+        res = await site.custom_urls[0].callback(AsyncRequestFactory().get('/'))
+        self.assertTrue(res.is_async)
+        self.assertEqual(b''.join([c async for c in res.streaming_content]), b'{"n": 0}\n{"n": 1}\n{"n": 2}\n')
+    
+    def test_background_view(self):
+        import tempfile
+        import time
+        from django.contrib.auth.models import AnonymousUser
+        from django.urls import resolve
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.http import Http404
+        from django.utils.translation import get_language
+        from privex.adminplus.jobs import get_store
+        requests = []
+        
+        def report(request):
+            requests.append(request)
+            body = f"slow report {get_language()} {request.POST['q']} ".encode() + request.FILES['f'].read()
+            return HttpResponse(body, content_type='text/plain')
+        
+        site = CustomAdmin('test_admin')
+        site.add_url(report, 'report/', name='report', human='Slow Report', background=True)
+        view = site.custom_urls[0].callback
+        with mount(site), tempfile.TemporaryDirectory() as tmp, self.settings(ADMINPLUS_JOBS_DIR=tmp):
+            self.assertEqual(view(self._request(AnonymousUser(), '/admin/report/')).status_code, 302)
+            staff = self._user('staff')
+            req = RequestFactory().post('/admin/report/', dict(q='posts', f=SimpleUploadedFile('f.txt', b"uploaded")))
+            req.user, req.LANGUAGE_CODE, req._dont_enforce_csrf_checks = staff, 'de', True
+            res = view(req)
+            # The web server closes the request (and it's uploaded files) once the response is returned
+            req.close()
+            job_id = res['X-Job-ID']
+            self.assertEqual(res.url, f'/admin/adminplus/jobs/{job_id}/')
+            # Job pages live under the reserved adminplus/ prefix, so they can't hide an app labelled 'jobs'
+            try:
+                self.assertNotEqual(resolve(f'/admin/jobs/{job_id}/').url_name, 'adminplus_job_status')
+            except Resolver404:
+                pass
+            status, result = site.job_status_view, site.job_result_view
+            for _ in range(100):
+                job = json.loads(status(self._request(staff, f'/admin/adminplus/jobs/{job_id}/?format=json'), job_id).content)
+                if job['status'] in ('done', 'failed'):
+                    break
+                time.sleep(0.05)
+            self.assertEqual((job['status'], job['view']), ('done', 'Slow Report'))
+            res = result(self._request(staff), job_id)
+            self.assertEqual((res['Content-Type'], b''.join(res.streaming_content)),
+                             ('text/plain', b"slow report de posts uploaded"))
+            res.close()
+            # The job ran with a detached copy of the request
+            self.assertIsNot(requests[0], req)
+            # Only the user who started the job can see it
+            with self.assertRaises(PermissionDenied):
+                status(self._request(self._user('other')), job_id)
+            
+            # Pruning keeps unfinished jobs, and a pruned job's result is a 404 rather than an error
+            store = get_store()
+            queued = store.create(view='Queued', user_id=staff.pk)
+            os.remove(store.result_path(job_id))
+            with self.assertRaises(Http404):
+                result(self._request(staff), job_id)
+            store.prune(-1, interval=0)
+            self.assertIsNone(store.get(job_id))
+            self.assertEqual(store.get(queued.id).status, 'queued')
+    
+    def test_cached_view(self):
+        calls = []
+        
+        def dashboard(request):
+            calls.append(request.user.username)
+            return HttpResponse(f"{len(calls)}".encode())
+        
+        site = CustomAdmin('test_admin')
+        site.add_url(dashboard, 'dashboard/', name='dashboard', cache_timeout=60)
+        self.assertEqual(site.custom_url_map['dashboard/'].cache.group, 'dashboard')
+        view = site.custom_urls[0].callback
+        with mount(site):
+            alice, bob = self._user('alice'), self._user('bob')
+            carol = self._user('carol', perms=['auth.view_user'])
+            self.assertEqual(view(self._request(alice, '/admin/dashboard/')).content, b"1")
+            # Users with the same permissions share cached responses, unlike users with different permissions
+            self.assertEqual(view(self._request(bob, '/admin/dashboard/')).content, b"1")
+            self.assertEqual(view(self._request(carol, '/admin/dashboard/')).content, b"2")
+            self.assertEqual(view(self._request(alice, '/admin/dashboard/?page=2')).content, b"3")
+            self.assertTrue(clear_view_cache('dashboard', site=site))
+            self.assertFalse(site.clear_view_cache('not_registered'))
+            self.assertEqual(view(self._request(bob, '/admin/dashboard/')).content, b"4")
+            self.assertEqual(view(self._request(alice, '/admin/dashboard/')).content, b"4")
+        with self.assertRaises(ValueError):
+            site.add_url(dashboard, 'export/', cache_timeout=60, stream='csv')
+    
+    def test_cached_admin_template(self):
+        from django.conf import settings
+        from django.middleware.csrf import CsrfViewMiddleware, get_token
+        from django.template.response import TemplateResponse
+        calls = []
+        
+        def dashboard(request):
+            calls.append(1)
+            return TemplateResponse(request, 'admin/base_site.html', dict(site.each_context(request), title='Dashboard'))
+        
+        def _cookie():
+            # The CSRF cookie a browser would receive from it's first page
+            req, middleware = RequestFactory().get('/'), CsrfViewMiddleware(lambda r: None)
+            middleware.process_request(req)
+            get_token(req)
+            return middleware.process_response(req, HttpResponse()).cookies[settings.CSRF_COOKIE_NAME].value
+        
+        def _request(user, cookie=None):
+            req = self._request(user, '/admin/dashboard/')
+            if cookie is not None:
+                req.COOKIES[settings.CSRF_COOKIE_NAME] = cookie
+            CsrfViewMiddleware(lambda r: None).process_request(req)
+            return req
+        
+        site = CustomAdmin('test_admin')
+        site.add_url(dashboard, 'dashboard/', name='dashboard', cache_timeout=60)
+        view = site.custom_urls[0].callback
+        with mount(site):
+            alice, bob = self._user('alice'), self._user('bob')
+            cookie_a, cookie_b = _cookie(), _cookie()
+            # admin/base.html always renders the CSRF token, so without a CSRF cookie the page can't be cached
+            self.assertIn(b'csrfmiddlewaretoken', view(_request(alice)).content)
+            view(_request(alice))
+            self.assertEqual(len(calls), 2)
+            # With a CSRF cookie the page is cached for that cookie
+            first = view(_request(alice, cookie_a)).content
+            self.assertEqual(view(_request(alice, cookie_a)).content, first)
+            self.assertEqual(len(calls), 3)
+            # ... but never served to a request with a different (or no) CSRF cookie
+            view(_request(bob, cookie_b))
+            view(_request(bob))
+            self.assertEqual(len(calls), 5)
+            view(_request(bob, cookie_b))
+            self.assertEqual(len(calls), 5)
+    
+    def test_conditional_view(self):
+        calls = []
+        
+        def dashboard(request):
+            calls.append(1)
+            return HttpResponse(b"dashboard")
+        
+        site = CustomAdmin('test_admin')
+        site.add_url(dashboard, 'dashboard/', etag=lambda request: 'v1', permissions=['auth.view_user'])
+        view = site.custom_urls[0].callback
+        with mount(site):
+            user = self._user('staff', perms=['auth.view_user'])
+            res = view(self._request(user, '/admin/dashboard/'))
+            self.assertEqual((res.status_code, res['ETag']), (200, '"v1"'))
+            self.assertNotIn('no-store', res['Cache-Control'])
+            req = self._request(user, '/admin/dashboard/')
+            req.META['HTTP_IF_NONE_MATCH'] = '"v1"'
+            self.assertEqual(view(req).status_code, 304)
+            self.assertEqual(len(calls), 1)
+    
+    def test_conditional_index(self):
+        from django.contrib.auth.models import User
+        from django.urls import resolve
+        site = CustomAdmin('test_admin')
+        site.add_url(example_view, 'hello/')
+        user = User.objects.create_superuser('admin')
+        with mount(site), self.settings(ADMINPLUS_INDEX_CONDITIONAL=True):
+            index = resolve('/admin/').func
+            res = index(self._request(user))
+            self.assertEqual(res.status_code, 200)
+            req = self._request(user)
+            req.META['HTTP_IF_NONE_MATCH'] = res['ETag']
+            self.assertEqual(index(req).status_code, 304)
+            # Registering another custom page changes the index
+            site.add_url(example_view, 'hello_again/')
+            self.assertEqual(index(req).status_code, 200)
+    
+    def test_view_metrics(self):
+        import tempfile
+        from django.contrib.auth.models import AnonymousUser
+        from privex.adminplus import metrics
+        
+        def failing_view(request):
+            return HttpResponse(b"oops", status=500)
+        
+        site = CustomAdmin('test_admin')
+        site.add_urls([(ExampleClassView, 'fine/', dict(name='fine')), (failing_view, 'failing/', dict(name='failing'))])
+        fine, failing = (u.callback for u in site.custom_urls)
+        with mount(site), tempfile.TemporaryDirectory() as tmp, self.settings(ADMINPLUS_METRICS_DIR=tmp), \
+                mock.patch.object(metrics, '_metrics', None):
+            for _ in range(3):
+                fine(self._request(None, '/admin/fine/'))
+            failing(self._request(None, '/admin/failing/'))
+            self.assertEqual(len(os.listdir(tmp)), 1)
+            res = {m.view: m for m in metrics.collect('test_admin')}
+            self.assertEqual((res['fine'].calls, res['fine'].errors, sum(res['fine'].buckets)), (3, 0, 3))
+            self.assertEqual((res['failing'].calls, res['failing'].errors), (1, 1))
+            self.assertEqual(metrics.collect('other_admin'), [])
+            
+            req = self._request(self._user('staff'), '/admin/adminplus/metrics/prometheus/')
+            text = site.prometheus_view(req).content.decode()
+            self.assertIn('adminplus_view_requests_total{site="test_admin",view="fine"} 3', text)
+            self.assertIn('adminplus_view_latency_seconds_bucket{site="test_admin",view="fine",le="+Inf"} 3', text)
+            req = self._request(AnonymousUser(), '/admin/adminplus/metrics/prometheus/')
+            with self.assertRaises(PermissionDenied):
+                site.prometheus_view(req)
+            req.META['HTTP_AUTHORIZATION'] = 'Bearer s3cret'
+            with self.settings(ADMINPLUS_METRICS_TOKEN='s3cret'):
+                self.assertEqual(site.prometheus_view(req).status_code, 200)
+    
+    def test_sql_profiler(self):
+        from django.contrib.auth.models import User
+        from django.urls import resolve
+        from privex.adminplus import profiler
+        
+        def users_view(request):
+            return HttpResponse(','.join(User.objects.get(pk=u.pk).username for u in User.objects.all()).encode())
+        
+        site = CustomAdmin('test_admin')
+        site.add_url(users_view, 'users/', name='users')
+        view = site.custom_urls[0].callback
+        for i in range(5):
+            self._user(f'user{i}')
+        with mount(site), mock.patch.object(profiler, '_profiles', None):
+            view(self._request(None, '/admin/users/'))
+            self.assertEqual(len(profiler.get_profiles()), 0)
+            req = self._request(None, '/admin/users/')
+            req.resolver_match = resolve(req.path)
+            with self.settings(ADMINPLUS_PROFILE_SQL=True):
+                view(req)
+            prof = profiler.get_profiles()[0]
+            self.assertEqual((prof.site, prof.origin, prof.queries, len(prof.n_plus_one)), ('test_admin', 'test_admin:users', 6, 1))
+            suspect = prof.n_plus_one[0]
+            self.assertEqual(suspect.count, 5)
+            self.assertIn('WHERE "auth_user"."id" = %s', suspect.sql)
+            self.assertTrue(suspect.caller.startswith(__file__))
+            res = site.profiler_view(self._request(self._user('staff'), '/admin/adminplus/profiler/')).render()
+            self.assertContains(res, 'test_admin:users')
+    
+    def test_per_site_registries(self):
+        from django.urls import resolve
+        for name in ('test_staff', 'test_ops'):
+            self.addCleanup(CustomAdmin._ct_admins.pop, name, None)
+        staff, ops = CustomAdmin.admin_singleton('test_staff'), CustomAdmin.admin_singleton('test_ops')
+        self.assertEqual((staff.name, ops.name), ('test_staff', 'test_ops'))
+        self.assertIs(CustomAdmin.get_site('test_ops'), ops)
+        register_url('tickets/', site='test_staff')(example_view)
+        register_url('queues/', site=ops)(example_view)
+        self.assertEqual(list(staff.custom_url_map), ['tickets/'])
+        self.assertEqual(list(ops.custom_url_map), ['queues/'])
+        self.assertNotIn('tickets/', ctadmin.custom_url_map)
+        
+        urlconf = ModuleType('test_urls')
+        urlconf.urlpatterns = [path('staff/', staff.urls), path('ops/', ops.urls)]
+        with override_settings(ROOT_URLCONF=urlconf):
+            req = self._request(self._user('staff'), '/ops/queues/')
+            req.resolver_match = resolve(req.path)
+            self.assertIs(CustomAdmin.site_for_request(req), ops)
+            ctx = pvx_context_processor(req)
+            self.assertEqual([o.url for o in ctx['custom_pages']], ['/ops/queues/'])
+            self.assertEqual(resolve('/staff/tickets/').url_name, 'example_view')
+            self.assertNotEqual(resolve('/ops/tickets/').url_name, 'example_view')
+    
+    def test_registry_manifest(self):
+        from django.contrib.auth.admin import UserAdmin
+        from django.contrib.auth.models import User
+        from privex.adminplus.manifest import build_manifest, load_manifest
+        from privex.adminplus.views import LazyView
+        site = CustomAdmin('test_admin')
+        site.register(User, UserAdmin)
+        site.add_urls([
+            (example_view, ['reports/', 'reports/<int:id>/'], dict(permissions=['auth.view_user'], cache_timeout=60)),
+            (ExampleClassView, 'class_view/', dict(human='Class View', hidden=True)),
+            ('tests.example_async_view', 'async_view/', dict(is_async=True)),
+        ])
+        manifest = build_manifest({'test_manifest': site})
+        views = manifest['sites'][0]['views']
+        self.assertEqual(manifest['sites'][0]['models'], [dict(model='auth.User', admin='django.contrib.auth.admin.UserAdmin')])
+        self.assertEqual(views[0]['urls'], {'reports/': 'example_view', 'reports/<int:id>/': 'example_view_2'})
+        self.assertEqual(views[0]['options'], dict(permissions=['auth.view_user'], cache_timeout=60))
+        self.assertEqual([v['view'] for v in views], ['tests.example_view', 'tests.ExampleClassView', 'tests.example_async_view'])
+        self.assertTrue(views[2]['is_async'])
+        
+        # A manifest round-trips to the same registry, with every view registered lazily
+        try:
+            loaded, = load_manifest(json.loads(json.dumps(manifest)))
+            self.assertIs(loaded, CustomAdmin.admin_singleton('test_manifest'))
+            self.assertEqual(dict(loaded.custom_url_map), dict(site.custom_url_map))
+            self.assertIsInstance(inspect.unwrap(loaded.custom_urls[2].callback), LazyView)
+            # ModelAdmins are registered by their dotted path, and aren't imported to rebuild the manifest
+            self.assertFalse(loaded._registry[User].is_imported)
+            self.assertEqual(build_manifest({'test_manifest': loaded})['sites'][0]['models'], manifest['sites'][0]['models'])
+            self.assertFalse(loaded._registry[User].is_imported)
+            # Re-registering the class as it's module is imported just resolves the path
+            loaded.register(User, UserAdmin)
+            self.assertTrue(loaded._registry[User].is_imported)
+            self.assertIsInstance(loaded._registry[User], UserAdmin)
+        finally:
+            CustomAdmin._ct_admins.pop('test_manifest', None)
+        
+        site.add_url(lambda request: None, 'lambda/', name='lambda_view')
+        with self.assertRaisesRegex(ValueError, "URL 'lambda/'"):
+            build_manifest({'test_manifest': site})
+    
+    def test_lazy_model_admins(self):
+        from django.contrib import admin
+        from django.contrib.auth.admin import UserAdmin
+        from django.contrib.auth.models import Group, User
+        from django.urls import resolve, reverse
+        from privex.adminplus.admin import LazyModelAdmin
+        site = CustomAdmin('test_admin')
+        with mock.patch.object(admin.ModelAdmin, '__init__', autospec=True, side_effect=admin.ModelAdmin.__init__) as init:
+            site.register(User, UserAdmin)
+            site.register(Group, list_display=('name',))
+            # Building and resolving the URLs (including UserAdmin's own password URL) doesn't instantiate any ModelAdmin
+            with mount(site):
+                self.assertEqual(reverse('admin:auth_user_password_change', args=(1,)), '/admin/auth/user/1/password/')
+                self.assertEqual(resolve('/admin/auth/group/1/change/').func.model_admin.model, Group)
+            self.assertEqual(init.call_count, 0)
+            self.assertIs(type(site._registry[User]), LazyModelAdmin)
+            self.assertIsInstance(site._registry[User], UserAdmin)
+            self.assertEqual(site._registry[Group].list_display, ('name',))
+            self.assertEqual(init.call_count, 1)
+            
+            # The app list needs each ModelAdmin's permission checks, so it instantiates the rest
+            with mount(site):
+                apps = site.get_app_list(self._request(self._user('yep', ['auth.view_user'])))
+            self.assertEqual([m['object_name'] for m in apps[0]['models']], ['User'])
+            self.assertEqual(init.call_count, 2)
+            self.assertTrue(site._registry[User].is_loaded)
+        
+        # A ModelAdmin registered by it's dotted path is imported when it's first needed
+        site = CustomAdmin('test_admin')
+        site.register(User, 'django.contrib.auth.admin.UserAdmin')
+        self.assertEqual(str(site._registry[User]), 'auth.UserAdmin')
+        self.assertFalse(site._registry[User].is_imported)
+        self.assertIs(site._registry[User].admin_class, UserAdmin)
+        self.assertIsInstance(site._registry[User].instance, UserAdmin)
+        with self.assertRaises(admin.sites.AlreadyRegistered):
+            site.register(User, UserAdmin)
+    
+    def test_warm_up(self):
+        from django.contrib.auth.models import User
+        from privex.adminplus.admin import WARM_UP_TEMPLATES
+        site = CustomAdmin('test_admin')
+        site.register(User)
+        site.add_url(example_view, 'example/')
+        site.add_url('tests.ExampleClassView', 'lazy/')
+        with mount(site), mock.patch('django.template.loader.get_template') as get_template:
+            timings = site.warm_up(model_admins=True, views=True)
+            self.assertEqual(list(timings.keys()), ['urls', 'resolvers', 'templates', 'model_admins', 'views'])
+            # The first request then finds the URLs, reversed custom URLs, templates, ModelAdmins and views ready
+            self.assertEqual(site._urls_cache[0], site.generation)
+            self.assertEqual(site._reverse_cache[1][site._url_key()]['example/'].url, '/admin/example/')
+            self.assertEqual([c.args[0] for c in get_template.call_args_list], list(WARM_UP_TEMPLATES))
+            self.assertTrue(site._registry[User].is_loaded)
+            self.assertTrue(inspect.unwrap(site.custom_urls[1].callback).is_loaded)
+    
+    def test_backported_blocktranslate(self):
+        from django.template import Context, Engine
+        from privex.adminplus.backports.templatetags.blocktranslate import BlockTranslateNode
+        engine = Engine(libraries={'blocktranslate': 'privex.adminplus.backports.templatetags.blocktranslate'})
+        tpl = engine.from_string(
+            "{% load blocktranslate %}{% blocktranslate trimmed with name=model count counter=n %}\n  {{ counter }} {{ name }} "
+            "at 100%\n{% plural %}\n  {{ counter }} {{ name }}s at 100%\n{% endblocktranslate %}"
+        )
+        node, = tpl.nodelist.get_nodes_by_type(BlockTranslateNode)
+        # The messages are built when parsing, rather than on every render
+        self.assertEqual(node.singular_message, '%(counter)s %(name)s at 100%%')
+        self.assertEqual(node.plural_vars, ('counter', 'name'))
+        with mock.patch.object(BlockTranslateNode, 'render_token_list') as render_token_list:
+            self.assertEqual(tpl.render(Context(dict(model='post', n=1))), '1 post at 100%')
+            self.assertEqual(tpl.render(Context(dict(model='post', n=3))), '3 posts at 100%')
+        render_token_list.assert_not_called()
+    
+    def test_snapshot_readers_never_block(self):
+        import threading
+        site = CustomAdmin('test_admin')
+        errors, done = [], threading.Event()
+        
+        def read():
+            snap = site.snapshot
+            if [str(u.pattern) for u in snap.urls] != list(snap.url_map) or len(snap.url_names) != len(snap.url_map):
+                errors.append(snap)
+            site.get_urls()
+        
+        # Readers don't take the writer lock, so they still complete while a writer holds it
+        with site._write_lock:
+            t = threading.Thread(target=read)
+            t.start()
+            t.join(5)
+            self.assertFalse(t.is_alive())
+        
+        def reader():
+            while not done.is_set():
+                read()
+        
+        readers = [threading.Thread(target=reader) for _ in range(8)]
+        for t in readers:
+            t.start()
+        for i in range(300):
+            site.add_url(example_view, f'stress_{i}/', name=f'stress_{i}')
+        done.set()
+        for t in readers:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(site.custom_urls), 300)
+        
+        # Snapshots share the registry's append-only storage, but never see entries added after they were published
+        snap = site.snapshot
+        site.add_url(example_view, 'late/', name='late')
+        self.assertEqual((len(snap.urls), len(snap.url_map), len(snap.specs)), (300, 300, 300))
+        self.assertNotIn('late/', snap.url_map)
+        self.assertIsNone(snap.url_names.get('late'))
+        self.assertEqual(list(snap.url_map)[-1], 'stress_299/')
+        self.assertEqual(site.get_url_by_name('late').route, 'late/')
+    
+    def test_missing_apps_injected_during_populate(self):
+        import subprocess
+        import sys
+        script = (
+            "from django.conf import settings\n"
+            "settings.configure(DATABASES={}, INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes', "
+            "'privex.adminplus.apps.PrivexAdminPlusConfig'])\n"
+            "from django.contrib.auth.apps import AuthConfig\n"
+            "calls, _ready = [], AuthConfig.ready\n"
+            "AuthConfig.ready = lambda self: (calls.append(1), _ready(self))[1]\n"
+            "import django; django.setup()\n"
+            "from django.apps import apps\n"
+            "print(len(calls), type(apps.get_app_config('admin')).__name__, ','.join(apps.app_configs))\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        out = subprocess.run([sys.executable, '-c', script], env=env, check=True, capture_output=True, text=True).stdout
+        # PVXAdmin is loaded right after adminplus, without re-populating (and re-running ready() of) every app
+        self.assertEqual(out.split(), ['1', 'PVXAdmin', 'auth,contenttypes,adminplus,admin'])
+
+
 if __name__ == "__main__":
     import dotenv
     import unittest